@@ -1,23 +1,195 @@
-import yfinance as yf
-import pandas as pd
+import time
+STARTED_AT = time.perf_counter()
+
+import atexit
+import os
+import threading
+from concurrent.futures import as_completed
 from flask import Flask, request, jsonify
-from utils.validateTicker import validate_ticker as isValidTicker
-from flask import Flask, request, jsonify, Request
+from flask import Flask, request, jsonify, Request, Response, g, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+from utils import metrics
+from utils.encoding import dumps, encodeObject, etagFor, etagMatches, withField
+
+# numpy, pandas and yfinance are only imported by createCaches(), on the boot thread,
+# so the server starts accepting requests before they load
+
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify through the fast encoder, NumPy values included"""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return dumps(obj).decode()
 
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
+
+# shared state, built by createCaches() for both this server and the async one in asgi.py
+gCache = sCache = vCache = mCache = bCache = None
+hPayloads = None
+
+# market used for averages, predictions and beta unless a request picks another with ?benchmark=
+DEFAULT_BENCHMARK = 'SPY'
+
+# set once the caches exist and the snapshot is restored, /data and /frontier answer 503 before that
+READY = threading.Event()
+STARTUP = {'readySeconds': None, 'firstRequestSeconds': None, 'restored': 0, 'warmed': False}
+SNAPSHOT_PATH = os.environ.get('AXIA_SNAPSHOT_PATH', 'data/snapshot.pkl')
+SNAPSHOT_INTERVAL = float(os.environ.get('AXIA_SNAPSHOT_INTERVAL', 300))
+
+# routes that work while the caches are still being built
+UNGATED = ('/ping', '/ready', '/stats', '/metrics')
+
+# seconds clients and proxies may reuse a fresh /data body, stale bodies must be revalidated
+DATA_MAX_AGE = int(os.environ.get('AXIA_DATA_MAX_AGE', 30))
+
+
+def createCaches():
+    """Builds the validation, stats, graph, market and beta caches"""
+    global gCache, sCache, vCache, mCache, bCache, hPayloads
+    from utils.cache import BetaCache, GraphCache, MarketCache, StatsCache, ValidationCache
+    from utils.history import HistoryPayloads
+    from utils.sharedCache import makeBackend
+
+    SWEEP = 999
+    VALIDATION_TTL = 3600
+
+    # store shared by every worker on the host, e.g. sqlite:///data/cache.sqlite3 or redis://127.0.0.1:6379
+    # with it only one worker fetches a given ticker, and warmups after the first are read from the store
+    backend = makeBackend(os.environ.get('AXIA_CACHE_BACKEND'))
+
+    # memory budgets in bytes, entries past these are evicted by each cache's policy
+    MB = 1024 * 1024
+    VALIDATION_BYTES, STATS_BYTES, GRAPH_BYTES, HISTORY_BYTES, BETA_BYTES = 16 * MB, 16 * MB, 64 * MB, 32 * MB, 4 * MB
+    vCache = ValidationCache(VALIDATION_TTL, SWEEP, maxBytes=VALIDATION_BYTES, evictionPolicy='ttl-lru', backend=backend)
+
+    # soft TTL: served stale + refreshed in background, hard TTL: never served past this age
+    # the idle TTL of these caches is their hard TTL, so an entry is not swept before it can be served stale
+    STATS_SOFT_TTL, STATS_HARD_TTL = 600, 3600
+    GRAPH_SOFT_TTL, GRAPH_HARD_TTL = 3600, 86400
+    MARKET_TTL, MARKET_SOFT_TTL = 86400, 900
+    gCache = GraphCache(GRAPH_HARD_TTL, SWEEP, softTTL=GRAPH_SOFT_TTL, hardTTL=GRAPH_HARD_TTL, refreshBatchSize=8,
+                        maxBytes=GRAPH_BYTES, evictionPolicy='lfu', backend=backend)
+    sCache = StatsCache(STATS_HARD_TTL, SWEEP, validator=vCache, softTTL=STATS_SOFT_TTL, hardTTL=STATS_HARD_TTL, refreshBatchSize=25,
+                        maxBytes=STATS_BYTES, evictionPolicy='lru', backend=backend)
+
+    # one entry per benchmark symbol, unused benchmarks age out after a day
+    mCache = MarketCache(MARKET_TTL, SWEEP, softTTL=MARKET_SOFT_TTL, hardTTL=MARKET_TTL, refreshBatchSize=4, backend=backend)
+
+    # betas against other benchmarks, regressed once per (ticker, benchmark) and kept as long as the graphs
+    # the regression is local, so a miss is computed right away instead of waiting for a batch
+    bCache = BetaCache(GRAPH_HARD_TTL, SWEEP, gCache.store, coalesceWindow=0, softTTL=GRAPH_SOFT_TTL, hardTTL=GRAPH_HARD_TTL,
+                       maxBytes=BETA_BYTES, evictionPolicy='lru', backend=backend)
+
+    # encoded /history payloads over the graphs' price store
+    hPayloads = HistoryPayloads(gCache.store, maxBytes=HISTORY_BYTES)
+
+
+def caches() -> dict:
+    """Every cache by name, the ones not built yet are None"""
+    return {'validation': vCache, 'stats': sCache, 'graphs': gCache, 'market': mCache, 'betas': bCache}
+
+
+def warmCaches(count: int = 100):
+    """Warms the market metrics of the default benchmark, then the first count S&P 500 tickers"""
+    from utils.scripts import getSp500Tickers
+
+    # pacing comes from the fetch scheduler's rate limit, where warmup yields to user requests
+    mCache.warmup([DEFAULT_BENCHMARK], batchSize=1)
+    sp500 = [t for t in getSp500Tickers()][:count]
+    sCache.warmup(sp500, batchSize=25)
+    gCache.warmup(sp500, batchSize=8)
+
+
+def saveCaches():
+    """Writes the caches to the snapshot file"""
+    from utils.snapshot import saveSnapshot
+
+    if not READY.is_set():
+        return
+    try:
+        saved = saveSnapshot(SNAPSHOT_PATH, caches())
+        print(f'saved {saved} cache entries to {SNAPSHOT_PATH}')
+    except Exception as e:
+        print(f'cache snapshot failed: {e}')
+
+
+def restoreCaches() -> int:
+    """Restores the caches from the snapshot file, if there is one"""
+    from utils.snapshot import loadSnapshot
+
+    return loadSnapshot(SNAPSHOT_PATH, caches())[0]
+
+
+def markFirstRequest():
+    """Records and reports time-to-first-request once"""
+    if STARTUP['firstRequestSeconds'] is None:
+        STARTUP['firstRequestSeconds'] = round(time.perf_counter() - STARTED_AT, 3)
+        print(f'first request {STARTUP["firstRequestSeconds"]}s after start')
+
+
+def boot(warmupCount: int):
+    """
+    Builds and restores the caches, then warms the rest in the background
+    and keeps snapshotting them every SNAPSHOT_INTERVAL seconds
+    """
+
+    createCaches()
+    STARTUP['restored'] = restoreCaches()
+    READY.set()
+    STARTUP['readySeconds'] = round(time.perf_counter() - STARTED_AT, 3)
+    print(f'ready {STARTUP["readySeconds"]}s after start, restored {STARTUP["restored"]} cache entries')
+
+    try:
+        from utils.analyticsPool import getAnalyticsPool
+        getAnalyticsPool().warm()
+        warmCaches(warmupCount)
+        STARTUP['warmed'] = True
+        print(f'warm {time.perf_counter() - STARTED_AT:.3f}s after start')
+    except Exception as e:
+        print(f'warmup failed: {e}')
+
+    while True:
+        saveCaches()
+        time.sleep(SNAPSHOT_INTERVAL)
+
 
+def startBackground(warmupCount: int):
+    """Starts boot() on a daemon thread and snapshots the caches again at exit"""
+    threading.Thread(target=boot, args=(warmupCount,), daemon=True, name='axia-boot').start()
+    atexit.register(saveCaches)
 
-def validateRequest() -> tuple[bool, str]:
-    """Ensures the request has required parameters"""
+
+def validationError(results: dict, subject: str = 'at least 1 ticker') -> tuple[str | None, int]:
+    """
+    Turns ValidationCache.validate results into (error, status), error is None when every ticker is valid
+    An unknown symbol is a 400, a lookup that failed upstream is a 503 so the client retries
+    """
+    values = results.values()
+    if False in values:
+        return f'{subject} was invalid', 400
+    if None in values:
+        return f'could not validate {subject}, try again', 503
+    return None, 200
+
+
+def validateRequest() -> tuple[bool, str, int]:
+    """Ensures the request has required parameters, returns (isValid, error, status)"""
 
     rawTickers = str(request.args.get('tickers')).split(',')    
-    # error checking tickers
-    if any(not isValidTicker(ticker) for ticker in rawTickers):
-        err = 'at least 1 ticker was invalid'
-        return False, err
+    # error checking tickers, known symbols are O(1), unknown ones are checked remotely in one cached batch
+    with metrics.span('validate'):
+        error, status = validationError(vCache.validate(rawTickers))
+    if error is not None:
+        return False, error, status
     else:
-        return True, 'success'
+        return True, 'success', 200
+
+
+def readBenchmark(args) -> str:
+    """Benchmark symbol requested with ?benchmark=, the default benchmark otherwise"""
+    return str(args.get('benchmark') or DEFAULT_BENCHMARK).strip().upper()
 
 
 def merge(d1: dict, d2: dict) -> dict:
@@ -28,6 +200,277 @@ def merge(d1: dict, d2: dict) -> dict:
         d1[k] = v
     return d1
 
+def betaKeys(graphs: dict, benchmark: str) -> dict:
+    """Beta cache key -> ticker for the loaded tickers, empty for the default benchmark whose beta is in the graphs"""
+    if benchmark == DEFAULT_BENCHMARK:
+        return {}
+    return {bCache.key(ticker, benchmark): ticker for ticker, graph in graphs.items() if graph}
+
+
+def readBetas(graphs: dict, benchmark: str) -> dict:
+    """Ticker -> beta against a non-default benchmark, each pair is regressed once and then read from the beta cache"""
+    keys = betaKeys(graphs, benchmark)
+    if not keys:
+        return {}
+    return {keys[key]: beta for key, beta in bCache.readItems(list(keys)).items()}
+
+
+def betaOverrides(stats: dict, graphs: dict, benchmark: str = DEFAULT_BENCHMARK, betas: dict | None = None) -> dict:
+    """
+    Ticker -> beta regressed on our own price history, reported instead of Yahoo's figure
+    Graphs carry the beta against the default benchmark, other benchmarks come from betas (as read by readBetas),
+    computed with the same estimator (simple-return OLS over paired days), so a ticker's beta never depends on the path
+    """
+
+    if benchmark == DEFAULT_BENCHMARK:
+        betas = {ticker: graph['beta']['beta'] for ticker, graph in graphs.items() if graph and 'beta' in graph}
+    elif betas is None:
+        betas = readBetas(graphs, benchmark)
+    return {ticker: beta for ticker, beta in betas.items() if stats.get(ticker) is not None and 'error' not in stats[ticker]}
+
+
+def applyBeta(stats: dict, graphs: dict, benchmark: str = DEFAULT_BENCHMARK, betas: dict | None = None) -> dict:
+    """
+    Merges the beta overrides into the stats dicts
+    """
+    for ticker, beta in betaOverrides(stats, graphs, benchmark, betas).items():
+        stats[ticker] = merge(dict(stats[ticker]), {'Beta': beta})
+    return stats
+
+
+@metrics.timed('serialize')
+def encodeData(stats: dict, graphs: dict, stale: set, market: dict | None = None,
+               benchmark: str = DEFAULT_BENCHMARK, betas: dict | None = None) -> bytes:
+    """
+    Builds the /data response body from cache reads by joining pre-encoded per-ticker fragments
+    market is the MarketCache entry of benchmark, None if it could not be loaded
+    betas are the tickers' betas against a non-default benchmark (readBetas), read here when not given
+
+    Each ticker's stats (with its beta override) and graphs are encoded once per cache load and kept
+    next to the cached values, only the portfolio-dependent MCTR is spliced in per request
+    """
+
+    betas = betaOverrides(stats, graphs, benchmark, betas)
+    statItems = []
+    for ticker, value in stats.items():
+        extra = {'Beta': betas[ticker]} if ticker in betas else None
+        fragment = sCache.encoded(ticker, extra)
+        statItems.append((ticker, fragment if fragment is not None else dumps(dict(value, **extra) if extra else value)))
+
+    market = market or {}
+    statItems.append(('marketAverages', dumps(market.get('averages'))))
+    statItems.append(('marketPredictions', dumps(market.get('predictions'))))
+
+    graphItems = []
+    for ticker, value in graphs.items():
+        fragment = gCache.encoded(ticker)
+        if fragment is None:
+            fragment = dumps(value)
+        elif 'mctr' in value:
+            fragment = withField(fragment, 'mctr', value['mctr'])
+        graphItems.append((ticker, fragment))
+
+    return encodeObject([
+        ('stats', encodeObject(statItems)),
+        ('graphs', encodeObject(graphItems)),
+        ('stale', dumps(sorted(stale))),
+        ('benchmark', dumps(benchmark)),
+    ])
+
+
+def conditionalBody(body: bytes, ifNoneMatch: str | None, isStale: bool) -> tuple[bytes, int, dict]:
+    """
+    ETag and Cache-Control for a response body, (b'', 304) when the client already holds it
+    """
+    etag = etagFor(body)
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache' if isStale else f'public, max-age={DATA_MAX_AGE}'}
+    if etagMatches(ifNoneMatch, etag):
+        return b'', 304, headers
+    return body, 200, headers
+
+
+class TickerStream:
+    """
+    Pairs each ticker's stats and graphs as they arrive from the caches and turns them into stream events:
+        market      benchmark averages and predictions, sent first
+        ticker      one per ticker, {'ticker', 'stats', 'graphs', 'stale'}, in completion order
+        error       a ticker whose load failed
+        done        the portfolio's MCTR (needs every ticker) and the stale tickers, sent last
+
+    Unlike /data, ticker events' graphs have no 'mctr', clients merge it from the done event's {ticker: mctr}
+
+    With a non-default benchmark, the caller fills betas (readBetas) as each ticker's graphs arrive
+    """
+
+    PARTS = ('stats', 'graphs')
+
+    def __init__(self, tickers: list[str], benchmark: str, market: dict | None):
+        self.benchmark = benchmark
+        self.market = market or {}
+        self.pending = {ticker: {} for ticker in tickers}
+        self.loaded = []
+        self.stale = set()
+        self.betas = {}
+
+
+    def start(self) -> dict:
+        return {'type': 'market', 'benchmark': self.benchmark,
+                'marketAverages': self.market.get('averages'), 'marketPredictions': self.market.get('predictions')}
+
+
+    def add(self, part: str, ticker: str, value, isStale: bool = False, error: Exception | None = None) -> list[dict]:
+        """
+        Records one cache's result for a ticker, returns the events it completes
+        """
+
+        slot = self.pending.get(ticker)
+        if slot is None:
+            return []
+        if error is not None:
+            del self.pending[ticker]
+            return [{'type': 'error', 'ticker': ticker, 'error': str(error)}]
+
+        slot[part] = value
+        if isStale:
+            self.stale.add(ticker)
+        if len(slot) < len(self.PARTS):
+            return []
+
+        del self.pending[ticker]
+        graphs = {ticker: slot['graphs']} if slot['graphs'] is not None else {}
+        stats = applyBeta({ticker: slot['stats']}, graphs, self.benchmark, self.betas)
+        self.loaded.append(ticker)
+        return [{'type': 'ticker', 'ticker': ticker, 'stats': stats[ticker], 'graphs': slot['graphs'],
+                 'stale': ticker in self.stale}]
+
+
+    def finish(self) -> dict:
+        loaded = [ticker for ticker in self.loaded if ticker in gCache.returnStats]
+        return {'type': 'done', 'count': len(self.loaded), 'mctr': gCache.returnStats.mctr(loaded) if loaded else {},
+                'stale': sorted(self.stale)}
+
+
+def encodeEvent(event: dict, fmt: str) -> str:
+    """One NDJSON line, or one Server-Sent Event when fmt is 'sse'"""
+    body = dumps(event).decode()
+    return f'event: {event["type"]}\ndata: {body}\n\n' if fmt == 'sse' else body + '\n'
+
+
+def streamFormat(args) -> tuple[str | None, str | None]:
+    """Returns (format, mimetype) for ?stream=1|ndjson|sse, (None, None) without it"""
+    fmt = str(args.get('stream') or '').lower()
+    if fmt in ('', '0', 'false'):
+        return None, None
+    if fmt == 'sse':
+        return 'sse', 'text/event-stream'
+    return 'ndjson', 'application/x-ndjson'
+
+
+def streamData(tickers: list[str], benchmark: str, fmt: str):
+    """
+    Yields /data as a stream: cache hits are sent immediately, misses as their batch completes
+    """
+
+    market = mCache.readItems([benchmark]).get(benchmark)
+    if benchmark != DEFAULT_BENCHMARK:
+        gCache.readItems([benchmark])
+
+    stream = TickerStream(list(dict.fromkeys(tickers)), benchmark, market)
+    yield encodeEvent(stream.start(), fmt)
+
+    waiting = {}
+    for part, cache in zip(TickerStream.PARTS, (sCache, gCache)):
+        hits, stale, futures = cache.readItemsDeferred(tickers)
+        if part == 'graphs':
+            stream.betas.update(readBetas(hits, benchmark))
+        for ticker, value in hits.items():
+            for event in stream.add(part, ticker, value, ticker in stale):
+                yield encodeEvent(event, fmt)
+        waiting.update({future: (part, ticker) for ticker, future in futures.items()})
+
+    for future in as_completed(waiting):
+        part, ticker = waiting[future]
+        error = future.exception()
+        if part == 'graphs' and error is None:
+            stream.betas.update(readBetas({ticker: future.result()}, benchmark))
+        for event in stream.add(part, ticker, None if error else future.result(), error=error):
+            yield encodeEvent(event, fmt)
+
+    yield encodeEvent(stream.finish(), fmt)
+
+
+def parseFrontierArgs(args, tickers: list[str]):
+    """
+    Parses capital/points/samples query args for /frontier
+    Returns (capital, points, samples, error)
+    """
+    import numpy as np
+    from utils.efficientFrontier import MAX_POINTS
+
+    if len(tickers) < 2:
+        return None, 0, 0, 'the frontier needs at least 2 distinct tickers'
+    try:
+        capital = args.get('capital')
+        capital = None if capital is None else np.array([float(c) for c in capital.split(',')])
+        points = int(args.get('points', 50))
+        samples = min(int(args.get('samples', 0)), 100000)
+    except ValueError:
+        return None, 0, 0, 'capital, points and samples must be numeric'
+    if not 2 <= points <= MAX_POINTS:
+        return None, 0, 0, f'points must be between 2 and {MAX_POINTS}'
+    if capital is not None and len(capital) != len(tickers):
+        return None, 0, 0, 'capital must have one value per ticker'
+    if capital is not None and not (np.isfinite(capital).all() and (capital >= 0).all() and capital.sum() > 0):
+        return None, 0, 0, 'capital must be non-negative with a positive total'
+    return capital, points, samples, None
+
+
+def wantsTiming(args) -> bool:
+    """True when a request opts into its Server-Timing header with ?timing=1"""
+    return str(args.get('timing') or '').lower() in ('1', 'true')
+
+
+def metricsBody() -> str:
+    """Prometheus exposition of the request, stage and upstream metrics plus every cache's counters"""
+    if not READY.is_set():
+        return metrics.REGISTRY.render()
+
+    from utils.infoCache import getInfoCache
+    from utils.scheduler import getScheduler
+
+    families = metrics.cacheFamilies(caches())
+    families += metrics.payloadFamilies('info', getInfoCache().stats())
+    families += metrics.payloadFamilies('history', hPayloads.stats())
+    families += metrics.schedulerFamilies(getScheduler().stats())
+    return metrics.REGISTRY.render(families)
+
+
+@app.before_request
+def startTiming():
+    """Starts the request clock and, when wanted, span collection for Server-Timing"""
+    g.startedAt = time.perf_counter()
+    metrics.beginRequest(wantsTiming(request.args))
+
+
+@app.after_request
+def finishTiming(response):
+    """Records the request in the metrics and attaches Server-Timing to non-streamed responses"""
+    elapsed = time.perf_counter() - g.startedAt
+    metrics.observeRequest(request.url_rule.rule if request.url_rule else 'unmatched', response.status_code, elapsed)
+    timing = None if response.is_streamed else metrics.serverTiming(elapsed)
+    if timing is not None:
+        response.headers['Server-Timing'] = timing
+    return response
+
+
+@app.before_request
+def gateUntilReady():
+    """Answers 503 for data routes until the caches are ready"""
+    markFirstRequest()
+    if not READY.is_set() and request.path not in UNGATED:
+        return {'error': 'starting up'}, 503, {'Retry-After': '1'}
+
+
 # ping to test connection
 @app.route("/ping", methods=["GET"])
 def ping():
@@ -35,37 +478,95 @@ def ping():
     return jsonify({"success": True}), 200
 
 
+# readiness for load balancers, 200 once the caches can serve requests
+@app.route("/ready", methods=["GET"])
+def ready():
+    """Reports whether the caches are built and whether warmup finished"""
+    return jsonify({'ready': READY.is_set(), **STARTUP}), 200 if READY.is_set() else 503
+
+
+def statsBody() -> dict:
+    """Counters for every cache and the fetch scheduler"""
+    if not READY.is_set():
+        return {'startup': STARTUP}
+
+    from utils.analyticsPool import getAnalyticsPool
+    from utils.infoCache import getInfoCache
+    from utils.scheduler import getScheduler
+
+    stats = {name: cache.stats() for name, cache in caches().items() if cache is not None}
+    return {'caches': stats, 'history': hPayloads.stats(), 'info': getInfoCache().stats(), 'scheduler': getScheduler().stats(),
+            'analytics': getAnalyticsPool().stats(), 'startup': STARTUP}
+
+
+# cache observability
+@app.route("/stats", methods=["GET"])
+def cacheStats():
+    """Reports entries, bytes, hit/miss and eviction counters for the shared caches"""
+    return jsonify(statsBody()), 200
+
+
+# Prometheus scrape target
+@app.route("/metrics", methods=["GET"])
+def metricsCall():
+    """Request, stage, upstream and cache metrics in the Prometheus text format"""
+    return Response(metricsBody(), content_type=metrics.CONTENT_TYPE)
+
+
 # collect data given tickers, interval, period
 @app.route("/data", methods=["GET"])
 def yfinanceCall():
     """For fetching data from yfinance
     Parameters:        
             tickers:        a comma-separated string of length-4 tickers to collect data on    
+            benchmark:      market symbol for averages, predictions and beta (default SPY)
+            stream:         1 or ndjson for newline-delimited JSON, sse for Server-Sent Events,
+                            per-ticker results are sent as they become available,
+                            the MCTR of every ticker comes in the final 'done' event instead of its graphs
+            timing:         1 to get a Server-Timing header breaking the response time down by stage
     """
 
     # validate the request
-    isValid, error = validateRequest()
+    isValid, error, status = validateRequest()
     if not isValid:
-        return {'error': error}, 400
+        return {'error': error}, status
+
+    benchmark = readBenchmark(request.args)
+    error, status = validationError(vCache.validate([benchmark]), 'benchmark')
+    if error is not None:
+        return {'error': error}, status
 
     # read the tickers
     tickers = list(str(request.args.get('tickers')).split(','))
     print(tickers)
+
+    fmt, mimetype = streamFormat(request.args)
+    if fmt is not None:
+        return Response(stream_with_context(streamData(tickers, benchmark, fmt)), mimetype=mimetype,
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
     
     try:
 
         # readItems internally handles misses
-        # market vals are fixed at start, and | takes the union of the 3 dicts
-        stats = sCache.readItems(tickers)
-        graphs = gCache.readItems(tickers)
-
-        stats = merge(merge(stats, {'marketAverages': CURRENT_MARKET}), {'marketPredictions': EXPECTED_MARKET})
+        # market metrics are shared per benchmark, and | takes the union of the 3 dicts
+        # stale entries are served immediately while the caches refresh them in the background
+        with metrics.span('stats'):
+            stats, staleStats = sCache.readItemsWithStatus(tickers)
+        with metrics.span('graphs'):
+            graphs, staleGraphs = gCache.readItemsWithStatus(tickers)
+        with metrics.span('market'):
+            market = mCache.readItems([benchmark]).get(benchmark)
 
-        return {
-            'stats': stats,
-            'graphs': graphs,
+            # betas against another benchmark need its closes in the price store
+            if benchmark != DEFAULT_BENCHMARK:
+                gCache.readItems([benchmark])
+        with metrics.span('betas'):
+            betas = readBetas(graphs, benchmark)
 
-        }, 200
+        stale = staleStats | staleGraphs
+        body = encodeData(stats, graphs, stale, market, benchmark, betas)
+        body, status, headers = conditionalBody(body, request.headers.get('If-None-Match'), bool(stale))
+        return Response(body, status=status, headers=headers, mimetype='application/json')
         
     except Exception as e:
         print(e)
@@ -73,20 +574,120 @@ def yfinanceCall():
         return {'err': 'internal server error'}, 500
 
 
-if __name__ == "__main__":
-    from utils.cache import GraphCache, StatsCache
-    from utils.scripts import fetchMarketData, getSp500Tickers
+def historyBody(args) -> tuple[bytes | dict, int, str]:
+    """
+    Builds a /history response from query args, shared by both servers
+    Returns (body, status, mimetype), error bodies are dicts
+    """
+    from utils.history import parseHistoryArgs
+
+    tickers = list(dict.fromkeys(str(args.get('tickers')).upper().split(',')))
+    options, error = parseHistoryArgs(args)
+    if error is not None:
+        return {'error': error}, 400, 'application/json'
+    try:
+        with metrics.span('history'):
+            payload, mimetype = hPayloads.get(tickers, **options)
+    except ValueError as e:
+        return {'error': str(e)}, 406, 'application/json'
+    return payload, 200, mimetype
+
+
+def legacyHistoryBody(symbol: str) -> tuple[dict, int]:
+    """
+    Last year of daily closes for one ticker as [{'date', 'close'}] records, the shape of the old
+    standalone history app (utils/yFinanceCall.py), read from the same store as /data and /history
+    """
+    import numpy as np
+    from utils.history import periodStart, readColumns
+
+    symbol = symbol.upper()
+    with metrics.span('history'):
+        gCache.store.update([symbol])
+        columns = readColumns(gCache.store, [symbol], start=periodStart('1y'), decimals=2)[symbol]
+    if not len(columns['date']):
+        return {'error': f'No data found for symbol {symbol}'}, 404
+
+    dates = np.datetime_as_string(columns['date'], unit='D').tolist()
+    return {'symbol': symbol, 'history': [{'date': date, 'close': close} for date, close in zip(dates, columns['close'].tolist())]}, 200
+
+
+# columnar price history over the shared price store
+@app.route("/history", methods=["GET"])
+def historyCall():
+    """Price history as parallel columns
+    Parameters:
+            tickers:        comma-separated tickers
+            start, end:     optional YYYY-MM-DD bounds, inclusive (default: all stored history)
+            period:         alternative to start, e.g. 1mo, 6mo, 1y, 5y, ytd or max (alias: range)
+            interval:       1d (default), 1wk, 1mo or 3mo bars, built from the stored daily bars
+            points:         optional cap on rows per ticker, applied after interval
+            downsample:     lttb (default, keeps the shape of the close line) or ohlc (equal-width bars) when over points
+            fields:         close (default), ohlcv, or a comma-separated subset of open,high,low,close,volume
+            format:         json (default), msgpack or arrow
+            decimals:       optional rounding of price columns
+    """
 
-    sp500 = [t for t in getSp500Tickers()][:100]
+    isValid, error, status = validateRequest()
+    if not isValid:
+        return {'error': error}, status
+
+    body, status, mimetype = historyBody(request.args)
+    if status != 200:
+        return body, status
+    return Response(body, status=status, mimetype=mimetype)
+
+
+# one ticker's last year of closes, kept for clients of the old standalone history app
+@app.route("/api/history/<symbol>", methods=["GET"])
+def legacyHistoryCall(symbol):
+    """Last year of daily closes for symbol as [{'date', 'close'}] records"""
+    body, status = legacyHistoryBody(symbol)
+    return jsonify(body), status
+
+
+# mean-variance optimizer over the requested tickers
+@app.route("/frontier", methods=["GET"])
+def frontierCall():
+    """Computes the efficient frontier of a portfolio
+    Parameters:
+            tickers:        comma-separated tickers
+            capital:        optional comma-separated capital per ticker, equal weights when omitted
+            points:         number of frontier points, 2 to 500 (default 50)
+            samples:        number of random long-only portfolios to simulate (default 0)
+    """
+    from utils.scripts import optimizePortfolio
+
+    isValid, error, status = validateRequest()
+    if not isValid:
+        return {'error': error}, status
+
+    tickers = list(dict.fromkeys(str(request.args.get('tickers')).split(',')))
+    capital, points, samples, error = parseFrontierArgs(request.args, tickers)
+    if error is not None:
+        return {'error': error}, 400
+
+    # loads any missing histories into the shared return statistics
+    gCache.readItems(tickers)
+    loaded = [t for t in tickers if t in gCache.returnStats]
+    if len(loaded) != len(tickers):
+        return {'error': 'no price history for at least 1 ticker'}, 400
+
+    try:
+        return optimizePortfolio(gCache.returnStats, tickers, capital, points, samples), 200
+    except ValueError as e:
+        return {'error': str(e)}, 400
+
+
+if __name__ == "__main__":
     test = ['AAPL', 'MSFT', 'AMZN', 'GOOG', 'META', 'TSLA', 'NVDA', 'JPM', 'BAC', 'WMT', 
             'DIS', 'KO', 'PFE', 'MRK', 'INTC', 'ORCL', 'CSCO', 'XOM', 'CVX', 'NKE']
-    TTL, SWEEP = 999, 999
-    gCache, sCache = GraphCache(TTL, SWEEP), StatsCache(TTL, SWEEP)
-    
-    # warm up caches
-    sCache.warmup(sp500, batchSize=25, delay=2.0)
-    gCache.warmup(sp500, batchSize=8, delay=1.0)
-    
-    # constants that dont rlly change in short term
-    CURRENT_MARKET, EXPECTED_MARKET = fetchMarketData()
+
+    # caches are built, restored and warmed in the background while the server already accepts requests
+    startBackground(int(os.environ.get('AXIA_WARMUP_COUNT', 100)))
+
+    # SIGTERM exits through atexit so the final snapshot is written
+    import signal, sys
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f'listening {time.perf_counter() - STARTED_AT:.3f}s after start')
     app.run(port=4000)
\ No newline at end of file
@@ -0,0 +1,290 @@
+"""
+Async serving mode for the data service
+
+    uvicorn asgi:app --port 4000
+
+Runs every request on one long-lived event loop. Cache hits (validations included) are answered
+on the loop, cache misses become awaitable futures filled on a bounded load pool that is separate
+from the pool for CPU work, so cheap requests never queue behind a slow cold load.
+
+Startup does not wait on the caches: they are built, restored from the last snapshot
+and warmed in the background, /ping and /ready answer right away.
+"""
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.datastructures import MutableHeaders, QueryParams
+from starlette.middleware import Middleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Match, Route
+
+import app as core
+from utils import metrics
+from utils.encoding import dumps
+
+# bounded pool for heavy numpy work, never held by upstream I/O
+BLOCKING_POOL = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('AXIA_BLOCKING_WORKERS', 8)),
+    thread_name_prefix='axia-blocking',
+)
+
+# separate pool for cache-miss loads and store updates, which wait on upstream latency,
+# so cold tickers never queue the cheap work of hot requests
+LOAD_POOL = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('AXIA_LOAD_WORKERS', 16)),
+    thread_name_prefix='axia-load',
+)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse through the fast encoder, NumPy values included"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+async def runBlocking(fn, *args, executor: ThreadPoolExecutor = BLOCKING_POOL):
+    """Runs a blocking call on a shared pool, in the request's context so its spans reach Server-Timing"""
+    return await asyncio.get_running_loop().run_in_executor(executor, contextvars.copy_context().run, fn, *args)
+
+
+async def validateTickers(tickers: list[str], subject: str = 'at least 1 ticker') -> tuple[bool, str, int]:
+    """Same contract as app.validateRequest, known and cached symbols are answered on the event loop"""
+    with metrics.span('validate'):
+        results = await core.vCache.validateAsync(tickers, LOAD_POOL)
+    error, status = core.validationError(results, subject)
+    if error is not None:
+        return False, error, status
+    return True, 'success', 200
+
+
+def readTickers(request) -> list[str]:
+    return str(request.query_params.get('tickers')).split(',')
+
+
+class ReadinessGate:
+    """
+    ASGI middleware that records time-to-first-request and answers 503 on data routes until the caches are ready
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            core.markFirstRequest()
+            if not core.READY.is_set() and scope['path'] not in core.UNGATED:
+                response = FastJSONResponse({'error': 'starting up'}, status_code=503, headers={'Retry-After': '1'})
+                return await response(scope, receive, send)
+        await self.app(scope, receive, send)
+
+
+class Instrumentation:
+    """
+    ASGI middleware that records every response in the request metrics
+    and adds Server-Timing to non-streamed responses of requests that want it
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        metrics.beginRequest(b'timing' in scope['query_string'] and core.wantsTiming(QueryParams(scope['query_string'])))
+        route = scope['path'] if scope['path'] in ROUTES else routeLabel(scope)
+
+        async def sendTimed(message):
+            if message['type'] == 'http.response.start':
+                elapsed = time.perf_counter() - started
+                metrics.observeRequest(route, message['status'], elapsed)
+                headers = MutableHeaders(scope=message)
+                timing = None if headers.get('content-type', '').startswith(STREAMED_TYPES) else metrics.serverTiming(elapsed)
+                if timing is not None:
+                    headers['Server-Timing'] = timing
+            await send(message)
+
+        await self.app(scope, receive, sendTimed)
+
+
+async def ping(request):
+    return FastJSONResponse({'success': True})
+
+
+async def ready(request):
+    return FastJSONResponse({'ready': core.READY.is_set(), **core.STARTUP}, status_code=200 if core.READY.is_set() else 503)
+
+
+async def cacheStats(request):
+    return FastJSONResponse(core.statsBody())
+
+
+async def metricsCall(request):
+    return Response(core.metricsBody(), media_type=metrics.CONTENT_TYPE)
+
+
+async def readBetas(graphs: dict, benchmark: str) -> dict:
+    """
+    Async form of app.readBetas, cached betas are answered on the loop and cold regressions run on the load pool
+    """
+    keys = core.betaKeys(graphs, benchmark)
+    if not keys:
+        return {}
+    betas, _ = await core.bCache.readItemsWithStatusAsync(list(keys), LOAD_POOL)
+    return {keys[key]: beta for key, beta in betas.items()}
+
+
+async def data(request):
+    tickers = readTickers(request)
+    isValid, error, status = await validateTickers(tickers)
+    if not isValid:
+        return FastJSONResponse({'error': error}, status_code=status)
+
+    benchmark = core.readBenchmark(request.query_params)
+    isValid, error, status = await validateTickers([benchmark], 'benchmark')
+    if not isValid:
+        return FastJSONResponse({'error': error}, status_code=status)
+
+    fmt, mimetype = core.streamFormat(request.query_params)
+    if fmt is not None:
+        return StreamingResponse(streamData(tickers, benchmark, fmt), media_type=mimetype,
+                                 headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    # both caches load concurrently, and each miss is shared with any other request waiting on it
+    # the market entry is shared by every request on the same benchmark
+    reads = [
+        core.sCache.readItemsWithStatusAsync(tickers, LOAD_POOL),
+        core.gCache.readItemsWithStatusAsync(tickers, LOAD_POOL),
+        core.mCache.readItemsWithStatusAsync([benchmark], LOAD_POOL),
+    ]
+    if benchmark != core.DEFAULT_BENCHMARK:
+        reads.append(core.gCache.readItemsWithStatusAsync([benchmark], LOAD_POOL))
+    with metrics.span('reads'):
+        (stats, staleStats), (graphs, staleGraphs), (market, _), *_ = await asyncio.gather(*reads)
+    with metrics.span('betas'):
+        betas = await readBetas(graphs, benchmark)
+    stale = staleStats | staleGraphs
+    body = core.encodeData(stats, graphs, stale, market.get(benchmark), benchmark, betas)
+    body, status, headers = core.conditionalBody(body, request.headers.get('if-none-match'), bool(stale))
+    return Response(body, status_code=status, headers=headers, media_type='application/json')
+
+
+async def streamData(tickers: list[str], benchmark: str, fmt: str):
+    """
+    Async form of app.streamData, misses are awaited on the loop instead of holding a thread per stream
+    """
+
+    (market, _), *_ = await asyncio.gather(
+        core.mCache.readItemsWithStatusAsync([benchmark], LOAD_POOL),
+        *([core.gCache.readItemsWithStatusAsync([benchmark], LOAD_POOL)] if benchmark != core.DEFAULT_BENCHMARK else []),
+    )
+
+    stream = core.TickerStream(list(dict.fromkeys(tickers)), benchmark, market.get(benchmark))
+    yield core.encodeEvent(stream.start(), fmt)
+
+    waiting = {}
+    for part, cache in zip(core.TickerStream.PARTS, (core.sCache, core.gCache)):
+        hits, stale, futures = cache.readItemsDeferred(tickers, LOAD_POOL)
+        if part == 'graphs':
+            stream.betas.update(await readBetas(hits, benchmark))
+        for ticker, value in hits.items():
+            for event in stream.add(part, ticker, value, ticker in stale):
+                yield core.encodeEvent(event, fmt)
+        waiting.update({asyncio.wrap_future(future): (part, ticker) for ticker, future in futures.items()})
+
+    while waiting:
+        done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            part, ticker = waiting.pop(future)
+            error = future.exception()
+            if part == 'graphs' and error is None:
+                stream.betas.update(await readBetas({ticker: future.result()}, benchmark))
+            for event in stream.add(part, ticker, None if error else future.result(), error=error):
+                yield core.encodeEvent(event, fmt)
+
+    yield core.encodeEvent(stream.finish(), fmt)
+
+
+async def frontier(request):
+    from utils.scripts import optimizePortfolio
+
+    tickers = list(dict.fromkeys(readTickers(request)))
+    isValid, error, status = await validateTickers(tickers)
+    if not isValid:
+        return FastJSONResponse({'error': error}, status_code=status)
+
+    capital, points, samples, error = core.parseFrontierArgs(request.query_params, tickers)
+    if error is not None:
+        return FastJSONResponse({'error': error}, status_code=400)
+
+    await core.gCache.readItemsWithStatusAsync(tickers, LOAD_POOL)
+    if any(ticker not in core.gCache.returnStats for ticker in tickers):
+        return FastJSONResponse({'error': 'no price history for at least 1 ticker'}, status_code=400)
+
+    try:
+        res = await runBlocking(optimizePortfolio, core.gCache.returnStats, tickers, capital, points, samples)
+    except ValueError as e:
+        return FastJSONResponse({'error': str(e)}, status_code=400)
+    return FastJSONResponse(res)
+
+
+async def history(request):
+    tickers = readTickers(request)
+    isValid, error, status = await validateTickers(tickers)
+    if not isValid:
+        return FastJSONResponse({'error': error}, status_code=status)
+
+    # store updates may go upstream, so the read runs off the loop
+    body, status, mimetype = await runBlocking(core.historyBody, request.query_params, executor=LOAD_POOL)
+    if status != 200:
+        return FastJSONResponse(body, status_code=status)
+    return Response(body, media_type=mimetype)
+
+
+async def legacyHistory(request):
+    body, status = await runBlocking(core.legacyHistoryBody, request.path_params['symbol'], executor=LOAD_POOL)
+    return FastJSONResponse(body, status_code=status)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    core.startBackground(int(os.environ.get('AXIA_WARMUP_COUNT', 100)))
+    print(f'listening {time.perf_counter() - core.STARTED_AT:.3f}s after start')
+    yield
+    core.saveCaches()
+    BLOCKING_POOL.shutdown(wait=False, cancel_futures=True)
+    LOAD_POOL.shutdown(wait=False, cancel_futures=True)
+
+
+routes = [
+    Route('/ping', ping),
+    Route('/ready', ready),
+    Route('/stats', cacheStats),
+    Route('/metrics', metricsCall),
+    Route('/data', data),
+    Route('/frontier', frontier),
+    Route('/history', history),
+    Route('/api/history/{symbol}', legacyHistory),
+]
+ROUTES = {route.path for route in routes}
+
+
+def routeLabel(scope) -> str:
+    """Template of the route a parameterized path matches, like Flask's url_rule, so labels stay bounded"""
+    return next((route.path for route in routes if route.matches(scope)[0] == Match.FULL), 'unmatched')
+
+# streamed bodies have their headers sent before any stage has run
+STREAMED_TYPES = ('text/event-stream', 'application/x-ndjson')
+
+app = Starlette(
+    routes=routes,
+    middleware=[Middleware(Instrumentation), Middleware(ReadinessGate)],
+    lifespan=lifespan,
+)
@@ -0,0 +1,87 @@
+"""
+Throughput of cold graph analytics under concurrent requests, inline versus on the analytics process pool
+
+    python benchmarks/analyticsPool.py
+    python benchmarks/analyticsPool.py --tickers 8 250 --requests 16 --workers 1 4 8
+
+Each simulated request computes beta, horizon and rolling graphs for its own synthetic 10y panel,
+the way GraphCache.loadData does on a cold miss. The default sizes are the batches the server
+actually sends (8 for warmup and refresh, 20 for a large /data request) plus one large panel.
+Requests run on a thread pool as Flask's threaded server would, inline they serialize on the GIL,
+pooled they are split by ticker across processes. Besides throughput, the server-side CPU per panel
+is the time the requesting threads held the GIL. Scaling is bounded by the cores of the machine,
+which is printed with the results
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from frontier import syntheticCloses
+from utils.analyticsPool import AnalyticsPool
+from utils.scripts import closeAnalytics
+
+
+def panels(count: int, tickers: int) -> list:
+    res = []
+    for seed in range(count):
+        closes = syntheticCloses(tickers, seed=seed)
+        closes['SPY'] = closes.mean(axis=1)
+        res.append(closes)
+    return res
+
+
+def throughput(pool: AnalyticsPool, frames: list, clients: int) -> tuple[float, float]:
+    """
+    (panels per second, server-side CPU ms per panel) with clients concurrent requests
+    """
+    cpu = []
+
+    def request(closes):
+        start = time.thread_time()
+        pool.run(closeAnalytics, closes, 'SPY')
+        cpu.append(time.thread_time() - start)
+
+    with ThreadPoolExecutor(clients) as requests:
+        start = time.perf_counter()
+        list(requests.map(request, frames))
+        rate = len(frames) / (time.perf_counter() - start)
+    return rate, sum(cpu) / len(cpu) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickers', type=int, nargs='+', default=[8, 20, 100])
+    parser.add_argument('--requests', type=int, default=16)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    args = parser.parse_args()
+
+    pools = {workers: AnalyticsPool(workers) for workers in args.workers}
+    for pool in pools.values():
+        pool.warm()
+
+    print(f'{os.cpu_count()} cores, {args.requests} requests per size, {args.clients} concurrent')
+    for tickers in args.tickers:
+        frames = panels(args.requests, tickers)
+        print(f'{tickers} tickers x 10y')
+
+        inline = AnalyticsPool(0)
+        throughput(inline, frames[:2], args.clients)
+        base, baseCpu = throughput(inline, frames, args.clients)
+        print(f'  inline          {base:7.2f} panels/s   {baseCpu:6.1f} ms server CPU per panel')
+
+        for workers, pool in pools.items():
+            throughput(pool, frames[:2], args.clients)
+            rate, cpu = throughput(pool, frames, args.clients)
+            print(f'  {workers} worker(s)    {rate:7.2f} panels/s   {cpu:6.1f} ms server CPU per panel   x{rate / base:.2f} of inline')
+
+    for pool in pools.values():
+        pool.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Times the vectorized mean-variance frontier and Monte-Carlo on synthetic 10y panels
+
+    python benchmarks/frontier.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.portfolioStats import ReturnStats
+from utils.scripts import optimizePortfolio
+
+
+def syntheticCloses(tickers: int, years: int = 10, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    days = 252 * years
+    factor = rng.normal(0.0003, 0.01, (days, 1))
+    noise = rng.normal(0, 0.015, (days, tickers))
+    closes = 50 * np.exp(np.cumsum(factor * rng.uniform(0.5, 1.5, tickers) + noise, axis=0))
+    dates = pd.bdate_range(end=pd.Timestamp('today').normalize(), periods=days)
+    return pd.DataFrame(closes, index=dates, columns=[f'T{i:03d}' for i in range(tickers)])
+
+
+def main():
+    for k in (10, 100, 250, 500):
+        stats = ReturnStats()
+        closes = syntheticCloses(k)
+        stats.update(closes)
+        tickers = list(closes.columns)
+
+        optimizePortfolio(stats, tickers, points=50, samples=2000)
+        runs = 5
+        start = time.perf_counter()
+        for _ in range(runs):
+            optimizePortfolio(stats, tickers, points=50, samples=2000)
+        elapsed = (time.perf_counter() - start) / runs
+        print(f'{k:4d} tickers: {elapsed * 1000:8.1f} ms per frontier (50 points, 2000 samples)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Load-test harness for /data, compares p50/p99 latency and RPS between servers
+
+Start the servers against the offline provider so runs are reproducible, e.g.
+
+    AXIA_PROVIDER=fixture AXIA_FIXTURE_LATENCY=2 AXIA_WARMUP_COUNT=20 python app.py
+    AXIA_PROVIDER=fixture AXIA_FIXTURE_LATENCY=2 AXIA_WARMUP_COUNT=20 uvicorn asgi:app --port 4001
+
+then
+
+    python benchmarks/loadtest.py http://127.0.0.1:4000 http://127.0.0.1:4001 --duration 30
+
+Hot requests reuse a few warmed tickers, cold requests pick tickers that are not cached yet,
+so the hot-path numbers show whether cheap requests queue behind slow loads
+"""
+import argparse
+import csv
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+UNIVERSE_PATH = os.path.join(os.path.dirname(__file__), '..', 'utils', 'sp500list.csv')
+
+
+def loadUniverse() -> list[str]:
+    with open(UNIVERSE_PATH, newline='') as f:
+        return [row['Ticker'] for row in csv.DictReader(f)]
+
+
+def worker(base: str, deadline: float, hot: list[str], cold: list[str], coldRatio: float, results: dict, lock, rng):
+    while time.perf_counter() < deadline:
+        isCold = rng.random() < coldRatio
+        with lock:
+            if isCold and cold:
+                tickers = [cold.pop() for _ in range(min(3, len(cold)))]
+            else:
+                isCold = False
+                tickers = rng.sample(hot, 3)
+
+        url = f'{base}/data?tickers={",".join(tickers)}'
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, timeout=120) as response:
+                response.read()
+                ok = response.status == 200
+        except (urllib.error.URLError, TimeoutError):
+            ok = False
+        elapsed = time.perf_counter() - start
+
+        with lock:
+            results['cold' if isCold else 'hot'].append(elapsed)
+            results['errors'] += 0 if ok else 1
+
+
+def run(base: str, duration: float, concurrency: int, coldRatio: float, warmed: int, seed: int) -> dict:
+    universe = loadUniverse()
+    hot = universe[:min(warmed, 10)]
+    cold = universe[warmed:]
+    rng = random.Random(seed)
+    rng.shuffle(cold)
+
+    results, lock = {'hot': [], 'cold': [], 'errors': 0}, threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=worker, args=(base, deadline, hot, cold, coldRatio, results, lock, random.Random(seed + i)))
+        for i in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results['elapsed'] = time.perf_counter() - start
+    return results
+
+
+def summarize(name: str, latencies: list[float]) -> str:
+    if not latencies:
+        return f'  {name:5s} n=0'
+    ms = np.array(latencies) * 1000
+    return f'  {name:5s} n={len(ms):6d}  p50={np.percentile(ms, 50):9.1f}ms  p99={np.percentile(ms, 99):9.1f}ms'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('servers', nargs='+', help='base URLs to compare')
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--cold-ratio', type=float, default=0.05)
+    parser.add_argument('--warmed', type=int, default=20, help='how many universe tickers the server warmed at startup')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for base in args.servers:
+        res = run(base, args.duration, args.concurrency, args.cold_ratio, args.warmed, args.seed)
+        total = len(res['hot']) + len(res['cold'])
+        print(f'{base}: {total / res["elapsed"]:.1f} req/s, {res["errors"]} errors')
+        print(summarize('hot', res['hot']))
+        print(summarize('cold', res['cold']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Startup benchmark: time from process launch to first /ping, to /ready and to a warm /data response
+
+Run from the project directory against the offline provider, e.g.
+
+    AXIA_PROVIDER=fixture AXIA_FIXTURE_LATENCY=2 python benchmarks/startup.py --runs 2
+
+The first run starts without a snapshot (--fresh removes it), later runs restore the one
+written at the previous shutdown, so the numbers show what snapshot-restore saves
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+
+def status(url: str) -> int | None:
+    try:
+        with urllib.request.urlopen(url, timeout=60) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return None
+
+
+def waitFor(url: str, started: float, timeout: float) -> float | None:
+    """Seconds from start until url answers 200, None on timeout"""
+    while time.perf_counter() - started < timeout:
+        if status(url) == 200:
+            return time.perf_counter() - started
+        time.sleep(0.01)
+    return None
+
+
+def run(command: list[str], base: str, tickers: str, timeout: float) -> dict:
+    started = time.perf_counter()
+    server = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        res = {
+            'ping': waitFor(f'{base}/ping', started, timeout),
+            'ready': waitFor(f'{base}/ready', started, timeout),
+            'data': waitFor(f'{base}/data?tickers={tickers}', started, timeout),
+        }
+    finally:
+        # SIGTERM lets the server write its shutdown snapshot
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+    return res
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=2)
+    parser.add_argument('--asgi', action='store_true', help='benchmark uvicorn asgi:app instead of app.py')
+    parser.add_argument('--port', type=int, default=4000)
+    parser.add_argument('--tickers', default='AAPL,MSFT,NVDA')
+    parser.add_argument('--timeout', type=float, default=300.0)
+    parser.add_argument('--fresh', action='store_true', help='delete the snapshot before the first run')
+    args = parser.parse_args()
+
+    if args.asgi:
+        command = [sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', str(args.port)]
+    else:
+        command = [sys.executable, 'app.py']
+        if args.port != 4000:
+            parser.error('app.py always listens on port 4000')
+
+    snapshot = os.path.join(ROOT, os.environ.get('AXIA_SNAPSHOT_PATH', 'data/snapshot.pkl'))
+    if args.fresh and os.path.exists(snapshot):
+        os.remove(snapshot)
+
+    for i in range(args.runs):
+        hadSnapshot = os.path.exists(snapshot)
+        res = run(command, f'http://127.0.0.1:{args.port}', args.tickers, args.timeout)
+        cells = '  '.join(f'{name}={value:7.3f}s' if value is not None else f'{name}=timeout' for name, value in res.items())
+        print(f'run {i + 1} ({"snapshot" if hadSnapshot else "cold"}): {cells}')
+
+
+if __name__ == '__main__':
+    main()
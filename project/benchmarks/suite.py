@@ -0,0 +1,229 @@
+"""
+Benchmark suite for the cache, analytics and endpoint hot paths
+
+    python benchmarks/suite.py                  compare against benchmarks/baselines.json
+    python benchmarks/suite.py --save           record new baselines
+    python benchmarks/suite.py --filter cache   only cases whose name contains 'cache'
+    python benchmarks/suite.py --quick          skip the largest sizes
+
+Everything runs on synthetic price panels and the offline fixture provider, so results do not
+depend on the network. Each case is timed with an auto-sized loop, repeated, and the median
+seconds per call is compared with the saved baseline. A case regresses when it is slower than
+its baseline by more than its threshold factor, and the run then exits with status 1.
+Baselines are machine-specific: record them on the machine that runs the comparison.
+
+This is a plain timeit harness rather than pytest-benchmark or asv: neither is a dependency of the
+service, and the suite needs per-case regression thresholds against a committed baseline file,
+which this gives in one script with no extra packages. Behaviour is covered by the tests in tests/.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+os.environ.setdefault('AXIA_PROVIDER', 'fixture')
+os.environ.setdefault('AXIA_FIXTURE_LATENCY', '0')
+
+import pandas as pd
+
+from frontier import syntheticCloses
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+# slowdown factor over baseline that counts as a regression
+DEFAULT_THRESHOLD = 1.5
+THRESHOLDS = {
+    'endpoint': 2.0,
+}
+
+CACHE_SIZES = (100, 1000, 10000)
+TICKER_SIZES = (10, 100, 500)
+
+
+def syntheticPanel(tickers: int, years: int = 10, seed: int = 0, market: str = 'SPY') -> pd.DataFrame:
+    """
+    yf.download-shaped (field, ticker) panel of synthetic OHLCV, with a market column
+    """
+    closes = syntheticCloses(tickers, years, seed)
+    closes[market] = closes.mean(axis=1)
+    volume = pd.DataFrame(1e6, index=closes.index, columns=closes.columns)
+    frame = pd.concat({'Open': closes, 'High': closes * 1.01, 'Low': closes * 0.99, 'Close': closes, 'Volume': volume}, axis=1)
+    frame.columns.names = ['Price', 'Ticker']
+    return frame
+
+
+def timeit(fn, setup=None, repeat: int = 5, minTime: float = 0.2) -> float:
+    """
+    Median seconds per call of fn over `repeat` runs, each run loops until it takes at least minTime
+    setup, when given, runs untimed before each call
+    """
+    if setup is not None:
+        setup()
+    fn()
+
+    loops = 1
+    while True:
+        elapsed = _run(fn, setup, loops)
+        if elapsed >= minTime or loops >= 1 << 20:
+            break
+        loops = min(1 << 20, max(loops * 2, int(loops * 1.2 * minTime / max(elapsed, 1e-9))))
+
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        samples.append(_run(fn, setup, loops) / loops)
+    return statistics.median(samples)
+
+
+def _run(fn, setup, loops: int) -> float:
+    total = 0.0
+    for _ in range(loops):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        total += time.perf_counter() - start
+    return total
+
+
+def cacheCases(sizes) -> dict:
+    from utils.cache import TemplateTTLCache
+
+    class StubCache(TemplateTTLCache):
+        def loadData(self, misses: list) -> dict:
+            return {key: {'value': key} for key in misses}
+
+    cases = {}
+    for n in sizes:
+        keys = [f'K{i:05d}' for i in range(n)]
+        cache = StubCache(3600, 10 ** 9, coalesceWindow=0)
+        for key in keys:
+            cache.add(key, {'value': key})
+
+        cases[f'cache.readItems[{n}]'] = (lambda cache=cache, keys=keys: cache.readItems(keys), None)
+        cases[f'cache.query[{n}]'] = (lambda cache=cache, keys=keys: [cache.query(key) for key in keys], None)
+
+        # every entry has expired, so sweep() pops and removes all n records
+        expiring = StubCache(3600, 10 ** 9, coalesceWindow=0)
+
+        def expireAll(cache=expiring, keys=keys):
+            for key in keys:
+                cache.add(key, {'value': key})
+            with cache.lock:
+                for entry in cache.data.values():
+                    entry.expiry = 0.0
+                cache._expiryHeap = [(0.0, i, entry) for i, entry in enumerate(cache.data.values())]
+
+        cases[f'cache.sweep[{n}]'] = (expiring.sweep, expireAll)
+    return cases
+
+
+def analyticsCases(sizes) -> dict:
+    from utils import efficientFrontier, horizons, riskChart, systematicrisk
+
+    cases = {}
+    for k in sizes:
+        panel = syntheticPanel(k)
+        asset = panel.columns.get_level_values(1)[0]
+        cases[f'analytics.efficientFrontier.start[{k}]'] = (lambda panel=panel: efficientFrontier.start(panel), None)
+        cases[f'analytics.riskChart.start[{k}]'] = (lambda panel=panel: riskChart.start(panel), None)
+        cases[f'analytics.systematicrisk.start[{k}]'] = (lambda panel=panel, asset=asset: systematicrisk.start(panel, asset), None)
+        cases[f'analytics.systematicrisk.startAll[{k}]'] = (lambda panel=panel: systematicrisk.startAll(panel), None)
+        closes = panel.xs('Close', level=0, axis=1)
+        cases[f'analytics.horizons.start[{k}]'] = (lambda closes=closes: horizons.start(closes), None)
+    return cases
+
+
+def endpointCases() -> dict:
+    """
+    /data through the Flask test client, against caches warmed from the fixture provider
+    """
+    os.chdir(tempfile.mkdtemp(prefix='axia-bench-'))
+    import app as core
+
+    core.createCaches()
+    core.READY.set()
+    tickers = ['AAPL', 'MSFT', 'NVDA', 'AMZN', 'GOOG', 'META', 'TSLA', 'JPM', 'KO', 'XOM']
+    core.sCache.readItems(tickers)
+    core.gCache.readItems(tickers)
+    core.mCache.readItems([core.DEFAULT_BENCHMARK])
+    client = core.app.test_client()
+    url = f'/data?tickers={",".join(tickers)}'
+
+    def hot():
+        response = client.get(url)
+        assert response.status_code == 200, response.status_code
+
+    etag = client.get(url).headers['ETag']
+
+    def revalidate():
+        response = client.get(url, headers={'If-None-Match': etag})
+        assert response.status_code == 304, response.status_code
+
+    return {
+        'endpoint./data[10 hot]': (hot, None),
+        'endpoint./data[10 hot, 304]': (revalidate, None),
+    }
+
+
+def thresholdFor(name: str) -> float:
+    return THRESHOLDS.get(name.split('.')[0], DEFAULT_THRESHOLD)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--save', action='store_true', help='write the results as the new baselines')
+    parser.add_argument('--filter', default='', help='only run cases whose name contains this')
+    parser.add_argument('--quick', action='store_true', help='skip the largest cache and ticker sizes')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    cacheSizes = CACHE_SIZES[:-1] if args.quick else CACHE_SIZES
+    tickerSizes = TICKER_SIZES[:-1] if args.quick else TICKER_SIZES
+    groups = [
+        ('cache', lambda: cacheCases(cacheSizes)),
+        ('analytics', lambda: analyticsCases(tickerSizes)),
+        ('endpoint', endpointCases),
+    ]
+
+    baselines = {}
+    if os.path.exists(BASELINES_PATH):
+        with open(BASELINES_PATH) as f:
+            baselines = json.load(f)
+
+    results, regressions = {}, []
+    for group, build in groups:
+        # a filter naming another group skips building this one, e.g. the endpoint caches
+        prefix = args.filter.split('.')[0]
+        if prefix in dict(groups) and prefix != group:
+            continue
+        cases = {name: case for name, case in build().items() if args.filter in name}
+        for name, (fn, setup) in cases.items():
+            seconds = timeit(fn, setup, repeat=args.repeat)
+            results[name] = seconds
+            line = f'{name:45s} {seconds * 1e6:12.1f} us'
+            if name in baselines:
+                ratio = seconds / baselines[name]
+                flag = 'REGRESSION' if ratio > thresholdFor(name) else ''
+                line += f'   x{ratio:5.2f} of baseline (limit x{thresholdFor(name):.1f}) {flag}'
+                if flag:
+                    regressions.append(name)
+            print(line, flush=True)
+
+    if args.save:
+        baselines.update(results)
+        with open(BASELINES_PATH, 'w') as f:
+            json.dump(dict(sorted(baselines.items())), f, indent=2)
+            f.write('\n')
+        print(f'saved {len(results)} baselines to {BASELINES_PATH}')
+    elif regressions:
+        print(f'{len(regressions)} regression(s): {", ".join(regressions)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -95,6 +95,40 @@ app.get("/api/data", async (req, res) => {
     }
 });
 
+// price history for many tickers, sliced and downsampled by the flask service
+// the body is passed through as bytes, so msgpack and arrow payloads arrive intact
+const HISTORY_HEADERS = ['content-type', 'etag', 'cache-control', 'server-timing'];
+
+app.get("/api/history", async (req, res) => {
+
+    const query = new URLSearchParams(req.query);
+    const headers = req.get('if-none-match') ? { 'If-None-Match': req.get('if-none-match') } : {};
+
+    try {
+        const response = await axios.get(`${URL_FLASK}/history?${query.toString()}`, {
+            'timeout': 500000,
+            'responseType': 'arraybuffer',
+            'headers': headers,
+            // every upstream status is relayed as-is
+            'validateStatus': () => true
+        });
+
+        for (const name of HISTORY_HEADERS) {
+            if (response.headers[name] !== undefined) {
+                res.set(name, response.headers[name]);
+            }
+        }
+        return res.status(response.status).send(Buffer.from(response.data));
+    } catch(error) {
+
+        console.log("No response from server:", error.message);
+        return res.status(500).json({
+            'success': false,
+            'err': 'Could not connect to flask service'
+        });
+    }
+});
+
 app.listen(PORT_ME, () =>
     console.log(`Server running at http://localhost:${PORT_ME}`)
 );
@@ -0,0 +1,104 @@
+import threading
+import time
+
+import pytest
+
+from utils.cache import TemplateTTLCache
+
+
+class StubCache(TemplateTTLCache):
+    """
+    Cache whose loadData counts upstream calls, sleeps to keep loads in flight, and can be made to fail
+    """
+
+    def __init__(self, delay: float = 0.1, error: Exception | None = None, **kwargs):
+        super().__init__(999, 999, **kwargs)
+        self.delay = delay
+        self.error = error
+        self.calls = []
+        self.callLock = threading.Lock()
+
+
+    def loadData(self, misses: list) -> dict:
+        with self.callLock:
+            self.calls.append(list(misses))
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return {key: f'value-{key}' for key in misses}
+
+
+def readConcurrently(cache: TemplateTTLCache, items: list, threads: int) -> tuple[list, list]:
+    """
+    Starts threads readers of items together, returns (results, errors)
+    """
+    barrier = threading.Barrier(threads)
+    results, errors = [], []
+    lock = threading.Lock()
+
+    def read():
+        barrier.wait()
+        try:
+            value = cache.readItems(items)
+            with lock:
+                results.append(value)
+        except Exception as e:
+            with lock:
+                errors.append(e)
+
+    workers = [threading.Thread(target=read) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=10)
+    return results, errors
+
+
+def test_concurrent_readers_share_one_load():
+    cache = StubCache()
+    results, errors = readConcurrently(cache, ['AAPL'], threads=30)
+
+    assert errors == []
+    assert cache.calls == [['AAPL']]
+    assert results == [{'AAPL': 'value-AAPL'}] * 30
+    assert cache.query('AAPL') == 'value-AAPL'
+
+
+def test_concurrent_misses_are_coalesced_into_one_batch():
+    cache = StubCache()
+    results, errors = readConcurrently(cache, ['AAPL', 'MSFT', 'NVDA'], threads=20)
+
+    assert errors == []
+    assert len(cache.calls) == 1
+    assert sorted(cache.calls[0]) == ['AAPL', 'MSFT', 'NVDA']
+    assert all(len(result) == 3 for result in results)
+
+
+def test_load_error_reaches_every_waiter():
+    cache = StubCache(error=TimeoutError('upstream timed out'))
+    results, errors = readConcurrently(cache, ['AAPL'], threads=30)
+
+    assert results == []
+    assert len(errors) == 30
+    assert all(isinstance(error, TimeoutError) for error in errors)
+    assert len(cache.calls) == 1
+
+
+def test_failed_load_is_cleared_and_retried():
+    cache = StubCache(delay=0.0, error=TimeoutError('upstream timed out'))
+    with pytest.raises(TimeoutError):
+        cache.readItems(['AAPL'])
+
+    # the failed future is gone, nothing was cached, and the next read loads again
+    assert cache._inflight == {}
+    assert cache._pendingBatch == []
+    assert cache.query('AAPL') is None
+
+    cache.error = None
+    assert cache.readItems(['AAPL']) == {'AAPL': 'value-AAPL'}
+    assert len(cache.calls) == 2
+
+
+def test_idle_ttl_shorter_than_soft_ttl_is_rejected():
+    with pytest.raises(ValueError):
+        TemplateTTLCache(999, 999, softTTL=3600, hardTTL=86400)
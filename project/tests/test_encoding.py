@@ -0,0 +1,63 @@
+import json
+
+import numpy as np
+import pytest
+
+from utils import encoding
+from utils.encoding import dumps, encodeObject, etagFor, etagMatches, withField
+
+SAMPLE = {
+    'price': np.float64(101.25),
+    'count': np.int64(7),
+    'closes': np.array([1.5, np.nan, 3.0]),
+    'ratio': float('inf'),
+    'nested': {'beta': np.float32(0.5), 'missing': float('nan')},
+    2024: ['int', 'keys'],
+}
+
+
+@pytest.fixture
+def stdlibOnly(monkeypatch):
+    """Runs dumps through the stdlib fallback, as on a server without orjson"""
+    monkeypatch.setattr(encoding, 'orjson', None)
+
+
+def test_dumps_writes_numpy_and_non_finite_values():
+    decoded = json.loads(dumps(SAMPLE))
+
+    assert decoded['price'] == 101.25 and decoded['count'] == 7
+    assert decoded['closes'] == [1.5, None, 3.0]
+    assert decoded['ratio'] is None and decoded['nested']['missing'] is None
+    assert decoded['2024'] == ['int', 'keys']
+
+
+def test_stdlib_fallback_matches_orjson(stdlibOnly):
+    orjson = pytest.importorskip('orjson')
+    native = orjson.dumps(SAMPLE, default=encoding._default,
+                          option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+    assert json.loads(dumps(SAMPLE)) == json.loads(native)
+
+
+def test_with_field_splices_into_an_encoded_object():
+    assert json.loads(withField(dumps({'a': 1}), 'mctr', 0.25)) == {'a': 1, 'mctr': 0.25}
+    assert json.loads(withField(b'{}', 'mctr', np.float64(0.5))) == {'mctr': 0.5}
+
+
+def test_encode_object_joins_fragments():
+    body = encodeObject([('stats', dumps({'AAPL': {'Beta': 1.2}})), ('stale', dumps([]))])
+    assert json.loads(body) == {'stats': {'AAPL': {'Beta': 1.2}}, 'stale': []}
+
+
+def test_etag_round_trip():
+    etag = etagFor(b'{"a":1}')
+
+    assert etag == etagFor(b'{"a":1}')
+    assert etag != etagFor(b'{"a":2}')
+    assert etag.startswith('"') and etag.endswith('"')
+
+    assert etagMatches(etag, etag)
+    assert etagMatches(f'"other", W/{etag}', etag)
+    assert etagMatches('*', etag)
+    assert not etagMatches('"other"', etag)
+    assert not etagMatches(None, etag)
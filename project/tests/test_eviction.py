@@ -0,0 +1,88 @@
+import pytest
+
+from utils.cache import TemplateTTLCache
+from utils.eviction import LFUPolicy, LRUPolicy, TTLLRUPolicy, approxSize, makePolicy
+
+
+def budgetCache(maxBytes: int, policy='lru') -> TemplateTTLCache:
+    return TemplateTTLCache(999, 999, maxBytes=maxBytes, evictionPolicy=policy)
+
+
+def fill(cache: TemplateTTLCache, keys: list, size: int = 1000):
+    for key in keys:
+        cache.add(key, 'x' * size)
+
+
+def test_lru_evicts_the_least_recently_used_entry():
+    cache = budgetCache(3 * approxSize('x' * 1000))
+    fill(cache, ['a', 'b', 'c'])
+
+    # reading a moves it to the recent end, so b is now the coldest
+    cache.query('a')
+    fill(cache, ['d'])
+
+    assert sorted(cache.data) == ['a', 'c', 'd']
+    assert cache.evictions == 1
+
+
+def test_lfu_keeps_the_most_read_entries():
+    cache = budgetCache(3 * approxSize('x' * 1000), policy='lfu')
+    fill(cache, ['a', 'b', 'c'])
+    for _ in range(5):
+        cache.query('a')
+        cache.query('c')
+    fill(cache, ['d'])
+
+    assert 'b' not in cache.data
+    assert {'a', 'c', 'd'} <= set(cache.data)
+
+
+def test_ttl_lru_evicts_the_entry_closest_to_expiry():
+    cache = budgetCache(3 * approxSize('x' * 1000), policy='ttl-lru')
+    fill(cache, ['a', 'b', 'c'])
+    cache.data['b'].expiry -= 100
+    fill(cache, ['d'])
+
+    assert sorted(cache.data) == ['a', 'c', 'd']
+
+
+def test_byte_budget_is_tracked_and_enforced():
+    entry = approxSize('x' * 1000)
+    cache = budgetCache(5 * entry)
+    fill(cache, [f'k{i}' for i in range(20)])
+
+    assert cache.bytes <= cache.maxBytes
+    assert cache.bytes == sum(entry.size for entry in cache.data.values())
+    assert len(cache.data) == 5
+    assert cache.evictions == 15
+    assert cache.stats()['bytes'] == cache.bytes
+
+
+def test_replacing_an_entry_updates_its_size():
+    cache = budgetCache(None)
+    cache.add('a', 'x' * 1000)
+    cache.add('a', 'x' * 10)
+
+    assert cache.bytes == approxSize('x' * 10)
+
+
+def test_entry_larger_than_the_budget_is_kept_alone():
+    cache = budgetCache(100)
+    fill(cache, ['a'], size=10)
+    fill(cache, ['big'], size=1000)
+
+    # the entry just added is protected, everything else makes room for it
+    assert list(cache.data) == ['big']
+
+
+def test_policies_never_pick_the_protected_key():
+    cache = budgetCache(None)
+    fill(cache, ['a', 'b'])
+    for policy in (LRUPolicy(), LFUPolicy(), TTLLRUPolicy()):
+        assert policy.victim(cache.data, protect='a') == 'b'
+        assert policy.victim({'a': cache.data['a']}, protect='a') is None
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        makePolicy('fifo')
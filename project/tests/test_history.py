@@ -0,0 +1,86 @@
+import numpy as np
+
+from utils.history import downsample, lttb, resample
+from utils.priceStore import ROW
+
+
+def dailyRows(days: int = 1000, seed: int = 0) -> np.ndarray:
+    """Business-day random walk in the price store's row format"""
+    rng = np.random.default_rng(seed)
+    rows = np.empty(days, dtype=ROW)
+    rows['date'] = np.busday_offset('2020-01-01', np.arange(days), roll='forward')
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, days)))
+    rows['Open'] = close * (1 + rng.normal(0, 0.002, days))
+    rows['High'] = close * 1.01
+    rows['Low'] = close * 0.99
+    rows['Close'] = close
+    rows['Volume'] = rng.integers(1000, 5000, days)
+    return rows
+
+
+def test_lttb_keeps_endpoints_and_the_requested_count():
+    x = np.arange(1000, dtype='f8')
+    y = np.sin(x / 50)
+    keep = lttb(x, y, 100)
+
+    assert len(keep) == 100
+    assert keep[0] == 0 and keep[-1] == 999
+    assert (np.diff(keep) > 0).all()
+
+
+def test_lttb_keeps_an_isolated_spike():
+    x = np.arange(1000, dtype='f8')
+    y = np.zeros(1000)
+    y[537] = 10.0
+
+    assert 537 in lttb(x, y, 20)
+
+
+def test_lttb_returns_every_index_when_nothing_to_drop():
+    x = np.arange(10, dtype='f8')
+    assert lttb(x, x, 50).tolist() == list(range(10))
+
+
+def test_lttb_downsample_returns_original_rows():
+    rows = dailyRows()
+    sampled = downsample(rows, 50, 'lttb')
+
+    assert len(sampled) == 50
+    assert sampled[0] == rows[0] and sampled[-1] == rows[-1]
+    assert np.isin(sampled['date'], rows['date']).all()
+
+
+def test_ohlc_downsample_preserves_extremes_and_volume():
+    rows = dailyRows()
+    bars = downsample(rows, 40, 'ohlc')
+
+    assert len(bars) == 40
+    assert bars['Open'][0] == rows['Open'][0]
+    assert bars['Close'][-1] == rows['Close'][-1]
+    assert bars['High'].max() == rows['High'].max()
+    assert bars['Low'].min() == rows['Low'].min()
+    assert bars['Volume'].sum() == rows['Volume'].sum()
+
+
+def test_downsample_is_a_no_op_below_the_limit():
+    rows = dailyRows(30)
+    assert downsample(rows, 100, 'lttb') is rows
+    assert downsample(rows, None, 'ohlc') is rows
+
+
+def test_weekly_bars_are_monday_dated():
+    rows = dailyRows(60)
+    weeks = resample(rows, '1wk')
+
+    assert all(date.weekday() == 0 for date in weeks['date'].astype('O'))
+    assert weeks['Volume'].sum() == rows['Volume'].sum()
+    assert weeks['Close'][-1] == rows['Close'][-1]
+
+
+def test_quarterly_bars_start_on_the_quarter():
+    quarters = resample(dailyRows(), '3mo')
+    months = quarters['date'].astype('datetime64[M]').astype(int) % 12
+    days = quarters['date'] - quarters['date'].astype('datetime64[M]').astype('datetime64[D]')
+
+    assert (months % 3 == 0).all()
+    assert (days == np.timedelta64(0, 'D')).all()
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.horizons import ROLLING_STEP, TRADING_DAYS, start
+
+
+def closes(days: int = 800, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2020-01-01', periods=days)
+    prices = 50 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, (days, 2)), axis=0))
+    return pd.DataFrame(prices, index=dates, columns=['AAA', 'SPY'])
+
+
+def windowVolatility(frame: pd.DataFrame, ticker: str, end, window: int) -> float:
+    logReturns = np.log(frame[ticker] / frame[ticker].shift(1)).loc[:end].iloc[-window:]
+    return float(np.round(logReturns.std(ddof=1) * np.sqrt(TRADING_DAYS) * 100, 2))
+
+
+def test_rolling_series_are_dated_by_start_and_step():
+    frame = closes()
+    rolling = start(frame)['rolling']['AAA']
+
+    assert 'dates' not in rolling
+    assert rolling['step'] == ROLLING_STEP
+    samples = len(rolling['volatility'][0])
+    dates = np.datetime64(rolling['start']) + np.arange(samples) * np.timedelta64(ROLLING_STEP, 'D')
+    assert dates[-1] == frame.index[-1].to_datetime64().astype('datetime64[D]')
+
+    # each sample is the window ending on the last close at or before its date
+    windowIndex = rolling['windows'].index(60)
+    for i in (0, samples // 2, samples - 1):
+        expected = windowVolatility(frame, 'AAA', pd.Timestamp(dates[i]), 60)
+        assert rolling['volatility'][windowIndex][i] == pytest.approx(expected, abs=0.011)
+
+
+def test_every_ticker_shares_the_sampling_grid():
+    frame = closes()
+    frame.iloc[:300, 0] = np.nan
+    rolling = start(frame)['rolling']
+
+    late, market = np.datetime64(rolling['AAA']['start']), np.datetime64(rolling['SPY']['start'])
+    assert late > market
+    assert (late - market) % np.timedelta64(ROLLING_STEP, 'D') == np.timedelta64(0, 'D')
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.portfolioStats import MAX_PATCH_ROWS, ReturnStats, pairwiseCovariance
+
+
+def closes(tickers: list[str], days: int = 600, seed: int = 0) -> pd.DataFrame:
+    """Business-day random walks, with uneven starts so pairs overlap on different days"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2020-01-01', periods=days)
+    prices = 50 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, (days, len(tickers))), axis=0))
+    for col in range(1, len(tickers)):
+        prices[:col * 40, col] = np.nan
+    return pd.DataFrame(prices, index=dates, columns=tickers)
+
+
+def assertSameStats(patched: ReturnStats, full: ReturnStats, tickers: list[str]):
+    n = len(tickers)
+    for name in ('N', 'S', 'C', 'Q'):
+        np.testing.assert_allclose(getattr(patched, name)[:n, :n], getattr(full, name)[:n, :n], rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(patched.covariance(tickers), full.covariance(tickers), rtol=1e-5, atol=1e-9)
+    np.testing.assert_allclose(patched.correlation(tickers), full.correlation(tickers), rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(patched.cagr(tickers), full.cagr(tickers))
+
+
+def test_new_daily_bars_patch_to_a_full_recompute():
+    tickers = ['AAA', 'BBB', 'CCC', 'DDD']
+    frame = closes(tickers)
+
+    patched = ReturnStats()
+    patched.update(frame.iloc[:-5])
+    patched.update(frame)
+
+    full = ReturnStats()
+    full.update(frame)
+    assertSameStats(patched, full, tickers)
+
+
+def test_edited_history_patches_to_a_full_recompute():
+    tickers = ['AAA', 'BBB', 'CCC']
+    frame = closes(tickers)
+    stats = ReturnStats()
+    stats.update(frame)
+
+    # a few corrected bars in the middle of one ticker's history, within the patch limit
+    edited = frame.copy()
+    edited.iloc[300:305, 1] *= 1.02
+    stats.update(edited[['BBB']])
+
+    full = ReturnStats()
+    full.update(edited)
+    assertSameStats(stats, full, tickers)
+
+
+def test_rewritten_history_recomputes_the_ticker():
+    tickers = ['AAA', 'BBB']
+    frame = closes(tickers)
+    stats = ReturnStats()
+    stats.update(frame)
+
+    rewritten = frame.copy()
+    rewritten['AAA'] = closes(['AAA'], seed=7)['AAA']
+    assert (rewritten['AAA'] != frame['AAA']).sum() > MAX_PATCH_ROWS
+    stats.update(rewritten[['AAA']])
+
+    full = ReturnStats()
+    full.update(rewritten)
+    assertSameStats(stats, full, tickers)
+
+
+def test_covariance_matches_pandas_pairwise():
+    tickers = ['AAA', 'BBB', 'CCC']
+    frame = closes(tickers)
+    stats = ReturnStats()
+    stats.update(frame)
+
+    logReturns = np.log(frame / frame.shift(1))
+    np.testing.assert_allclose(stats.covariance(tickers), logReturns.cov().to_numpy(), rtol=1e-5)
+    np.testing.assert_allclose(pairwiseCovariance(logReturns.to_numpy()), logReturns.cov().to_numpy(), rtol=1e-9)
+
+
+def test_mctr_sums_to_one():
+    tickers = ['AAA', 'BBB', 'CCC']
+    stats = ReturnStats()
+    stats.update(closes(tickers))
+
+    assert sum(stats.mctr(tickers).values()) == pytest.approx(1.0)
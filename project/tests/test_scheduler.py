@@ -0,0 +1,115 @@
+import threading
+import urllib.error
+
+import pytest
+
+from utils.scheduler import REFRESH, USER, WARMUP, FetchScheduler, fetchPriority, isThrottle
+
+
+class Throttled(Exception):
+    """Upstream error carrying an HTTP status the way requests/httpx errors do"""
+
+    def __init__(self, status: int = 429):
+        super().__init__(f'upstream answered {status}')
+        self.status_code = status
+
+
+def fastScheduler(**kwargs) -> FetchScheduler:
+    options = {'rate': 1000.0, 'burst': 1000.0, 'baseBackoff': 0.01, 'maxBackoff': 0.05}
+    options.update(kwargs)
+    return FetchScheduler(**options)
+
+
+def test_queued_work_runs_by_priority():
+    scheduler = fastScheduler(concurrency=1)
+    gate = threading.Event()
+    order = []
+
+    # holds the only worker while the other tasks queue up behind it
+    blocker = scheduler.submit(gate.wait, priority=USER)
+    futures = [
+        scheduler.submit(order.append, 'warmup', priority=WARMUP),
+        scheduler.submit(order.append, 'refresh', priority=REFRESH),
+        scheduler.submit(order.append, 'user', priority=USER),
+    ]
+    gate.set()
+    for future in [blocker, *futures]:
+        future.result(timeout=5)
+
+    assert order == ['user', 'refresh', 'warmup']
+
+
+def test_priority_defaults_to_the_submitters_context():
+    scheduler = fastScheduler(concurrency=1)
+    gate = threading.Event()
+    order = []
+
+    blocker = scheduler.submit(gate.wait)
+    with fetchPriority(WARMUP):
+        warmup = scheduler.submit(order.append, 'warmup')
+    user = scheduler.submit(order.append, 'user')
+    gate.set()
+    for future in (blocker, warmup, user):
+        future.result(timeout=5)
+
+    assert order == ['user', 'warmup']
+
+
+def test_throttled_calls_back_off_and_retry():
+    scheduler = fastScheduler(concurrency=1, rate=8.0, burst=8.0)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise Throttled()
+        return 'ok'
+
+    assert scheduler.run(flaky) == 'ok'
+    stats = scheduler.stats()
+    assert len(attempts) == 3
+    assert stats['throttled'] == 2 and stats['retries'] == 2
+    assert stats['failed'] == 0
+    # halved twice, then one additive step for the success
+    assert stats['rate'] == pytest.approx(8.0 / 4 + scheduler.rateStep)
+
+
+def test_retries_stop_after_max_retries():
+    scheduler = fastScheduler(concurrency=1, maxRetries=2)
+
+    def alwaysThrottled():
+        raise Throttled()
+
+    with pytest.raises(Throttled):
+        scheduler.run(alwaysThrottled)
+    assert scheduler.stats()['retries'] == 2
+    assert scheduler.stats()['failed'] == 1
+
+
+def test_other_errors_fail_without_retrying():
+    scheduler = fastScheduler(concurrency=1)
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        raise Throttled(500)
+
+    with pytest.raises(Throttled):
+        scheduler.run(broken)
+    assert len(attempts) == 1
+    assert scheduler.stats()['throttled'] == 0
+
+
+@pytest.mark.parametrize('error, expected', [
+    (type('YFRateLimitError', (Exception,), {})('slow down'), True),
+    (Throttled(429), True),
+    (urllib.error.HTTPError('https://example.com', 429, 'Too Many Requests', None, None), True),
+    (Exception('HTTP Error 429: Too Many Requests'), True),
+    (Throttled(500), False),
+    (Exception('no price data for ticker 4290'), False),
+    (Exception('missing bars since 2024-04-29'), False),
+    (Exception('read 14293 bytes'), False),
+    (TimeoutError('timed out'), False),
+])
+def test_is_throttle(error, expected):
+    assert isThrottle(error) is expected
@@ -0,0 +1,57 @@
+import threading
+import time
+
+from tests.test_cache import StubCache
+from utils.sharedCache import SQLiteBackend
+
+
+def test_workers_share_one_load_through_the_backend(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+
+    # each worker process has its own cache and its own backend connection to the shared file
+    workers = [StubCache(delay=0.2, backend=SQLiteBackend(path), namespace='stub') for _ in range(4)]
+    barrier = threading.Barrier(len(workers))
+    results = []
+
+    def read(cache):
+        barrier.wait()
+        results.append(cache.readItems(['AAPL']))
+
+    threads = [threading.Thread(target=read, args=(cache,)) for cache in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert results == [{'AAPL': 'value-AAPL'}] * len(workers)
+    assert sum(len(cache.calls) for cache in workers) == 1
+    assert sum(cache.sharedWaits for cache in workers) == len(workers) - 1
+
+
+def test_later_workers_adopt_the_stored_value(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    first = StubCache(delay=0.0, backend=SQLiteBackend(path), namespace='stub')
+    second = StubCache(delay=0.0, backend=SQLiteBackend(path), namespace='stub')
+
+    first.readItems(['AAPL', 'MSFT'])
+    assert second.readItems(['AAPL', 'MSFT']) == {'AAPL': 'value-AAPL', 'MSFT': 'value-MSFT'}
+    assert second.calls == []
+    assert second.sharedHits == 2
+
+
+def test_a_lapsed_lock_is_not_released_by_its_old_owner(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    slow, fast = SQLiteBackend(path), SQLiteBackend(path)
+
+    stale = slow.acquire('stub', 'AAPL', ttl=0.05)
+    assert stale is not None
+    assert fast.acquire('stub', 'AAPL', ttl=5) is None
+
+    time.sleep(0.1)
+    current = fast.acquire('stub', 'AAPL', ttl=5)
+    assert current is not None
+
+    slow.release('stub', {'AAPL': stale})
+    assert fast.isLocked('stub', 'AAPL')
+    fast.release('stub', {'AAPL': current})
+    assert not fast.isLocked('stub', 'AAPL')
@@ -0,0 +1,176 @@
+import atexit
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from utils.metrics import span
+
+# panels below this many cells (days x tickers) run on the calling thread
+# measured per 10y panel: inline holds the server's GIL ~3.5 ms + ~0.85 ms per ticker, pooled ~1-3 ms,
+# for ~3-5 ms of added latency, so offloading pays from about 8 tickers, the size of a warmup or refresh batch
+MIN_POOL_CELLS = 252 * 10 * 8
+
+# every worker gets at least this many tickers, smaller chunks are dominated by per-task overhead
+MIN_CHUNK_TICKERS = 16
+
+
+def _runChunk(name: str, shape: tuple, dates: np.ndarray, columns: list[str], cols: list[int], fn, market: str) -> dict:
+    """
+    Worker side of AnalyticsPool.run: copies its columns out of the shared panel and runs fn on them
+    """
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        panel = np.ndarray(shape, dtype='f8', buffer=block.buf)
+        closes = pd.DataFrame(panel[:, cols], index=dates, columns=columns)
+        del panel
+    finally:
+        block.close()
+    return fn(closes, market)
+
+
+def _ready() -> bool:
+    return True
+
+
+class AnalyticsPool:
+    """
+    Process pool for CPU-bound analytics over close-price panels (dates x tickers), outside the server's GIL
+
+    fn(closes, market) must be a module-level function returning {graph: {ticker: value}} with values
+    that depend only on the ticker's own column and the market's. A large panel is written once to a
+    shared memory block, split by ticker into one chunk per worker (each chunk keeps the market column),
+    and only column indices travel to the workers, the panel itself is never pickled.
+    Small panels, and every panel when workers is 0, run inline
+    """
+
+    def __init__(self, workers: int, minCells: int = MIN_POOL_CELLS, minChunk: int = MIN_CHUNK_TICKERS):
+        self.workers = workers
+        self.minCells = minCells
+        self.minChunk = minChunk
+
+        self._executor = None
+        self._lock = threading.Lock()
+        self.counts = {'inline': 0, 'pooled': 0, 'chunks': 0, 'failures': 0}
+
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                self.counts[name] += delta
+
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawned workers start clean, forking a process with live server threads is not safe
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+
+    def warm(self):
+        """
+        Starts every worker now instead of on the first large panel
+        """
+        if self.workers > 0:
+            pool = self._pool()
+            for future in [pool.submit(_ready) for _ in range(self.workers)]:
+                future.result()
+
+
+    def chunks(self, columns: list[str], market: str) -> list[list[int]]:
+        """
+        Column indices of each worker's chunk, every chunk ends with the market column
+        """
+        marketCol = columns.index(market)
+        others = [col for col in range(len(columns)) if col != marketCol]
+        count = max(1, min(self.workers, math.ceil(len(others) / self.minChunk)))
+        return [[*chunk.tolist(), marketCol] for chunk in np.array_split(np.array(others, dtype=int), count) if len(chunk)]
+
+
+    def run(self, fn, closes: pd.DataFrame, market: str = "SPY") -> dict:
+        """
+        fn(closes, market) over the panel, split by ticker across the pool when it is large enough
+        """
+        columns = closes.columns.tolist()
+        if self.workers <= 0 or closes.size < self.minCells or market not in columns:
+            self._count(inline=1)
+            return fn(closes, market)
+
+        try:
+            return self._runPooled(fn, closes, market, columns)
+        except BrokenProcessPool as e:
+            # a worker died (e.g. OOM killed), start a fresh pool next time and answer this call inline
+            print(f'analytics pool failed, running inline: {e}')
+            with self._lock:
+                self.counts['failures'] += 1
+                self._executor = None
+            return fn(closes, market)
+
+
+    def _runPooled(self, fn, closes: pd.DataFrame, market: str, columns: list[str]) -> dict:
+        pool = self._pool()
+        prices = closes.to_numpy(dtype='f8')
+        block = shared_memory.SharedMemory(create=True, size=max(prices.nbytes, 1))
+        try:
+            with span('analytics.pool.share'):
+                shared = np.ndarray(prices.shape, dtype='f8', buffer=block.buf)
+                shared[:] = prices
+                del shared
+
+            chunks = self.chunks(columns, market)
+            futures = [
+                pool.submit(_runChunk, block.name, prices.shape, closes.index.values, [columns[col] for col in cols], cols, fn, market)
+                for cols in chunks
+            ]
+            with span('analytics.pool.wait'):
+                parts = [future.result() for future in futures]
+        finally:
+            block.close()
+            block.unlink()
+
+        self._count(pooled=1, chunks=len(chunks))
+
+        res = {}
+        for part in parts:
+            for graph, values in part.items():
+                res.setdefault(graph, {}).update(values)
+        return res
+
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'workers': self.workers, **self.counts}
+
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_analyticsPool = None
+_analyticsPoolLock = threading.Lock()
+
+
+def getAnalyticsPool() -> AnalyticsPool:
+    """
+    Returns the process-wide analytics pool, configured from the environment:
+        AXIA_ANALYTICS_WORKERS      worker processes, 0 runs everything inline
+                                    (default: cores up to 8, 0 on a single core)
+    """
+    global _analyticsPool
+    with _analyticsPoolLock:
+        if _analyticsPool is None:
+            cores = os.cpu_count() or 1
+            workers = int(os.environ.get('AXIA_ANALYTICS_WORKERS', min(cores, 8) if cores > 1 else 0))
+            _analyticsPool = AnalyticsPool(workers)
+            atexit.register(_analyticsPool.shutdown)
+        return _analyticsPool
@@ -1,6 +1,37 @@
-import datetime
+import asyncio
+import contextvars
+import heapq
+import itertools
 import time
 import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from utils.encoding import dumps
+from utils.eviction import approxSize, makePolicy
+from utils.metrics import cacheLoad, span
+from utils.scheduler import REFRESH, WARMUP, currentPriority, fetchPriority
+from utils.sharedCache import CacheBackend
+
+
+class _Entry:
+    """
+    Compact cache slot, expiry and loadedAt are time.monotonic() timestamps
+    size is the approximate byte footprint of data (plus its encoded form), hits feeds LFU eviction
+    encoded caches the JSON of data merged with the fields in encodedExtra
+    """
+    __slots__ = ('key', 'data', 'expiry', 'loadedAt', 'size', 'hits', 'encoded', 'encodedExtra')
+
+    def __init__(self, key, data, expiry: float, loadedAt: float, size: int = 0):
+        self.key = key
+        self.data = data
+        self.expiry = expiry
+        self.loadedAt = loadedAt
+        self.size = size
+        self.hits = 0
+        self.encoded = None
+        self.encodedExtra = None
+
 
 class TemplateTTLCache:
     """
@@ -11,18 +42,86 @@ class TemplateTTLCache:
 
     The TTL parameter defines the end-of-life for an item inserted into the cache.
     This Template fixes it across all items, however adding a dynamic TTL policy is feasible
+
+    Lookups and TTL refreshes are O(1) per key. Expiry is tracked by a min-heap
+    holding one record per entry, so sweep() only touches keys whose scheduled expiry has passed
+
+    Concurrent misses are single-flighted: the first reader of a missing key starts its load,
+    later readers wait on the same in-flight future. Misses arriving within coalesceWindow
+    seconds of each other are batched into one loadData() call
+
+    Optional stale-while-revalidate: once an entry's data is older than softTTL, reads still
+    return it (flagged stale) and queue a background reload on the sweep thread. Entries read
+    after refreshAhead * softTTL are reloaded early, before they ever go stale. Data older than
+    hardTTL is never served and the entry expires. The idle TTL must be at least softTTL,
+    otherwise idle entries are swept before they could ever be served stale
+
+    Optional memory budget: with maxBytes set, every entry's approximate size is tracked and
+    inserts evict entries chosen by evictionPolicy ('lru', 'lfu', 'ttl-lru' or an EvictionPolicy)
+    until the cache fits again
+
+    Optional shared backend: with a CacheBackend, misses are first read from a store shared by every
+    worker process on the host, and keys nobody has loaded are locked across processes before loadData(),
+    so only one worker fetches a given key while the others wait for its result
     """
 
 
-    def __init__(self, ttlInSeconds: int, sweepInSeconds: int):
+    def __init__(self, ttlInSeconds: int, sweepInSeconds: int, coalesceWindow: float = 0.05,
+                 softTTL: float | None = None, hardTTL: float | None = None, refreshAhead: float = 0.8,
+                 refreshBatchSize: int = 8, refreshDelay: float = 0.0,
+                 maxBytes: int | None = None, evictionPolicy='lru',
+                 backend: CacheBackend | None = None, namespace: str | None = None, lockTTL: float = 120.0):
         """
         Initializes a cache with a custom TTL policy
         """
-        self.data = {}
-        self.TTL = datetime.timedelta(seconds=int(ttlInSeconds))
+
+        if softTTL is not None and ttlInSeconds < softTTL:
+            raise ValueError(f'ttlInSeconds ({ttlInSeconds}) must be at least softTTL ({softTTL})')
+
+        # entries in recency order, least recently used first
+        self.data = OrderedDict()
+        self.TTL = float(int(ttlInSeconds))
         self.sweepInterval = sweepInSeconds
 
-        self.lock = threading.Lock()
+        # min-heap of (scheduledExpiry, seq, entry), seq breaks ties between equal expiries
+        self._expiryHeap = []
+        self._seq = itertools.count()
+
+        # single-flight bookkeeping, key -> Future for every key currently being loaded
+        self.coalesceWindow = coalesceWindow
+        self._inflight = {}
+        self._pendingBatch = []
+        self._batchOpen = False
+
+        # most urgent fetch priority among callers in the open batch
+        self._batchPriority = WARMUP
+
+        # refresh-ahead policy, keys read near or past softTTL are queued for the sweep thread
+        self.softTTL = softTTL
+        self.hardTTL = hardTTL
+        self.refreshAhead = refreshAhead
+        self.refreshBatchSize = refreshBatchSize
+        self.refreshDelay = refreshDelay
+        self._refreshQueue = {}
+        self._wake = threading.Event()
+
+        # memory budget and counters
+        self.maxBytes = maxBytes
+        self.evictionPolicy = makePolicy(evictionPolicy)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        # cross-process store, keys are namespaced per cache, lockTTL bounds how long a crashed loader blocks others
+        self.backend = backend
+        self.namespace = namespace if namespace is not None else type(self).__name__
+        self.lockTTL = lockTTL
+        self.sharedHits = 0
+        self.sharedWaits = 0
+
+        self.lock = threading.RLock()
         self._sweepThread = threading.Thread(target=self.sweepLoop, daemon=True)
         self._sweepThread.start()
 
@@ -36,13 +135,61 @@ class TemplateTTLCache:
         return d1
 
 
+    def _schedule(self, entry: _Entry):
+        """
+        Pushes an expiry record for an entry onto the heap
+        """
+        heapq.heappush(self._expiryHeap, (entry.expiry, next(self._seq), entry))
+
+
     def cached(self) -> list:
         """
         Queries the cache and returns all non-expired keys
+        Meant for introspection, the read path never calls this
+        """
+
+        NOW = time.monotonic()
+        with self.lock:
+            return [key for key, entry in self.data.items() if entry.expiry > NOW]
+
+
+    def _expiryFor(self, entry: _Entry, NOW: float) -> float:
         """
+        Sliding expiry, capped by the entry's hardTTL deadline
+        """
+        expiry = NOW + self.TTL
+        if self.hardTTL is not None:
+            expiry = min(expiry, entry.loadedAt + self.hardTTL)
+        return expiry
 
-        NOW = datetime.datetime.now()
-        return list(key for key, item in self.data.items() if item['expiry'] > NOW)
+
+    def _lookup(self, key) -> tuple[object, bool]:
+        """
+        Returns (value, isStale) for a key, or (None, False) on a miss
+        Refreshes the key's TTL and queues a background reload when its data is aging
+        """
+
+        NOW = time.monotonic()
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is None or entry.expiry <= NOW:
+                self.misses += 1
+                return None, False
+
+            # reset the timer on cache hit, the heap record is rescheduled lazily by sweep()
+            entry.expiry = self._expiryFor(entry, NOW)
+            entry.hits += 1
+            self.hits += 1
+            self.data.move_to_end(key)
+
+            isStale = False
+            if self.softTTL is not None:
+                age = NOW - entry.loadedAt
+                isStale = age >= self.softTTL
+                if age >= self.refreshAhead * self.softTTL and key not in self._inflight:
+                    self._refreshQueue[key] = None
+                    self._wake.set()
+            return entry.data, isStale
 
 
     def query(self, key):
@@ -51,38 +198,240 @@ class TemplateTTLCache:
         If it is, the key's TTL is updated and the value returned
         Returns None if the key is not present in the cache
         """
-        
-        if key in self.cached():
-            
-            # reset the timer on cache hit
-            NOW = datetime.datetime.now()
-            self.data[key]['expiry'] = NOW + self.TTL
-            return self.data[key]['data']
-        else:
-            return None
+        return self._lookup(key)[0]
+
+
+    def partition(self, items: list) -> tuple[dict, list, set]:
+        """
+        Splits items into hits (key -> value, TTL refreshed), misses and stale hits in one pass
+        """
+
+        hits, misses, stale = {}, [], set()
+        for key in dict.fromkeys(items):
+            value, isStale = self._lookup(key)
+            if value is None:
+                misses.append(key)
+            else:
+                hits[key] = value
+                if isStale:
+                    stale.add(key)
+        return hits, misses, stale
 
 
     def readItems(self, items: list) -> dict:
         """
         Optimized read for a group of items
-        Misses are fetched + processed asynchronously and in parallel
+        Misses are coalesced with other in-flight reads and loaded in one batch
+        """
+        return self.readItemsWithStatus(items)[0]
+
+
+    def readItemsWithStatus(self, items: list) -> tuple[dict, set]:
+        """
+        Same as readItems, but also returns the keys that were served stale
+        while their background refresh runs
         """
         
         # fetch and insert misses, return hits
+        hits, misses, stale = self.partition(items)
+        if not misses:
+            return hits, stale
 
-        hits, misses = set(self.cached()) & set(items), set(items) - set(self.cached())
-        
-        # loads the data using a custom method
-        missingData = None if misses == set() else self.loadData(list(misses)) 
+        futures, isLeader = self._claim(misses)
 
-        # assuming items 1-to-1 corresponds with misses
-        if missingData is not None:
-            for key, item in missingData.items():
-                self.add(key, item)
+        # the first caller of a batch window runs the load for everyone who joined it
+        if isLeader:
+            self._flush()
 
         # return the union of the hit results and the miss results
-        res = {hit: self.query(hit) for hit in hits} if missingData is None else self._merge({hit: self.query(hit) for hit in hits}, missingData)
-        return res
+        for key, future in futures.items():
+            value = future.result()
+            if value is not None:
+                hits[key] = value
+        return hits, stale
+
+
+    async def readItemsWithStatusAsync(self, items: list, executor=None) -> tuple[dict, set]:
+        """
+        Awaitable readItemsWithStatus for an event loop
+        Hits are answered on the loop, misses run on executor and are awaited through their in-flight futures
+        """
+
+        hits, misses, stale = self.partition(items)
+        if not misses:
+            return hits, stale
+
+        futures, isLeader = self._claim(misses)
+        if isLeader:
+            # the load runs in this request's context so its spans reach the request's Server-Timing
+            asyncio.get_running_loop().run_in_executor(executor, contextvars.copy_context().run, self._flush)
+
+        values = await asyncio.gather(*(asyncio.wrap_future(future) for future in futures.values()))
+        for key, value in zip(futures, values):
+            if value is not None:
+                hits[key] = value
+        return hits, stale
+
+
+    def readItemsDeferred(self, items: list, executor=None) -> tuple[dict, set, dict]:
+        """
+        Non-blocking read for streaming: returns (hits, stale keys, key -> Future for every miss)
+        Hits are ready right away, misses resolve as their batch completes on executor (or a new thread)
+        """
+
+        hits, misses, stale = self.partition(items)
+        if not misses:
+            return hits, stale, {}
+
+        futures, isLeader = self._claim(misses)
+        if isLeader:
+            if executor is None:
+                threading.Thread(target=self._flush, daemon=True).start()
+            else:
+                executor.submit(self._flush)
+        return hits, stale, futures
+
+
+    def _claim(self, misses: list) -> tuple[dict, bool]:
+        """
+        Attaches to in-flight loads for misses, queueing the rest into the open batch
+        Returns key -> Future and whether this caller must flush the batch
+        """
+
+        futures = {}
+        with self.lock:
+            self._batchPriority = min(self._batchPriority, currentPriority())
+            for key in misses:
+                future = self._inflight.get(key)
+                if future is None:
+                    future = Future()
+                    self._inflight[key] = future
+                    self._pendingBatch.append(key)
+                futures[key] = future
+
+            isLeader = bool(self._pendingBatch) and not self._batchOpen
+            if isLeader:
+                self._batchOpen = True
+        return futures, isLeader
+
+
+    def _flush(self):
+        """
+        Waits out the coalescing window, then loads every queued miss in one call
+        and resolves their futures
+        """
+
+        if self.coalesceWindow > 0:
+            time.sleep(self.coalesceWindow)
+
+        with self.lock:
+            batch, self._pendingBatch = self._pendingBatch, []
+            priority, self._batchPriority = self._batchPriority, WARMUP
+            self._batchOpen = False
+
+        try:
+            # loads the data using a custom method, upstream calls inherit the batch's most urgent priority
+            with fetchPriority(priority), cacheLoad(self.namespace, len(batch)):
+                missingData, ages = self._loadShared(batch) if self.backend is not None else (self.loadData(batch) or {}, {})
+        except Exception as e:
+            with self.lock:
+                for key in batch:
+                    self._inflight.pop(key).set_exception(e)
+            return
+
+        # assuming items 1-to-1 corresponds with misses
+        for key, item in missingData.items():
+            self.add(key, item, ages.get(key, 0.0))
+
+        with self.lock:
+            for key in batch:
+                self._inflight.pop(key).set_result(missingData.get(key))
+
+
+    def _readShared(self, keys: list) -> tuple[dict, dict]:
+        """
+        Reads keys from the shared backend, returns (key -> value, key -> age in seconds)
+        Values old enough to be refreshed ahead are ignored, so a refresh never re-adopts the data it replaces
+        """
+
+        NOW = time.time()
+        usable = float('inf') if self.softTTL is None else self.refreshAhead * self.softTTL
+        values, ages = {}, {}
+        for key, (value, loadedAt) in self.backend.getMany(self.namespace, keys).items():
+            age = max(0.0, NOW - loadedAt)
+            if age < usable:
+                values[key], ages[key] = value, age
+        return values, ages
+
+
+    def _loadShared(self, batch: list) -> tuple[dict, dict]:
+        """
+        Loads a batch through the shared backend:
+            1. keys another worker already stored are adopted as-is
+            2. the remaining keys are locked across processes, the locked ones go to loadData() and are published
+            3. keys locked by another worker are polled until it publishes them, or loaded here if its lock lapses
+        """
+
+        found, ages = self._readShared(batch)
+        missing = [key for key in batch if key not in found]
+        owned = {}
+        for key in missing:
+            token = self.backend.acquire(self.namespace, key, self.lockTTL)
+            if token is not None:
+                owned[key] = token
+        waiting = [key for key in missing if key not in owned]
+
+        # shared copies outlive the local sliding TTL as long as they are still young enough to adopt
+        sharedTTL = self.TTL if self.softTTL is None else max(self.TTL, self.refreshAhead * self.softTTL)
+        loaded = {}
+        try:
+            if owned:
+                loaded = self.loadData(list(owned)) or {}
+                self.backend.setMany(self.namespace, {key: value for key, value in loaded.items() if value is not None}, sharedTTL)
+        finally:
+            self.backend.release(self.namespace, owned)
+
+        if waiting:
+            with self.lock:
+                self.sharedWaits += len(waiting)
+            published, publishedAges = self._awaitShared(waiting)
+            found.update(published)
+            ages.update(publishedAges)
+            leftover = [key for key in waiting if key not in published]
+            if leftover:
+                loaded.update(self.loadData(leftover) or {})
+
+        adopted = {key: value for key, value in found.items() if key not in loaded}
+        if adopted:
+            with self.lock:
+                self.sharedHits += len(adopted)
+            self.adoptShared(adopted)
+        return self._merge(adopted, loaded), ages
+
+
+    def _awaitShared(self, keys: list, interval: float = 0.05) -> tuple[dict, dict]:
+        """
+        Polls the backend until every key is published or no longer locked by another worker
+        """
+
+        deadline = time.monotonic() + self.lockTTL
+        values, ages = {}, {}
+        pending = list(keys)
+        while pending and time.monotonic() < deadline:
+            time.sleep(interval)
+            published, publishedAges = self._readShared(pending)
+            values.update(published)
+            ages.update(publishedAges)
+            pending = [key for key in pending if key not in published and self.backend.isLocked(self.namespace, key)]
+        return values, ages
+
+
+    def adoptShared(self, items: dict):
+        """
+        Called with values loaded elsewhere (by another worker, or restored from a snapshot),
+        for caches that keep process-local state beside their entries
+        """
+        pass
 
 
     def loadData(self, misses: list) -> dict:
@@ -93,97 +442,452 @@ class TemplateTTLCache:
         return {}
 
 
-    def add(self, key, value) -> bool:
+    def add(self, key, value, age: float = 0.0) -> bool:
         """
         Inserts a key-value pair into the cache
         The key-value pair will be removed once the policy expires
+        age backdates the entry's load time, for data that was loaded earlier by another worker
         """
 
         # make an insertion and add a TTL policy
-        NOW = datetime.datetime.now()
-        self.data[key] = {'data': value, 'expiry': NOW + self.TTL}
+        NOW = time.monotonic()
+        loadedAt = NOW - age
+        size = approxSize(value)
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is None:
+                entry = _Entry(key, value, NOW + self.TTL, loadedAt, size)
+                entry.expiry = self._expiryFor(entry, NOW)
+                self.data[key] = entry
+                self._schedule(entry)
+            else:
+                # existing entries keep their heap record, sweep() reschedules it
+                self.bytes -= entry.size
+                entry.data, entry.size = value, size
+                entry.encoded = entry.encodedExtra = None
+                entry.loadedAt = loadedAt
+                entry.expiry = self._expiryFor(entry, NOW)
+                self.data.move_to_end(key)
+
+            self.bytes += size
+            self._enforceBudget(protect=key)
         return True
+
+
+    def encoded(self, key, extra: dict | None = None) -> bytes | None:
+        """
+        JSON of the cached value for key, with the fields in extra merged in, None if key is not cached
+        The bytes are kept next to the value and reused until it is reloaded or extra changes,
+        so hot keys are encoded once per load instead of once per response
+        """
+
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is None:
+                return None
+            if entry.encoded is not None and entry.encodedExtra == extra:
+                return entry.encoded
+            data = entry.data
+
+        encoded = dumps(dict(data, **extra) if extra else data)
+        with self.lock:
+            # only store it if the entry was not reloaded or evicted meanwhile
+            if self.data.get(key) is entry and entry.data is data:
+                size = len(encoded) - (len(entry.encoded) if entry.encoded is not None else 0)
+                entry.encoded, entry.encodedExtra = encoded, extra
+                entry.size += size
+                self.bytes += size
+                self._enforceBudget(protect=key)
+        return encoded
+
+
+    def _remove(self, entry: _Entry):
+        """
+        Drops an entry, its heap record is discarded lazily by sweep()
+        The payload is released right away so the stale record holds no memory
+        """
+        self.data.pop(entry.key)
+        self.bytes -= entry.size
+        entry.data = entry.encoded = None
+
+
+    def _enforceBudget(self, protect=None):
+        """
+        Evicts entries picked by the eviction policy until the cache fits in maxBytes
+        """
+        if self.maxBytes is None:
+            return
+        while self.bytes > self.maxBytes:
+            key = self.evictionPolicy.victim(self.data, protect)
+            if key is None:
+                return
+            self._remove(self.data[key])
+            self.evictions += 1
+
+
+    def snapshot(self) -> list:
+        """
+        Live entries as (key, value, age in seconds), least recently used first
+        """
+
+        NOW = time.monotonic()
+        with self.lock:
+            return [(key, entry.data, NOW - entry.loadedAt) for key, entry in self.data.items() if entry.expiry > NOW]
+
+
+    def restore(self, items: list, elapsed: float = 0.0) -> int:
+        """
+        Re-inserts entries from snapshot(), aged by the elapsed seconds since it was taken
+        Entries past hardTTL (or TTL without one) are dropped, the rest go stale and refresh as usual
+        Returns the number of entries restored
+        """
+
+        maxAge = self.hardTTL if self.hardTTL is not None else self.TTL
+        restored = {}
+        for key, value, age in items:
+            age += elapsed
+            if value is not None and age < maxAge:
+                self.add(key, value, age)
+                restored[key] = value
+        if restored:
+            self.adoptShared(restored)
+        return len(restored)
+
+
+    def stats(self) -> dict:
+        """
+        Entries, approximate bytes, hit/miss and eviction counters
+        """
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self.data),
+                'bytes': self.bytes,
+                'maxBytes': self.maxBytes,
+                'policy': type(self.evictionPolicy).__name__,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRate': round(self.hits / total, 4) if total else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'inflight': len(self._inflight),
+                'shared': None if self.backend is None else {
+                    'backend': type(self.backend).__name__,
+                    'hits': self.sharedHits,
+                    'waits': self.sharedWaits,
+                },
+            }
     
 
     def sweepLoop(self):
         """
         Infinitely calls sweep in a thread on a delay
+        Wakes early when a read queues a refresh
         """
         
         while True:
-            time.sleep(self.sweepInterval)
+            self._wake.wait(self.sweepInterval)
+            self._wake.clear()
             self.sweep()
+            self.refresh()
 
 
-    def sweep(self):
+    def refresh(self):
         """
-        Iterates over cache items, popping any that are expired
+        Reloads queued keys in batches of refreshBatchSize, sleeping refreshDelay between batches
+        Reloads go through the single-flight path, so they coalesce with concurrent misses,
+        and their upstream calls queue behind user-facing misses in the fetch scheduler
         """
 
-        NOW = datetime.datetime.now()
-        toDelete = []
+        with self.lock:
+            keys = list(self._refreshQueue)
+            self._refreshQueue.clear()
+
+        for i in range(0, len(keys), self.refreshBatchSize):
+            batch = keys[i:i + self.refreshBatchSize]
+            with fetchPriority(REFRESH):
+                futures, isLeader = self._claim(batch)
+                if isLeader:
+                    self._flush()
 
-        # mark items for deletion in O(N)
-        for key, item in self.data.items():
-            if item['expiry'] < NOW:
-                toDelete.append(key)
+            for key, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f'background refresh failed for {key}: {e}')
 
-        # delete items in O(N)
-        for key in toDelete:
-            self.data.pop(key)
+            if i + self.refreshBatchSize < len(keys):
+                time.sleep(self.refreshDelay)
 
 
-    def warmup(self, items: list[str], batchSize: int, delay: float):
+    def sweep(self):
         """
-        Given keys, populates cache with k:v pairs while respecting
-        batchSize and delay parameters
+        Pops expired items off the expiry heap
+        Records whose entry was refreshed since scheduling are pushed back with the new expiry,
+        so each call costs O(E log N) for E due records instead of a full scan
         """
-        for i in range(batchSize, len(items), batchSize):
-            i = min(len(items), i)
 
-            tickerBatch = items[i - batchSize:i]
-            res = self.readItems(tickerBatch)
+        NOW = time.monotonic()
+        with self.lock:
+            heap = self._expiryHeap
+            while heap and heap[0][0] <= NOW:
+                _, _, entry = heapq.heappop(heap)
+
+                # record belongs to an entry that was already removed or replaced
+                if self.data.get(entry.key) is not entry:
+                    continue
+
+                if entry.expiry <= NOW:
+                    self._remove(entry)
+                    self.expirations += 1
+                else:
+                    self._schedule(entry)
 
-            time.sleep(delay)
+
+    def warmup(self, items: list[str], batchSize: int, delay: float = 0.0):
+        """
+        Given keys, populates cache with k:v pairs in batches of batchSize
+        Upstream pacing is left to the fetch scheduler, where warmup runs at the lowest priority,
+        delay only adds an optional extra pause between batches
+        """
+        with fetchPriority(WARMUP):
+            for i in range(0, len(items), batchSize):
+                tickerBatch = items[i:i + batchSize]
+                self.readItems(tickerBatch)
+
+                if delay > 0 and i + batchSize < len(items):
+                    time.sleep(delay)
 
         
-import yfinance as yf
-from utils.scripts import graphDriverFunction as getGraphs, statWrapperFunction as getStats
+from utils.scripts import graphDriverFunction as getGraphs, statWrapperFunction as getStats, fetchMarketData as getMarket
+from utils.priceStore import PriceStore
+from utils.portfolioStats import ReturnStats
+from utils.systematicrisk import startAll
+from utils.infoCache import getInfoCache
+from utils.validateTicker import isKnownTicker, isValidInfo
 
 class GraphCache(TemplateTTLCache):
-    def __init__(self, ttlInterval, sweepInterval):
-        super().__init__(ttlInterval, sweepInterval)
+    """
+    Ticker -> graphs computed from its stored price history
+    Full reads attach the MCTR of the requested portfolio to each ticker's graphs, readItemsDeferred does not:
+    its hits are returned before the misses resolve, so the portfolio is only known once every future is done
+    and streams send the MCTR in their final event instead
+    """
+    def __init__(self, ttlInterval, sweepInterval, store: PriceStore | None = None, **kwargs):
+        super().__init__(ttlInterval, sweepInterval, **kwargs)
+        self.store = store if store is not None else PriceStore()
+        self.returnStats = ReturnStats()
+
+
+    def readItemsWithStatus(self, items: list) -> tuple[dict, set]:
+        """
+        Cached per-ticker graphs plus the MCTR of the requested portfolio,
+        assembled in O(k^2) from the stored return statistics
+        """
+
+        graphs, stale = super().readItemsWithStatus(items)
+        return self._withPortfolio(graphs), stale
+
+
+    async def readItemsWithStatusAsync(self, items: list, executor=None) -> tuple[dict, set]:
+        graphs, stale = await super().readItemsWithStatusAsync(items, executor)
+        return self._withPortfolio(graphs), stale
+
+
+    def _withPortfolio(self, graphs: dict) -> dict:
+        """
+        Attaches the MCTR of the whole requested portfolio to each ticker's graphs
+        """
+
+        loaded = [ticker for ticker in graphs if ticker in self.returnStats]
+        if loaded:
+            with span('analytics.mctr'):
+                mctr = self.returnStats.mctr(loaded)
+            graphs = {ticker: self._merge(dict(val), {'mctr': mctr[ticker]}) if ticker in mctr else val
+                      for ticker, val in graphs.items()}
+        return graphs
 
 
     def loadData(self, misses: list[str]) -> dict:
         """
-        Fetches price histories via block call, then computes graph values with vectorized ops
+        Reads price histories from the on-disk store (downloading only missing bars),
+        then computes graph values with vectorized ops
         """
 
-        data = yf.download(misses, period='10y', interval='1d', timeout=10)
-        res = dict(getGraphs(data))
+        res = dict(getGraphs(misses, self.store, self.returnStats))
 
         # originally, data is keyed by graph type
         # we want it to be keyed by ticker name
         reformattedRes = {miss: {} for miss in misses}
         for graph, val in res.items():
             for ticker, stats in val.items():
+                if ticker not in reformattedRes:
+                    continue
 
                 # remaps data without overwriting        
                 reformattedRes[ticker][graph] = stats
                 
         return reformattedRes
 
+
+    def adoptShared(self, items: dict):
+        """
+        Graphs loaded by another worker or restored from a snapshot come without this process's return statistics,
+        rebuild those from the shared on-disk price store, no upstream call needed
+        """
+
+        tickers = [ticker for ticker in items if ticker not in self.returnStats]
+        if not tickers:
+            return
+        panel = self.store.panel(tickers)
+        if not panel.empty:
+            self.returnStats.update(panel.xs('Close', level=0, axis=1))
         
 
+class ValidationCache(TemplateTTLCache):
+    """
+    Ticker -> {'valid', 'info'} cache for symbols outside the known universe
+    Both positive and negative results are cached, and the .info payload of valid tickers is kept for StatsCache
+    Only resolved payloads are cached, a lookup that raised (timeout, throttle, network) is retried on the next read
+    """
+    def __init__(self, ttlInterval, sweepInterval, **kwargs):
+        super().__init__(ttlInterval, sweepInterval, **kwargs)
+
+
+    def loadData(self, misses: list[str]) -> dict:
+        """
+        Fetches .info for all misses in one concurrent batch through the shared payload layer
+        """
+
+        infos = getInfoCache().get(misses)
+        res = {}
+        for ticker in misses:
+            info = infos.get(ticker)
+
+            # failed lookups stay uncached, like in the shared payload layer
+            if info is None or isinstance(info, Exception):
+                continue
+            isValid = isValidInfo(info)
+            res[ticker] = {'valid': isValid, 'info': info if isValid else None}
+        return res
+
+
+    def validate(self, tickers: list[str]) -> dict:
+        """
+        Returns ticker -> True/False, or None when the lookup failed upstream and could not be decided
+        Known symbols are checked in O(1) and only the rest go remote
+        """
+
+        res = {ticker: True for ticker in tickers if isKnownTicker(ticker)}
+        unknown = [ticker for ticker in tickers if ticker not in res]
+        if unknown:
+            checked = self.readItems(unknown)
+            for ticker in unknown:
+                res[ticker] = checked[ticker]['valid'] if ticker in checked else None
+        return res
+
+
+    async def validateAsync(self, tickers: list[str], executor=None) -> dict:
+        """
+        Awaitable validate, cached results are answered on the event loop and only misses load on executor
+        """
+
+        res = {ticker: True for ticker in tickers if isKnownTicker(ticker)}
+        unknown = [ticker for ticker in tickers if ticker not in res]
+        if unknown:
+            checked, _ = await self.readItemsWithStatusAsync(unknown, executor)
+            for ticker in unknown:
+                res[ticker] = checked[ticker]['valid'] if ticker in checked else None
+        return res
+
+
+    def payloads(self, tickers: list[str]) -> dict:
+        """
+        Returns the already-fetched .info payloads among tickers, never triggers a load
+        """
+
+        res = {}
+        for ticker in tickers:
+            item = self.query(ticker)
+            if item is not None and item['info'] is not None:
+                res[ticker] = item['info']
+        return res
+
+
+
 class StatsCache(TemplateTTLCache):
-    def __init__(self, ttlInterval, sweepInterval):
-        super().__init__(ttlInterval, sweepInterval)
+    def __init__(self, ttlInterval, sweepInterval, validator: ValidationCache | None = None, **kwargs):
+        super().__init__(ttlInterval, sweepInterval, **kwargs)
+        self.validator = validator
 
 
     def loadData(self, misses: list[str]) -> dict:
         """
         Fetches stock stats from yfin efficiently with asyncio
+        .info payloads already fetched during validation are reused instead of downloaded again
         """
         
-        return getStats(misses)
+        infos = self.validator.payloads(misses) if self.validator is not None else {}
+        return getStats(misses, infos)
+
+
+
+class MarketCache(TemplateTTLCache):
+    """
+    Benchmark symbol -> {'averages', 'predictions'} market metrics
+    Every request using a benchmark shares one in-flight load, and reads past softTTL
+    are served the cached metrics while the sweep thread refreshes them
+    """
+    def __init__(self, ttlInterval, sweepInterval, **kwargs):
+        super().__init__(ttlInterval, sweepInterval, **kwargs)
+
+
+    def loadData(self, misses: list[str]) -> dict:
+        """
+        Computes market averages and expectations per benchmark, a failed benchmark is left out
+        """
+
+        res = {}
+        for benchmark in misses:
+            try:
+                averages, predictions = getMarket(benchmark)
+            except Exception as e:
+                print(f'market data failed for {benchmark}: {e}')
+                continue
+            res[benchmark] = {'averages': averages, 'predictions': predictions}
+        return res
+
+
+class BetaCache(TemplateTTLCache):
+    """
+    'TICKER@BENCHMARK' -> beta of a ticker against a benchmark other than the default one (whose beta comes with the graphs)
+    Regressed once per pair on the stored closes with the graph beta's estimator, then served from memory
+    """
+    def __init__(self, ttlInterval, sweepInterval, store: PriceStore, **kwargs):
+        super().__init__(ttlInterval, sweepInterval, **kwargs)
+        self.store = store
+
+
+    @staticmethod
+    def key(ticker: str, benchmark: str) -> str:
+        return f'{ticker}@{benchmark}'
+
+
+    def loadData(self, misses: list[str]) -> dict:
+        """
+        One regression per benchmark over every missed ticker, tickers without stored closes are left out
+        """
+
+        byBenchmark = {}
+        for key in misses:
+            ticker, benchmark = key.rsplit('@', 1)
+            byBenchmark.setdefault(benchmark, []).append(ticker)
+
+        res = {}
+        for benchmark, tickers in byBenchmark.items():
+            panel = self.store.panel(list(dict.fromkeys(tickers + [benchmark])))
+            regressed = startAll(panel, benchmark) if not panel.empty else {}
+            for ticker in tickers:
+                if ticker in regressed:
+                    res[self.key(ticker, benchmark)] = regressed[ticker]['beta']
+        return res
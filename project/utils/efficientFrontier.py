@@ -1,6 +1,12 @@
 import numpy as np
 import pandas as pd
 
+# the frontier's number of target returns
+MAX_POINTS = 500
+
+# relative size of D = AC - B^2 below which the frontier is treated as degenerate
+DEGENERATE_TOLERANCE = 1e-10
+
 def calculateCagr(start_price, end_price, years):
     return np.round((np.power(end_price / start_price, 1 / years) - 1) * 100, 2)
 
@@ -33,4 +39,74 @@ def start(data: pd.DataFrame) -> dict:
     }, index=tickers)
 
     metrics = metrics_df.to_dict(orient='index')
-    return metrics
\ No newline at end of file
+    return metrics
+
+def _solveBoth(cov: np.ndarray, mu: np.ndarray, ridge: float) -> tuple[np.ndarray, np.ndarray]:
+    """Returns (cov^-1 1, cov^-1 mu) from one factorization, with a small ridge for near-singular covariances"""
+    k = len(mu)
+    scale = np.trace(cov) / k if k else 1.0
+    rhs = np.column_stack([np.ones(k), mu])
+    solved = np.linalg.solve(cov + ridge * scale * np.eye(k), rhs)
+    return solved[:, 0], solved[:, 1]
+
+
+def frontier(mu: np.ndarray, cov: np.ndarray, points: int = 50, ridge: float = 1e-8) -> dict:
+    """
+    Closed-form mean-variance frontier (fully invested, shorting allowed) across `points` target returns
+
+    With A = 1'S^-1 1, B = 1'S^-1 mu, C = mu'S^-1 mu and D = AC - B^2, the minimum-variance
+    weights for target m are S^-1 (1 (C - mB) + mu (mA - B)) / D, so every target is solved
+    by one outer product instead of one QP per point.
+    mu and cov are annualized, returned risk/return are in percent
+    Raises ValueError when D is ~0 (a single asset, or every asset with the same return), the frontier is then one point
+    """
+    if len(mu) < 2:
+        raise ValueError('the frontier needs at least 2 distinct tickers')
+    if not 2 <= points <= MAX_POINTS:
+        raise ValueError(f'points must be between 2 and {MAX_POINTS}')
+
+    invOnes, invMu = _solveBoth(cov, mu, ridge)
+    A, B, C = invOnes.sum(), invMu.sum(), mu @ invMu
+    D = A * C - B * B
+    # D >= 0 by Cauchy-Schwarz, with equality when mu is a multiple of the ones vector
+    if not np.isfinite(D) or D <= DEGENERATE_TOLERANCE * abs(A * C):
+        raise ValueError('the frontier is a single point, the tickers have the same expected return')
+
+    # upper branch: from the global minimum-variance return up to the best single asset
+    targets = np.linspace(B / A, max(mu.max(), B / A), points)
+    W = (np.outer(C - targets * B, invOnes) + np.outer(targets * A - B, invMu)) / D
+    variance = np.maximum((A * targets ** 2 - 2 * B * targets + C) / D, 0)
+
+    return {
+        'risk': np.round(np.sqrt(variance) * 100, 3).tolist(),
+        'return': np.round(targets * 100, 3).tolist(),
+        'weights': np.round(W, 5).tolist(),
+        'minVariance': {
+            'risk': float(np.round(np.sqrt(1 / A) * 100, 3)),
+            'return': float(np.round(B / A * 100, 3)),
+            'weights': np.round(invOnes / A, 5).tolist(),
+        },
+    }
+
+
+def randomPortfolios(mu: np.ndarray, cov: np.ndarray, samples: int = 2000, seed: int = 0) -> dict:
+    """
+    Monte-Carlo of long-only portfolios as matrix ops: Dirichlet weights (samples x k),
+    returns W mu and variances diag(W S W') computed row-wise without forming the samples x samples product
+    """
+    rng = np.random.default_rng(seed)
+    W = rng.dirichlet(np.ones(len(mu)), size=samples)
+    returns = W @ mu
+    variance = np.einsum('ij,ij->i', W @ cov, W)
+    return {
+        'risk': np.round(np.sqrt(variance) * 100, 3).tolist(),
+        'return': np.round(returns * 100, 3).tolist(),
+    }
+
+
+def portfolioPoint(mu: np.ndarray, cov: np.ndarray, w: np.ndarray) -> dict:
+    """Risk/return of a single weight vector, in percent"""
+    return {
+        'risk': float(np.round(np.sqrt(w @ cov @ w) * 100, 3)),
+        'return': float(np.round(w @ mu * 100, 3)),
+    }
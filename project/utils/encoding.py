@@ -0,0 +1,80 @@
+import hashlib
+import json
+import math
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj):
+    """
+    NumPy scalars and arrays for the stdlib encoder, orjson handles them natively
+    """
+    import numpy as np
+
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def _finite(obj):
+    """
+    Copy of obj for the stdlib encoder with NumPy values converted and NaN/Infinity replaced by None, as orjson writes them
+    """
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    if type(obj).__module__ == 'numpy':
+        return _finite(_default(obj))
+    return obj
+
+
+def dumps(obj) -> bytes:
+    """
+    Fast JSON encoding to bytes, NumPy scalars/arrays included and NaN/Infinity written as null
+    Falls back to the stdlib encoder when orjson is not installed, producing the same valid JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(_finite(obj), default=_default, separators=(',', ':'), allow_nan=False).encode()
+
+
+def withField(fragment: bytes, name: str, value) -> bytes:
+    """
+    Adds one key to an encoded JSON object without decoding it, the key must not already be present
+    """
+    field = dumps(name) + b':' + dumps(value)
+    if fragment == b'{}':
+        return b'{' + field + b'}'
+    return fragment[:-1] + b',' + field + b'}'
+
+
+def encodeObject(items) -> bytes:
+    """
+    Joins (key, encoded value) pairs into one JSON object
+    """
+    return b'{' + b','.join(dumps(key) + b':' + value for key, value in items) + b'}'
+
+
+def etagFor(body: bytes) -> str:
+    """
+    Strong validator for a response body
+    """
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etagMatches(ifNoneMatch: str | None, etag: str) -> bool:
+    """
+    True when an If-None-Match header lists etag (or is *), weak comparison as in RFC 9110
+    """
+    if not ifNoneMatch:
+        return False
+    candidates = [tag.strip().removeprefix('W/') for tag in ifNoneMatch.split(',')]
+    return '*' in candidates or etag in candidates
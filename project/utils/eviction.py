@@ -0,0 +1,86 @@
+import itertools
+import sys
+
+import numpy as np
+
+
+def approxSize(obj, depth: int = 6) -> int:
+    """
+    Approximate deep size in bytes of a cached value
+    Walks dicts/lists/tuples/sets down to `depth` levels, NumPy arrays count their buffer
+    """
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes + 112
+    size = sys.getsizeof(obj)
+    if depth == 0:
+        return size
+    if isinstance(obj, dict):
+        return size + sum(approxSize(k, depth - 1) + approxSize(v, depth - 1) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(approxSize(v, depth - 1) for v in obj)
+    return size
+
+
+class EvictionPolicy:
+    """
+    Chooses which entry to evict when a cache exceeds its memory budget
+
+    Caches keep entries in recency order (least recently used first), so every policy
+    looks at a bounded sample of the coldest entries and picks one in O(sampleSize)
+    """
+
+    def __init__(self, sampleSize: int = 16):
+        self.sampleSize = sampleSize
+
+    def _sample(self, entries: dict) -> list:
+        return list(itertools.islice(entries.values(), self.sampleSize))
+
+    def victim(self, entries: dict, protect=None):
+        """
+        Returns the key to evict from entries (an ordered key -> entry mapping), never `protect`
+        """
+        raise Exception('Function victim() must be overloaded by a child class')
+
+
+class LRUPolicy(EvictionPolicy):
+    """Evicts the least recently used entry"""
+
+    def victim(self, entries: dict, protect=None):
+        for key in entries:
+            if key != protect:
+                return key
+        return None
+
+
+class LFUPolicy(EvictionPolicy):
+    """Approximate LFU: evicts the least frequently read entry among the coldest sample"""
+
+    def victim(self, entries: dict, protect=None):
+        sample = [entry for entry in self._sample(entries) if entry.key != protect]
+        return min(sample, key=lambda entry: entry.hits).key if sample else None
+
+
+class TTLLRUPolicy(EvictionPolicy):
+    """Hybrid: evicts the entry closest to expiring among the coldest sample"""
+
+    def victim(self, entries: dict, protect=None):
+        sample = [entry for entry in self._sample(entries) if entry.key != protect]
+        return min(sample, key=lambda entry: entry.expiry).key if sample else None
+
+
+POLICIES = {
+    'lru': LRUPolicy,
+    'lfu': LFUPolicy,
+    'ttl-lru': TTLLRUPolicy,
+}
+
+
+def makePolicy(policy) -> EvictionPolicy:
+    """
+    Accepts a policy instance or one of the names in POLICIES
+    """
+    if isinstance(policy, EvictionPolicy):
+        return policy
+    if policy not in POLICIES:
+        raise ValueError(f'unknown eviction policy {policy}, expected one of {sorted(POLICIES)}')
+    return POLICIES[policy]()
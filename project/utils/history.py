@@ -0,0 +1,330 @@
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.priceStore import PriceStore
+from utils.providers import FIELDS, periodToDays
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MIMETYPES = {
+    'json': 'application/json',
+    'msgpack': 'application/msgpack',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+# bar sizes built from the stored daily bars, the store holds nothing finer
+INTERVALS = ('1d', '1wk', '1mo', '3mo')
+
+# server-side downsampling to at most ?points= rows per ticker
+DOWNSAMPLERS = ('lttb', 'ohlc')
+MIN_POINTS, MAX_POINTS = 3, 10000
+
+
+def parseFields(raw: str | None) -> list[str]:
+    """
+    'close' (default), 'ohlcv', or a comma-separated subset of open,high,low,close,volume
+    """
+    raw = (raw or 'close').lower()
+    if raw == 'ohlcv':
+        return list(FIELDS)
+    byName = {field.lower(): field for field in FIELDS}
+    fields = [byName.get(name.strip()) for name in raw.split(',')]
+    if None in fields:
+        raise ValueError(f'fields must be ohlcv or a subset of {",".join(byName)}')
+    return list(dict.fromkeys(fields))
+
+
+def periodStart(period: str):
+    """
+    First date of a yfinance-style period ('1mo', '6mo', '1y', '10y', 'ytd', 'max') ending today, None for 'max'
+    """
+    period = period.lower()
+    today = np.datetime64('today', 'D')
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return today.astype('datetime64[Y]').astype('datetime64[D]')
+    return today - np.timedelta64(periodToDays(period), 'D')
+
+
+def parseHistoryArgs(args) -> tuple[dict | None, str | None]:
+    """
+    Parses start/end/period/interval/points/downsample/fields/format/decimals query args for /history
+    period (alias range) is an alternative to start
+    Returns (options, error)
+    """
+    period = args.get('period') or args.get('range')
+    if period and args.get('start'):
+        return None, 'give either start or period, not both'
+    try:
+        options = {
+            'start': np.datetime64(args['start'], 'D') if args.get('start') else periodStart(period) if period else None,
+            'end': np.datetime64(args['end'], 'D') if args.get('end') else None,
+            'fields': tuple(parseFields(args.get('fields'))),
+            'fmt': str(args.get('format') or 'json').lower(),
+            'decimals': int(args['decimals']) if args.get('decimals') not in (None, '') else None,
+            'interval': str(args.get('interval') or '1d').lower(),
+            'points': int(args['points']) if args.get('points') not in (None, '') else None,
+            'downsample': str(args.get('downsample') or 'lttb').lower(),
+        }
+    except ValueError as e:
+        return None, f'invalid history arguments: {e}'
+    if options['fmt'] not in MIMETYPES:
+        return None, f'format must be one of {", ".join(MIMETYPES)}'
+    if options['interval'] not in INTERVALS:
+        return None, f'interval must be one of {", ".join(INTERVALS)} (history is stored as daily bars)'
+    if options['downsample'] not in DOWNSAMPLERS:
+        return None, f'downsample must be one of {", ".join(DOWNSAMPLERS)}'
+    if options['points'] is not None and not MIN_POINTS <= options['points'] <= MAX_POINTS:
+        return None, f'points must be between {MIN_POINTS} and {MAX_POINTS}'
+    return options, None
+
+
+def aggregateBars(rows: np.ndarray, starts: np.ndarray, dates: np.ndarray) -> np.ndarray:
+    """
+    One bar per run of rows beginning at each of starts, dated by dates:
+    first open, highest high, lowest low, last close and total volume
+    """
+    ends = np.append(starts[1:], len(rows)) - 1
+    bars = np.empty(len(starts), dtype=rows.dtype)
+    bars['date'] = dates
+    bars['Open'] = rows['Open'][starts]
+    bars['High'] = np.fmax.reduceat(rows['High'], starts)
+    bars['Low'] = np.fmin.reduceat(rows['Low'], starts)
+    bars['Close'] = rows['Close'][ends]
+    bars['Volume'] = np.add.reduceat(np.nan_to_num(rows['Volume']), starts)
+    return bars
+
+
+def resample(rows: np.ndarray, interval: str) -> np.ndarray:
+    """
+    Daily rows to weekly (Monday-dated), monthly or quarterly bars, labelled by the period's first day like yfinance
+    """
+    if interval == '1d' or not len(rows):
+        return rows
+
+    if interval == '1wk':
+        # 1970-01-05 was a Monday
+        keys = (rows['date'].astype('datetime64[D]').astype(np.int64) - 4) // 7
+        labels = (keys * 7 + 4).astype('datetime64[D]')
+    else:
+        months = rows['date'].astype('datetime64[M]').astype(np.int64)
+        keys = months if interval == '1mo' else months // 3
+        labels = (keys if interval == '1mo' else keys * 3).astype('datetime64[M]').astype('datetime64[D]')
+
+    starts = np.flatnonzero(np.diff(keys, prepend=keys[0] - 1))
+    return aggregateBars(rows, starts, labels[starts])
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Indices kept by Largest-Triangle-Three-Buckets: the first and last point, plus from each of points - 2
+    equal buckets the point forming the largest triangle with the previous pick and the next bucket's mean
+    """
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+    widths = np.diff(edges)
+    meanX = np.add.reduceat(x[:n - 1], edges[:-1]) / widths
+    meanY = np.add.reduceat(y[:n - 1], edges[:-1]) / widths
+
+    keep = np.empty(points, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    prev = 0
+    for bucket in range(points - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        nextX, nextY = (meanX[bucket + 1], meanY[bucket + 1]) if bucket + 1 < points - 2 else (x[-1], y[-1])
+        area = np.abs((x[prev] - nextX) * (y[lo:hi] - y[prev]) - (x[prev] - x[lo:hi]) * (nextY - y[prev]))
+        prev = lo + int(np.argmax(area))
+        keep[bucket + 1] = prev
+    return keep
+
+
+def downsample(rows: np.ndarray, points: int | None, method: str = 'lttb') -> np.ndarray:
+    """
+    At most points rows: 'lttb' keeps the rows that best preserve the shape of the close line,
+    'ohlc' aggregates equal runs of rows into bars so no high or low is lost
+    """
+    if points is None or len(rows) <= points:
+        return rows
+
+    if method == 'ohlc':
+        starts = np.linspace(0, len(rows), points, endpoint=False).astype(int)
+        return aggregateBars(rows, starts, rows['date'][starts])
+
+    valid = np.flatnonzero(np.isfinite(rows['Close']))
+    x = rows['date'][valid].astype('datetime64[D]').astype('f8')
+    return rows[valid[lttb(x, rows['Close'][valid], points)]]
+
+
+def readColumns(store: PriceStore, tickers: list[str], start=None, end=None, fields=('Close',),
+                decimals: int | None = None, interval: str = '1d', points: int | None = None,
+                method: str = 'lttb') -> dict:
+    """
+    Ticker -> {'date', <field>...} parallel NumPy columns for start <= date <= end,
+    resampled to interval bars and downsampled to at most points rows
+    Columns are sliced from the memory-mapped store, daily rows with no downsampling are copied only to make each field contiguous
+    """
+    res = {}
+    for ticker in tickers:
+        rows = downsample(resample(store.window(ticker, start, end), interval), points, method)
+        columns = {'date': np.ascontiguousarray(rows['date'])}
+        for field in fields:
+            column = np.ascontiguousarray(rows[field])
+            columns[field.lower()] = np.round(column, decimals) if decimals is not None else column
+        res[ticker] = columns
+    return res
+
+
+def encodeJSON(columns: dict) -> bytes:
+    """
+    {'tickers': {ticker: {'date': [...], 'close': [...]}}}, dates as YYYY-MM-DD and missing values as null
+    With orjson the float buffers are serialized natively, otherwise they go through one tolist() per column
+    """
+    body = {}
+    for ticker, cols in columns.items():
+        out = {'date': np.datetime_as_string(cols['date'], unit='D').tolist()}
+        for name, column in cols.items():
+            if name == 'date':
+                continue
+            if orjson is not None:
+                out[name] = column
+                continue
+            missing = np.isnan(column)
+            out[name] = np.where(missing, None, column).tolist() if missing.any() else column.tolist()
+        body[ticker] = out
+
+    if orjson is not None:
+        return orjson.dumps({'tickers': body}, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps({'tickers': body}).encode()
+
+
+def encodeMsgpack(columns: dict) -> bytes:
+    """
+    {'tickers': {ticker: {column: {'dtype', 'data'}}}}, every column is its raw little-endian buffer
+    dates are int32 days since 1970-01-01
+    """
+    try:
+        import msgpack
+    except ImportError:
+        raise ValueError('msgpack output needs the msgpack package')
+
+    body = {}
+    for ticker, cols in columns.items():
+        out = {}
+        for name, column in cols.items():
+            column = column.astype('<i4') if name == 'date' else column.astype('<f8', copy=False)
+            out[name] = {'dtype': column.dtype.str, 'data': column.tobytes()}
+        body[ticker] = out
+    return msgpack.packb({'tickers': body}, use_bin_type=True)
+
+
+def encodeArrow(columns: dict) -> bytes:
+    """
+    Arrow IPC stream of one long table: ticker (dictionary-encoded), date (date32) and the requested fields
+    Float columns are wrapped without copying
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ValueError('arrow output needs the pyarrow package')
+
+    tickers = list(columns)
+    counts = np.array([len(cols['date']) for cols in columns.values()], dtype=np.int32)
+    names = [name for name in next(iter(columns.values()), {}) if name != 'date']
+
+    table = pa.table({
+        'ticker': pa.DictionaryArray.from_arrays(np.repeat(np.arange(len(tickers), dtype=np.int32), counts), tickers),
+        'date': pa.array(np.concatenate([cols['date'] for cols in columns.values()]) if tickers else np.empty(0, 'datetime64[D]')),
+        **{name: pa.array(np.concatenate([cols[name] for cols in columns.values()])) for name in names},
+    })
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+ENCODERS = {'json': encodeJSON, 'msgpack': encodeMsgpack, 'arrow': encodeArrow}
+
+
+class HistoryPayloads:
+    """
+    LRU of encoded /history payloads, bounded by entry count and by total encoded bytes
+    Keys include each ticker file's modification time, so a store update invalidates every payload built from it
+    A payload larger than maxBytes on its own is served but never cached
+    """
+
+    def __init__(self, store: PriceStore, maxEntries: int = 256, maxBytes: int = 32 * 1024 * 1024):
+        self.store = store
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+        self.data = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    def _version(self, ticker: str) -> int:
+        try:
+            return os.stat(self.store._path(ticker)).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+
+    def get(self, tickers: list[str], start=None, end=None, fields=('Close',), fmt: str = 'json',
+            decimals: int | None = None, interval: str = '1d', points: int | None = None,
+            downsample: str = 'lttb') -> tuple[bytes, str]:
+        """
+        Returns (payload, mimetype), bringing stored histories up to date first
+        """
+
+        self.store.update(tickers)
+        key = (tuple(tickers), start, end, fields, fmt, decimals, interval, points, downsample,
+               tuple(self._version(ticker) for ticker in tickers))
+        with self.lock:
+            payload = self.data.get(key)
+            if payload is not None:
+                self.hits += 1
+                self.data.move_to_end(key)
+                return payload, MIMETYPES[fmt]
+            self.misses += 1
+
+        payload = ENCODERS[fmt](readColumns(self.store, tickers, start, end, fields, decimals, interval, points, downsample))
+        if len(payload) > self.maxBytes:
+            return payload, MIMETYPES[fmt]
+        with self.lock:
+            previous = self.data.pop(key, None)
+            self.bytes -= len(previous) if previous is not None else 0
+            self.data[key] = payload
+            self.bytes += len(payload)
+            while len(self.data) > self.maxEntries or self.bytes > self.maxBytes:
+                _, evicted = self.data.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions += 1
+        return payload, MIMETYPES[fmt]
+
+
+    def stats(self) -> dict:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self.data),
+                'bytes': self.bytes,
+                'maxBytes': self.maxBytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hitRate': round(self.hits / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,210 @@
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+# trailing horizons in calendar years, rolling windows in trading days
+HORIZON_YEARS = (1, 3, 5, 10)
+ROLLING_WINDOWS = (60, 252)
+
+# rolling series are sampled every ROLLING_STEP calendar days (weekly) back from the last close,
+# each sample covering the window that ends on the last trading day at or before its date
+ROLLING_STEP = 7
+
+# a horizon is reported when history starts within this many days of it, a window when this share of it has data
+HORIZON_SLACK_DAYS = 7
+MIN_WINDOW_COVERAGE = 0.8
+
+
+def _cumulative(values: np.ndarray) -> np.ndarray:
+    """
+    Column-wise running sums with a leading zero row, rows a..b sum to out[b + 1] - out[a]
+    """
+    out = np.zeros((values.shape[0] + 1, values.shape[1]))
+    np.cumsum(values, axis=0, out=out[1:])
+    return out
+
+
+class _Sums:
+    """
+    Running sums of a return matrix, each window or horizon is read from them
+    by one subtraction per column instead of another pass over the panel
+
+        without market      n, sum, sum of squares over each column's valid days (volatility)
+        with market         pn, px, pm, pxm, pmm over the days both have a return (beta)
+    """
+
+    def __init__(self, returns: np.ndarray, market: np.ndarray | None = None):
+        valid = np.isfinite(returns)
+        if market is None:
+            r = np.where(valid, returns, 0.0)
+            self.sums = {'n': _cumulative(valid.astype('f8')), 's': _cumulative(r), 'ss': _cumulative(r * r)}
+            return
+
+        paired = valid & np.isfinite(market)[:, None]
+        x = np.where(paired, returns, 0.0)
+        m = np.where(paired, np.nan_to_num(market)[:, None], 0.0)
+        self.sums = {
+            'pn': _cumulative(paired.astype('f8')),
+            'px': _cumulative(x),
+            'pm': _cumulative(m),
+            'pxm': _cumulative(x * m),
+            'pmm': _cumulative(m * m),
+        }
+
+
+    def between(self, starts: np.ndarray, ends: np.ndarray) -> dict:
+        """
+        Sums over rows starts..ends (inclusive) for every column, one row of output per (start, end) pair
+        """
+        return {name: sums[ends + 1] - sums[starts] for name, sums in self.sums.items()}
+
+
+def _volatility(sums: dict) -> np.ndarray:
+    """
+    Annualized volatility in percent from own-day sums
+    """
+    n = sums['n']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        var = (sums['ss'] - sums['s'] ** 2 / n) / (n - 1)
+    return np.where(n > 1, np.sqrt(np.maximum(var, 0) * TRADING_DAYS) * 100, np.nan)
+
+
+def _beta(sums: dict) -> np.ndarray:
+    """
+    Regression slope on the market from paired-day sums
+    """
+    n = sums['pn']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = sums['pxm'] - sums['px'] * sums['pm'] / n
+        var = sums['pmm'] - sums['pm'] ** 2 / n
+        beta = cov / var
+    return np.where((n > 1) & (var > 0), beta, np.nan)
+
+
+def _compact(values: np.ndarray, decimals: int) -> np.ndarray:
+    """
+    Rounded object array with missing values as None, sliced per ticker into JSON-ready lists
+    """
+    rounded = np.round(values, decimals)
+    return np.where(np.isfinite(rounded), rounded, None)
+
+
+def horizons(closes: np.ndarray, dates: np.ndarray, volSums: _Sums, betaSums: _Sums,
+             years: tuple = HORIZON_YEARS) -> dict:
+    """
+    CAGR, volatility and beta over each trailing horizon, arrays of shape (horizons, tickers)
+    """
+    T = len(dates)
+    valid = np.isfinite(closes)
+
+    # first valid close at or after each row, T where there is none
+    rows = np.where(valid, np.arange(T)[:, None], T)
+    nextValid = np.minimum.accumulate(rows[::-1], axis=0)[::-1]
+
+    starts = np.array([np.searchsorted(dates, dates[-1] - np.timedelta64(int(365.25 * y), 'D')) for y in years])
+    ends = np.full(len(years), T - 1)
+
+    # returns start on the row after the first close of the horizon
+    volWindow = volSums.between(np.minimum(starts + 1, T - 1), ends)
+    betaWindow = betaSums.between(np.minimum(starts + 1, T - 1), ends)
+
+    cols = np.arange(closes.shape[1])
+    first = nextValid[starts]
+    firstPrice = np.where(first < T, closes[np.minimum(first, T - 1), cols], np.nan)
+    lastRow = np.where(valid.any(axis=0), T - 1 - np.argmax(valid[::-1], axis=0), 0)
+    lastPrice = closes[lastRow, cols]
+    closeCounts = _cumulative(valid.astype('f8'))
+    count = closeCounts[T] - closeCounts[starts]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cagr = (np.power(lastPrice / firstPrice, TRADING_DAYS / count) - 1) * 100
+
+    # a horizon longer than the ticker's history is left out rather than reported over a shorter span
+    firstDate = np.where(first < T, dates[np.minimum(first, T - 1)], dates[-1])
+    covered = firstDate <= dates[starts][:, None] + np.timedelta64(HORIZON_SLACK_DAYS, 'D')
+    covered &= first < T
+
+    return {
+        'cagr': np.where(covered, cagr, np.nan),
+        'risk': np.where(covered, _volatility(volWindow), np.nan),
+        'beta': np.where(covered, _beta(betaWindow), np.nan),
+    }
+
+
+def rolling(volSums: _Sums, betaSums: _Sums, dates: np.ndarray, windows: tuple = ROLLING_WINDOWS,
+            step: int = ROLLING_STEP) -> tuple[np.ndarray, dict]:
+    """
+    Rolling volatility and beta for each window, sampled every step calendar days ending on the last date
+    Returns (sample dates, {'volatility', 'beta'} arrays of shape (windows, samples, tickers))
+    """
+    span = int((dates[-1] - dates[1]) / np.timedelta64(1, 'D'))
+    sampled = dates[-1] - np.arange(span // step * step, -1, -step).astype('timedelta64[D]')
+    ends = np.searchsorted(dates, sampled, side='right') - 1
+    volatility, beta = [], []
+    for window in windows:
+        starts = np.maximum(ends - window + 1, 1)
+        volWindow = volSums.between(starts, ends)
+        betaWindow = betaSums.between(starts, ends)
+        volatility.append(np.where(volWindow['n'] >= MIN_WINDOW_COVERAGE * window, _volatility(volWindow), np.nan))
+        beta.append(np.where(betaWindow['pn'] >= MIN_WINDOW_COVERAGE * window, _beta(betaWindow), np.nan))
+    return sampled, {'volatility': np.array(volatility), 'beta': np.array(beta)}
+
+
+def start(closes: pd.DataFrame, market: str = "SPY", years: tuple = HORIZON_YEARS,
+          windows: tuple = ROLLING_WINDOWS, step: int = ROLLING_STEP) -> dict:
+    """
+    Multi-horizon and rolling analytics of every ticker in one vectorized pass over a close-price frame (dates x tickers)
+
+    Returns {'horizons': {ticker: ...}, 'rolling': {ticker: ...}} as compact arrays:
+        horizons    {'years': [1, 3, 5, 10], 'cagr': [...], 'risk': [...], 'beta': [...]}, None where history is shorter
+        rolling     {'windows': [60, 252], 'start': 'YYYY-MM-DD', 'step': 7, 'volatility': [[...], [...]], 'beta': [[...], [...]]}
+                    sample i is dated start + i * step calendar days, so no per-sample dates are sent
+    Volatility (percent, annualized) uses log returns like the frontier points, beta uses simple returns
+    like the beta graph. Every horizon and window is read from running sums, so adding one costs a
+    subtraction per ticker rather than another pass over the history
+    """
+    closes = closes.sort_index()
+    tickers = closes.columns.tolist()
+    if market not in closes.columns or len(closes) < 2:
+        return {'horizons': {}, 'rolling': {}}
+
+    dates = closes.index.values.astype('datetime64[D]')
+    prices = closes.to_numpy(dtype='f8')
+    marketPrices = prices[:, tickers.index(market)]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logReturns = np.vstack([np.full((1, prices.shape[1]), np.nan), np.log(prices[1:] / prices[:-1])])
+        simpleReturns = np.vstack([np.full((1, prices.shape[1]), np.nan), prices[1:] / prices[:-1] - 1])
+        marketSimple = np.concatenate([[np.nan], marketPrices[1:] / marketPrices[:-1] - 1])
+
+    volSums = _Sums(logReturns)
+    betaSums = _Sums(simpleReturns, marketSimple)
+
+    fixed = horizons(prices, dates, volSums, betaSums, years)
+    sampled, series = rolling(volSums, betaSums, dates, windows, step)
+
+    # series start at the first sample where any window is filled
+    filled = np.isfinite(series['volatility']).any(axis=0)
+    firsts = np.where(filled.any(axis=0), np.argmax(filled, axis=0), len(sampled) - 1)
+    starts = np.datetime_as_string(sampled[firsts], unit='D')
+
+    cagr, risk, beta = _compact(fixed['cagr'], 2), _compact(fixed['risk'], 1), _compact(fixed['beta'], 3)
+    rollingVolatility, rollingBeta = _compact(series['volatility'], 2), _compact(series['beta'], 3)
+
+    res = {'horizons': {}, 'rolling': {}}
+    for col, (ticker, first, startDate) in enumerate(zip(tickers, firsts, starts)):
+        res['horizons'][ticker] = {
+            'years': list(years),
+            'cagr': cagr[:, col].tolist(),
+            'risk': risk[:, col].tolist(),
+            'beta': beta[:, col].tolist(),
+        }
+        res['rolling'][ticker] = {
+            'windows': list(windows),
+            'start': str(startDate),
+            'step': step,
+            'volatility': rollingVolatility[:, first:, col].tolist(),
+            'beta': rollingBeta[:, first:, col].tolist(),
+        }
+    return res
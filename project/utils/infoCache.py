@@ -0,0 +1,132 @@
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from utils.providers import getProvider
+
+
+class InfoCache:
+    """
+    Shared, bounded LRU of ticker .info payloads with a TTL
+
+    Validation, stats and market metrics all read .info through this layer, so one request
+    fetches each ticker's payload at most once. Misses are fetched in one provider batch and
+    concurrent readers of the same missing ticker wait on the same in-flight future.
+    Failed fetches are returned to the caller but never cached
+    """
+
+
+    def __init__(self, maxSize: int = 2048, ttlInSeconds: float = 3600):
+        self.maxSize = maxSize
+        self.TTL = float(ttlInSeconds)
+
+        # ticker -> (expiry, info), ordered from least to most recently used
+        self.data = OrderedDict()
+        self._inflight = {}
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    def _lookup(self, ticker: str, NOW: float):
+        item = self.data.get(ticker)
+        if item is None:
+            return None
+        if item[0] <= NOW:
+            self.data.pop(ticker)
+            return None
+        self.data.move_to_end(ticker)
+        return item[1]
+
+
+    def put(self, ticker: str, info: dict):
+        """
+        Inserts a payload, evicting least recently used entries past maxSize
+        """
+        with self.lock:
+            self.data[ticker] = (time.monotonic() + self.TTL, info)
+            self.data.move_to_end(ticker)
+            while len(self.data) > self.maxSize:
+                self.data.popitem(last=False)
+                self.evictions += 1
+
+
+    def get(self, tickers: list[str]) -> dict:
+        """
+        Returns ticker -> .info payload (or the Exception raised fetching it) for every ticker
+        """
+
+        NOW = time.monotonic()
+        res, waiting, toFetch = {}, {}, []
+        with self.lock:
+            for ticker in dict.fromkeys(tickers):
+                info = self._lookup(ticker, NOW)
+                if info is not None:
+                    self.hits += 1
+                    res[ticker] = info
+                    continue
+
+                self.misses += 1
+                future = self._inflight.get(ticker)
+                if future is None:
+                    future = Future()
+                    self._inflight[ticker] = future
+                    toFetch.append(ticker)
+                waiting[ticker] = future
+
+        if toFetch:
+            try:
+                fetched = getProvider().info(toFetch)
+            except Exception as e:
+                fetched = {ticker: e for ticker in toFetch}
+
+            for ticker in toFetch:
+                info = fetched.get(ticker, KeyError(ticker))
+                if not isinstance(info, Exception):
+                    self.put(ticker, info)
+                with self.lock:
+                    self._inflight.pop(ticker).set_result(info)
+
+        for ticker, future in waiting.items():
+            res[ticker] = future.result()
+        return res
+
+
+    def getOne(self, ticker: str):
+        """
+        Single-ticker form of get()
+        """
+        return self.get([ticker])[ticker]
+
+
+    def stats(self) -> dict:
+        """
+        Hit-rate counters for observing how many upstream .info calls were saved
+        """
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self.data),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hitRate': round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+_infoCache = None
+_infoCacheLock = threading.Lock()
+
+
+def getInfoCache() -> InfoCache:
+    """
+    Returns the process-wide .info cache
+    """
+    global _infoCache
+    with _infoCacheLock:
+        if _infoCache is None:
+            _infoCache = InfoCache()
+        return _infoCache
@@ -1,12 +1,16 @@
-import yfinance as yf
-import pandas as pd
 import asyncio
 
+from utils.providers import getProvider
+from utils.infoCache import getInfoCache
+
 def fetchTickerInfo(ticker: str) -> dict:
     """
-    Blocking call to download data
+    Blocking call to download data, served from the shared .info cache when possible
     """
-    return yf.Ticker(ticker).info
+    info = getInfoCache().getOne(ticker)
+    if isinstance(info, Exception):
+        raise info
+    return info
 
 
 async def asyncTickerInfo(ticker: str) -> dict:
@@ -17,16 +21,12 @@ async def asyncTickerInfo(ticker: str) -> dict:
     return await loop.run_in_executor(None, fetchTickerInfo, ticker)
 
 
-async def fetchAllTickers(tickers: list[str]) -> list:
-    tasks = [asyncTickerInfo(t) for t in tickers]
-    return await asyncio.gather(*tasks, return_exceptions=True)
-
-
 def fetchData(ticker: str, info: dict, clost: float) -> dict:
     """gets historical prices, stats, and recent close"""
     
-    stock = yf.Ticker(ticker)
-    stats, price = stock.info, stock.history(period="1d")["close"].iloc[-1]
+    provider = getProvider()
+    stats = fetchTickerInfo(ticker)
+    price = provider.history([ticker], period="5d")["Close"][ticker].dropna().iloc[-1]
 
     eps, pe = stats.get("trailingEps", 'N/A'), stats.get("trailingPE", 'N/A')
     if eps != 'N/A' and pe == 'N/A':
@@ -45,12 +45,12 @@ def fetchData(ticker: str, info: dict, clost: float) -> dict:
     return stockMetrics
 
 
-def fetchMarketData() -> tuple[dict, dict]:
-    """Computes Averages/Expectations on Market Statistics"""
+def fetchMarketData(benchmark: str = "SPY") -> tuple[dict, dict]:
+    """Computes Averages/Expectations on Market Statistics, using benchmark as the market"""
 
-    spy = yf.Ticker("SPY")
-    price = spy.history(period="1d")["Close"].iloc[-1]
-    stats = spy.info
+    provider = getProvider()
+    price = provider.history([benchmark], period="5d")["Close"][benchmark].dropna().iloc[-1]
+    stats = fetchTickerInfo(benchmark)
     
     # market averages
     eps = stats.get("trailingEps", 'N/A')
@@ -0,0 +1,341 @@
+import bisect
+import contextvars
+import functools
+import os
+import threading
+import time
+
+# AXIA_METRICS=0 turns spans and counters into no-ops, Server-Timing still works for requests that ask for it
+ENABLED = os.environ.get('AXIA_METRICS', '1').lower() not in ('0', 'false', 'off')
+
+# AXIA_SERVER_TIMING=1 adds the header to every response, otherwise only to requests with ?timing=1
+SERVER_TIMING = os.environ.get('AXIA_SERVER_TIMING', '0').lower() in ('1', 'true', 'on')
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# (stage, seconds) spans of the current request, None when nobody asked for its Server-Timing header
+_timings = contextvars.ContextVar('serverTiming', default=None)
+
+
+def _escape(value) -> str:
+    """Label value escaped as the text format requires: backslash, double quote and newline"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labelText(names: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Monotonic counter per label combination
+    """
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+        self.lock = threading.Lock()
+
+
+    def inc(self, *labelValues, amount: float = 1):
+        with self.lock:
+            self.values[labelValues] = self.values.get(labelValues, 0) + amount
+
+
+    def lines(self) -> list[str]:
+        with self.lock:
+            values = list(self.values.items())
+        res = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        res += [f'{self.name}{_labelText(self.labels, key)} {_number(value)}' for key, value in values]
+        return res
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram per label combination, observe() is one bisect and two adds
+    """
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.values = {}
+        self.lock = threading.Lock()
+
+
+    def observe(self, value: float, *labelValues):
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.values.get(labelValues)
+            if series is None:
+                series = self.values[labelValues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+
+    def lines(self) -> list[str]:
+        with self.lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self.values.items()]
+        res = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                res.append(f'{self.name}_bucket{_labelText(self.labels, key, le)} {cumulative}')
+            res.append(f'{self.name}_sum{_labelText(self.labels, key)} {_number(total)}')
+            res.append(f'{self.name}_count{_labelText(self.labels, key)} {cumulative}')
+        return res
+
+
+class Registry:
+    """
+    Process-wide metrics, rendered in the Prometheus text exposition format
+    """
+
+    def __init__(self):
+        self.metrics = []
+
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+
+    def render(self, families: list | None = None) -> str:
+        """
+        Every registered metric plus families read at scrape time,
+        each family is (name, type, help, [(labels dict, value)])
+        """
+        lines = []
+        for metric in self.metrics:
+            lines += metric.lines()
+        for name, kind, help, samples in families or []:
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} {kind}']
+            for labels, value in samples:
+                lines.append(f'{name}{_labelText(tuple(labels), tuple(labels.values()))} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram('axia_stage_seconds', 'Time spent per instrumented stage', ('stage',))
+HTTP_REQUESTS = REGISTRY.counter('axia_http_requests_total', 'HTTP responses by route and status', ('route', 'status'))
+HTTP_SECONDS = REGISTRY.histogram('axia_http_request_seconds', 'Time to response headers by route', ('route',))
+CACHE_LOAD_SECONDS = REGISTRY.histogram('axia_cache_load_seconds', 'Time per cache batch load', ('cache',))
+CACHE_BATCH_SIZE = REGISTRY.histogram('axia_cache_batch_size', 'Keys per cache batch load', ('cache',), SIZE_BUCKETS)
+UPSTREAM_CALLS = REGISTRY.counter('axia_upstream_calls_total', 'Upstream market-data calls by outcome', ('call', 'outcome'))
+UPSTREAM_SECONDS = REGISTRY.histogram('axia_upstream_seconds', 'Upstream market-data call latency', ('call',))
+UPSTREAM_BATCH_SIZE = REGISTRY.histogram('axia_upstream_batch_size', 'Tickers per upstream call', ('call',), SIZE_BUCKETS)
+
+
+class _Span:
+    __slots__ = ('stage', 'timings', 'histogram', 'labels', 'started')
+
+    def __init__(self, stage: str, timings: list | None, histogram: Histogram, labels: tuple):
+        self.stage = stage
+        self.timings = timings
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        if ENABLED:
+            self.histogram.observe(elapsed, *self.labels)
+        if self.timings is not None:
+            self.timings.append((self.stage, elapsed))
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+def span(stage: str, histogram: Histogram = STAGE_SECONDS, labels: tuple | None = None):
+    """
+    Times a block into histogram (labelled by stage unless labels are given) and the request's Server-Timing
+    A shared no-op when metrics are disabled and the request did not ask for timings
+    """
+    timings = _timings.get()
+    if not ENABLED and timings is None:
+        return NULL_SPAN
+    return _Span(stage, timings, histogram, (stage,) if labels is None else labels)
+
+
+def timed(stage: str):
+    """
+    Decorator form of span()
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def cacheLoad(cache: str, size: int):
+    """
+    Span around one cache batch load, also records the batch size
+    """
+    if ENABLED:
+        CACHE_BATCH_SIZE.observe(size, cache)
+    return span(f'{cache}.load', CACHE_LOAD_SECONDS, (cache,))
+
+
+def observeUpstream(call: str, size: int, fn, *args, **kwargs):
+    """
+    Runs one upstream call, counting it by outcome ('ok', 'error' or 'throttled') and timing it
+    A returned Exception (how providers report per-ticker .info failures) counts as an error
+    """
+    timings = _timings.get()
+    if not ENABLED and timings is None:
+        return fn(*args, **kwargs)
+
+    from utils.scheduler import isThrottle
+
+    outcome = 'error'
+    started = time.perf_counter()
+    try:
+        res = fn(*args, **kwargs)
+        failures = [value for value in res.values() if isinstance(value, Exception)] if isinstance(res, dict) else []
+        outcome = 'throttled' if any(isThrottle(e) for e in failures) else 'error' if failures else 'ok'
+        return res
+    except Exception as e:
+        outcome = 'throttled' if isThrottle(e) else 'error'
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        if ENABLED:
+            UPSTREAM_CALLS.inc(call, outcome)
+            UPSTREAM_SECONDS.observe(elapsed, call)
+            UPSTREAM_BATCH_SIZE.observe(size, call)
+        if timings is not None:
+            timings.append((f'upstream.{call}', elapsed))
+
+
+def beginRequest(wantTiming: bool = False):
+    """
+    Starts collecting spans for the current request when its Server-Timing header is wanted
+    Called at the start of every request, so a reused worker thread never carries spans over
+    """
+    _timings.set([] if SERVER_TIMING or wantTiming else None)
+
+
+def serverTiming(total: float | None = None) -> str | None:
+    """
+    Server-Timing header for the current request's spans, repeated stages are summed, None if not collecting
+    """
+    timings = _timings.get()
+    if timings is None:
+        return None
+
+    stages = {}
+    for stage, seconds in list(timings):
+        slot = stages.setdefault(stage, [0.0, 0])
+        slot[0] += seconds
+        slot[1] += 1
+
+    parts = [f'{stage};dur={seconds * 1000:.2f}' + (f';desc="x{count}"' if count > 1 else '')
+             for stage, (seconds, count) in stages.items()]
+    if total is not None:
+        parts.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(parts)
+
+
+def observeRequest(route: str, status: int, seconds: float):
+    if ENABLED:
+        HTTP_REQUESTS.inc(route, status)
+        HTTP_SECONDS.observe(seconds, route)
+
+
+def cacheFamilies(caches: dict) -> list:
+    """
+    Scrape-time families from TemplateTTLCache.stats(), keyed by the cache's name
+    """
+    stats = {name: cache.stats() for name, cache in caches.items() if cache is not None}
+    families = []
+    for field, kind, help in (
+        ('hits', 'counter', 'Cache reads served from memory'),
+        ('misses', 'counter', 'Cache reads that needed a load'),
+        ('evictions', 'counter', 'Entries evicted to fit the memory budget'),
+        ('expirations', 'counter', 'Entries removed by the TTL sweep'),
+        ('entries', 'gauge', 'Entries held'),
+        ('bytes', 'gauge', 'Approximate bytes held'),
+        ('inflight', 'gauge', 'Keys currently being loaded'),
+    ):
+        name = f'axia_cache_{field}_total' if kind == 'counter' else f'axia_cache_{field}'
+        families.append((name, kind, help, [({'cache': cache}, values[field]) for cache, values in stats.items()]))
+
+    shared = {cache: values['shared'] for cache, values in stats.items() if values.get('shared')}
+    if shared:
+        families.append(('axia_cache_shared_hits_total', 'counter', 'Misses served from the shared backend',
+                         [({'cache': cache}, values['hits']) for cache, values in shared.items()]))
+        families.append(('axia_cache_shared_waits_total', 'counter', 'Misses that waited on another worker\'s load',
+                         [({'cache': cache}, values['waits']) for cache, values in shared.items()]))
+    return families
+
+
+def payloadFamilies(name: str, stats: dict) -> list:
+    """
+    Scrape-time families for a payload cache reporting hits, misses and entries (.info, /history)
+    """
+    return [
+        (f'axia_{name}_hits_total', 'counter', f'{name} payload cache hits', [({}, stats['hits'])]),
+        (f'axia_{name}_misses_total', 'counter', f'{name} payload cache misses', [({}, stats['misses'])]),
+        (f'axia_{name}_entries', 'gauge', f'{name} payloads held', [({}, stats['entries'])]),
+    ]
+
+
+def schedulerFamilies(stats: dict) -> list:
+    """
+    Scrape-time families from FetchScheduler.stats()
+    """
+    return [
+        ('axia_scheduler_queued', 'gauge', 'Upstream calls waiting, by priority',
+         [({'priority': priority}, count) for priority, count in stats['queued'].items()]),
+        ('axia_scheduler_retrying', 'gauge', 'Throttled calls waiting to retry', [({}, stats['retrying'])]),
+        ('axia_scheduler_inflight', 'gauge', 'Upstream calls running', [({}, stats['inflight'])]),
+        ('axia_scheduler_completed_total', 'counter', 'Upstream calls that succeeded', [({}, stats['completed'])]),
+        ('axia_scheduler_failed_total', 'counter', 'Upstream calls that failed for good', [({}, stats['failed'])]),
+        ('axia_scheduler_throttled_total', 'counter', 'Upstream calls throttled', [({}, stats['throttled'])]),
+        ('axia_scheduler_rate', 'gauge', 'Current upstream calls per second limit', [({}, stats['rate'])]),
+        ('axia_scheduler_token_wait_seconds_total', 'counter', 'Time workers waited on the rate limit',
+         [({}, stats['tokenWaitSeconds'])]),
+    ]
@@ -0,0 +1,282 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+# an update touching at most this many rows of a stored ticker is folded in as a row delta,
+# beyond it (new tickers, rewritten histories) the ticker's pairs are recomputed from its column
+MAX_PATCH_ROWS = 64
+
+
+def pairwiseCovariance(returns: np.ndarray) -> np.ndarray:
+    """
+    Covariance of the columns of a days x tickers return matrix, each pair over the days both have a value (NaN = missing)
+    """
+    valid = np.isfinite(returns)
+    complete = valid.all(axis=1)
+    if complete.all() or not valid[~complete].any():
+        # no partial rows, every pair overlaps on the same days
+        return np.atleast_2d(np.cov(returns[complete], rowvar=False))
+
+    M = valid.astype('f8')
+    R = np.where(valid, returns, 0.0)
+    N, S, C = M.T @ M, R.T @ M, R.T @ R
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = (C - S * S.T / N) / (N - 1)
+    return np.where(N > 1, cov, 0.0)
+
+
+class ReturnStats:
+    """
+    Per-ticker sufficient statistics of daily log returns, aligned on a shared date index
+
+    For every pair (i, j) over the days both have a return, the store keeps
+        N[i, j]     number of overlapping days
+        S[i, j]     sum of i's returns on those days (not symmetric)
+        C[i, j]     sum of r_i * r_j on those days
+        Q[i, j]     sum of r_i^2 on those days (not symmetric)
+    and from them the pairwise-complete covariance and correlation of every stored pair as float32
+    matrices, so covariance, risk, CAGR and MCTR of any portfolio are index slices of maintained arrays.
+
+    Adding or replacing one ticker costs one O(N * T) pass over the return matrix. New daily bars
+    (and other small edits) are folded in as a delta over the touched rows, O(d * N^2) for d rows,
+    so the matrix for the whole universe is never rebuilt
+    """
+
+
+    def __init__(self):
+        self.tickers = {}
+        self.dates = np.empty(0, dtype='datetime64[D]')
+
+        # T x capacity return matrix (0 where missing) and validity mask
+        self.R = np.zeros((0, 0))
+        self.M = np.zeros((0, 0), dtype=bool)
+
+        self.N = np.zeros((0, 0))
+        self.S = np.zeros((0, 0))
+        self.C = np.zeros((0, 0))
+        self.Q = np.zeros((0, 0))
+
+        # derived pairwise-complete daily covariance and correlation, refreshed after every update
+        self.cov = np.zeros((0, 0), dtype='f4')
+        self.corr = np.zeros((0, 0), dtype='f4')
+
+        # first/last valid close and number of valid closes, for CAGR
+        self.firstPrice = np.zeros(0)
+        self.lastPrice = np.zeros(0)
+        self.priceCount = np.zeros(0)
+
+        self.lock = threading.RLock()
+
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.tickers
+
+
+    def _grow(self, size: int):
+        """
+        Doubles column capacity until size tickers fit
+        """
+        capacity = self.R.shape[1]
+        if size <= capacity:
+            return
+        newCapacity = max(size, 2 * capacity, 16)
+        pad = newCapacity - capacity
+
+        self.R = np.pad(self.R, ((0, 0), (0, pad)))
+        self.M = np.pad(self.M, ((0, 0), (0, pad)))
+        for name in ('N', 'S', 'C', 'Q', 'cov', 'corr'):
+            setattr(self, name, np.pad(getattr(self, name), ((0, pad), (0, pad))))
+        for name in ('firstPrice', 'lastPrice', 'priceCount'):
+            setattr(self, name, np.pad(getattr(self, name), (0, pad)))
+
+
+    def _reindex(self, dates: np.ndarray):
+        """
+        Extends the shared date index to include dates, moving existing rows into place
+        """
+        union = np.union1d(self.dates, dates)
+        if len(union) == len(self.dates):
+            return
+
+        rows = np.searchsorted(union, self.dates)
+        R = np.zeros((len(union), self.R.shape[1]))
+        M = np.zeros((len(union), self.M.shape[1]), dtype=bool)
+        R[rows], M[rows] = self.R, self.M
+        self.dates, self.R, self.M = union, R, M
+
+
+    def update(self, closes: pd.DataFrame):
+        """
+        Adds or replaces tickers from a close-price frame (dates x tickers)
+        Stored tickers whose returns differ on at most MAX_PATCH_ROWS rows, e.g. the latest daily bars,
+        are patched as one row delta, every other ticker has its pairs recomputed in one block
+        """
+
+        closes = closes.sort_index()
+        prices = closes.to_numpy(dtype='f8')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            logReturns = np.log(prices[1:] / prices[:-1])
+        dates = closes.index.values.astype('datetime64[D]')
+
+        with self.lock:
+            self._reindex(dates)
+            rows = np.searchsorted(self.dates, dates)
+
+            # the returns each ticker should hold, on the shared date index
+            newR = np.zeros((len(self.dates), prices.shape[1]))
+            newM = np.zeros((len(self.dates), prices.shape[1]), dtype=bool)
+            valid = np.isfinite(logReturns)
+            newR[rows[1:]], newM[rows[1:]] = np.where(valid, logReturns, 0.0), valid
+
+            isNew = np.array([ticker not in self.tickers for ticker in closes.columns], dtype=bool)
+            for ticker in closes.columns[isNew]:
+                self.tickers[ticker] = len(self.tickers)
+            self._grow(len(self.tickers))
+            cols = self.indices(closes.columns.tolist())
+
+            changed = (newM != self.M[:, cols]) | (newR != self.R[:, cols])
+            counts = changed.sum(axis=0)
+            full = isNew | (counts > MAX_PATCH_ROWS)
+            patch = ~full & (counts > 0)
+
+            if full.any():
+                self.R[:, cols[full]], self.M[:, cols[full]] = newR[:, full], newM[:, full]
+                self._updatePairs(cols[full])
+            if patch.any():
+                self._applyPatch(cols[patch], np.flatnonzero(changed[:, patch].any(axis=1)), newR[:, patch], newM[:, patch])
+
+            # first/last valid close and close count per ticker, for CAGR
+            present = np.isfinite(prices)
+            count = present.sum(axis=0)
+            firstRow = np.argmax(present, axis=0)
+            lastRow = len(prices) - 1 - np.argmax(present[::-1], axis=0)
+            columns = np.arange(prices.shape[1])
+            self.firstPrice[cols] = np.where(count > 0, prices[firstRow, columns], np.nan)
+            self.lastPrice[cols] = np.where(count > 0, prices[lastRow, columns], np.nan)
+            self.priceCount[cols] = count
+
+            self._refreshDerived()
+
+
+    def _updatePairs(self, cols: np.ndarray):
+        """
+        Recomputes rows and columns cols of N, S, C and Q against every stored ticker, O(b * N * T) for b columns
+        """
+        n = len(self.tickers)
+        R, M = self.R[:, :n], self.M[:, :n].astype('f8')
+        r, m = self.R[:, cols], self.M[:, cols].astype('f8')
+
+        self.N[cols, :n] = m.T @ M
+        self.N[:n, cols] = self.N[cols, :n].T
+        self.S[:n, cols] = R.T @ m
+        self.S[cols, :n] = r.T @ M
+        self.C[cols, :n] = r.T @ R
+        self.C[:n, cols] = self.C[cols, :n].T
+        self.Q[:n, cols] = (R * R).T @ m
+        self.Q[cols, :n] = (r * r).T @ M
+
+
+    def _applyPatch(self, cols: np.ndarray, rows: np.ndarray, newR: np.ndarray, newM: np.ndarray):
+        """
+        Writes the new returns of cols on rows and moves N, S, C and Q by the difference
+        between those rows after and before, O(d * N^2) for d rows
+        """
+        n = len(self.tickers)
+        R0, M0 = self.R[rows, :n].copy(), self.M[rows, :n].astype('f8')
+        self.R[np.ix_(rows, cols)], self.M[np.ix_(rows, cols)] = newR[rows], newM[rows]
+        R1, M1 = self.R[rows, :n], self.M[rows, :n].astype('f8')
+
+        self.N[:n, :n] += M1.T @ M1 - M0.T @ M0
+        self.S[:n, :n] += R1.T @ M1 - R0.T @ M0
+        self.C[:n, :n] += R1.T @ R1 - R0.T @ R0
+        self.Q[:n, :n] += (R1 * R1).T @ M1 - (R0 * R0).T @ M0
+
+
+    def _refreshDerived(self):
+        """
+        Recomputes the float32 covariance and correlation of every stored pair from the sums, O(N^2)
+        Correlation divides by both variances over the same overlapping days, so it stays within [-1, 1]
+        """
+        n = len(self.tickers)
+        N, S, C, Q = self.N[:n, :n], self.S[:n, :n], self.C[:n, :n], self.Q[:n, :n]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = (C - S * S.T / N) / (N - 1)
+            var = (Q - S * S / N) / (N - 1)
+            corr = cov / np.sqrt(var * var.T)
+        self.cov[:n, :n] = np.where(N > 1, cov, 0.0)
+        self.corr[:n, :n] = np.where((N > 1) & np.isfinite(corr), np.clip(corr, -1.0, 1.0), 0.0)
+
+
+    def indices(self, tickers: list[str]) -> np.ndarray:
+        return np.array([self.tickers[t] for t in tickers], dtype=int)
+
+
+    def covariance(self, tickers: list[str]) -> np.ndarray:
+        """
+        Pairwise-complete daily covariance of log returns for tickers, an O(k^2) slice of the maintained matrix
+        """
+        with self.lock:
+            idx = self.indices(tickers)
+            return self.cov[np.ix_(idx, idx)].astype('f8')
+
+
+    def correlation(self, tickers: list[str]) -> np.ndarray:
+        """
+        Pairwise-complete correlation of daily log returns for tickers, an O(k^2) slice of the maintained matrix
+        """
+        with self.lock:
+            idx = self.indices(tickers)
+            return self.corr[np.ix_(idx, idx)].astype('f8')
+
+
+    def meanReturn(self, tickers: list[str]) -> np.ndarray:
+        """
+        Mean daily log return of each ticker over its own history
+        """
+        with self.lock:
+            idx = self.indices(tickers)
+            n, total = self.N[idx, idx], self.S[idx, idx]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(n > 0, total / n, 0.0)
+
+
+    def risk(self, tickers: list[str]) -> np.ndarray:
+        """
+        Annualized volatility in percent
+        """
+        return np.sqrt(np.diag(self.covariance(tickers)) * TRADING_DAYS) * 100
+
+
+    def cagr(self, tickers: list[str]) -> np.ndarray:
+        """
+        Compound annual growth rate in percent, years measured in trading days of stored history
+        """
+        with self.lock:
+            idx = self.indices(tickers)
+            first, last, count = self.firstPrice[idx], self.lastPrice[idx], self.priceCount[idx]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (np.power(last / first, TRADING_DAYS / count) - 1) * 100
+
+
+    def mctr(self, tickers: list[str], w: np.ndarray | None = None) -> dict:
+        """
+        Normalized marginal contribution to risk of each ticker in the portfolio, equal weights by default
+        """
+        if w is None:
+            w = np.full(len(tickers), 1 / len(tickers))
+        cov = self.covariance(tickers)
+        sigma = np.sqrt(w @ cov @ w)
+        contribution = (cov @ w) / sigma
+        return dict(zip(tickers, (contribution / contribution.sum()).tolist()))
+
+
+    def frontierPoints(self, tickers: list[str]) -> dict:
+        """
+        Per-ticker {'risk', 'cagr'} points, independent of which other tickers are loaded
+        """
+        risk = np.round(self.risk(tickers), 1)
+        cagr = np.round(self.cagr(tickers), 2)
+        return {t: {'risk': float(r), 'cagr': float(c)} for t, r, c in zip(tickers, risk, cagr)}
@@ -0,0 +1,180 @@
+import os
+import time
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.providers import FIELDS, MarketDataProvider, getProvider
+
+ROW = np.dtype([('date', 'datetime64[D]')] + [(field, 'f8') for field in FIELDS])
+
+
+class PriceStore:
+    """
+    Persistent daily price-history store, one memory-mapped .npy file of ROW records per ticker
+
+    The full history is kept on disk, and update() only downloads bars from the last stored date onwards,
+    so restarts and cache misses cost a file open instead of a 10y network pull.
+    Reads return read-only memmap slices (zero-copy) located with a binary search on the date column
+    """
+
+
+    def __init__(self, root: str = 'data/prices', period: str = '10y', recheckInSeconds: int = 3600,
+                 provider: MarketDataProvider | None = None):
+        """
+        root:               directory holding <TICKER>.npy files
+        period:             yfinance period downloaded for tickers with no stored history
+        recheckInSeconds:   minimum time between two upstream checks for the same ticker
+        provider:           upstream source, defaults to the process-wide provider
+        """
+        self.root = root
+        self.provider = provider
+        self.period = period
+        self.recheckInterval = recheckInSeconds
+        os.makedirs(root, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self._lastChecked = {}
+
+
+    def _path(self, ticker: str) -> str:
+        return os.path.join(self.root, f'{ticker.upper()}.npy')
+
+
+    def history(self, ticker: str) -> np.ndarray:
+        """
+        Returns the stored rows for a ticker as a read-only memmap, or an empty array
+        """
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=ROW)
+        return np.load(path, mmap_mode='r')
+
+
+    def lastDate(self, ticker: str):
+        """
+        Most recent stored date for a ticker, None if nothing is stored
+        """
+        rows = self.history(ticker)
+        return rows['date'][-1] if len(rows) else None
+
+
+    def window(self, ticker: str, start=None, end=None) -> np.ndarray:
+        """
+        Zero-copy slice of a ticker's rows with start <= date <= end
+        """
+        rows = self.history(ticker)
+        dates = rows['date']
+        lo = 0 if start is None else np.searchsorted(dates, np.datetime64(start, 'D'), side='left')
+        hi = len(rows) if end is None else np.searchsorted(dates, np.datetime64(end, 'D'), side='right')
+        return rows[lo:hi]
+
+
+    def _write(self, ticker: str, rows: np.ndarray):
+        """
+        Atomically replaces a ticker's file so concurrent readers never see a partial write
+        """
+        path = self._path(ticker)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            np.save(f, rows)
+        os.replace(tmp, path)
+
+
+    def _toRows(self, frame: pd.DataFrame) -> np.ndarray:
+        """
+        Converts a single-ticker OHLCV frame into ROW records, dropping days with no close
+        """
+        frame = frame.dropna(subset=['Close'])
+        rows = np.empty(len(frame), dtype=ROW)
+        rows['date'] = frame.index.values.astype('datetime64[D]')
+        for field in FIELDS:
+            rows[field] = frame[field].to_numpy(dtype='f8') if field in frame else np.nan
+        return rows
+
+
+    def append(self, ticker: str, frame: pd.DataFrame):
+        """
+        Merges freshly downloaded bars into the stored history
+        Bars on or after the first new date replace stored ones (the last stored bar may have been intraday)
+        """
+        new = self._toRows(frame)
+        if not len(new):
+            return
+
+        old = self.history(ticker)
+        keep = old[:np.searchsorted(old['date'], new['date'][0], side='left')]
+        self._write(ticker, np.concatenate([keep, new]))
+
+
+    def update(self, tickers: list[str]):
+        """
+        Brings the stored history of tickers up to date
+        Tickers sharing the same last stored date are downloaded together in one block call
+        """
+
+        NOW = time.monotonic()
+        groups = {}
+        with self.lock:
+            for ticker in tickers:
+                if NOW - self._lastChecked.get(ticker, -np.inf) < self.recheckInterval:
+                    continue
+                self._lastChecked[ticker] = NOW
+                groups.setdefault(self.lastDate(ticker), []).append(ticker)
+
+        for last, group in groups.items():
+            provider = self.provider or getProvider()
+            try:
+                if last is None:
+                    data = provider.history(group, period=self.period)
+                else:
+                    data = provider.history(group, start=last)
+            except Exception as e:
+                print(f'price store update failed for {group}: {e}')
+                with self.lock:
+                    for ticker in group:
+                        self._lastChecked.pop(ticker, None)
+                continue
+
+            if data is None or data.empty:
+                continue
+
+            for ticker in group:
+                try:
+                    frame = data.xs(ticker, level=1, axis=1)
+                except KeyError:
+                    continue
+                self.append(ticker, frame)
+
+
+    def panel(self, tickers: list[str], years: int = 10) -> pd.DataFrame:
+        """
+        Builds a yf.download-shaped frame, columns (field, ticker), over the last `years` of stored history
+        Per-ticker windows are memmap slices, the only copy is aligning them onto a shared date index
+        """
+
+        start = np.datetime64('today', 'D') - np.timedelta64(int(365.25 * years), 'D')
+        columns = {}
+        for ticker in tickers:
+            rows = self.window(ticker, start=start)
+            if not len(rows):
+                continue
+            index = pd.DatetimeIndex(rows['date'])
+            for field in FIELDS:
+                columns[(field, ticker)] = pd.Series(rows[field], index=index, copy=False)
+
+        if not columns:
+            return pd.DataFrame(columns=pd.MultiIndex.from_tuples([], names=['Price', 'Ticker']))
+
+        frame = pd.DataFrame(columns)
+        frame.columns = pd.MultiIndex.from_tuples(frame.columns, names=['Price', 'Ticker'])
+        return frame.sort_index(axis=1, level=0, sort_remaining=False)
+
+
+    def load(self, tickers: list[str], years: int = 10) -> pd.DataFrame:
+        """
+        Updates tickers from upstream where needed, then reads their panel from disk
+        """
+        self.update(tickers)
+        return self.panel(tickers, years)
@@ -0,0 +1,299 @@
+import json
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.metrics import observeUpstream
+from utils.scheduler import FetchScheduler, getScheduler, isThrottle
+
+FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+# pandas rules for the bar sizes the fixture serves, labelled by the period's first day like Yahoo's
+FIXTURE_INTERVALS = {'1d': None, '1wk': 'W-MON', '1mo': 'MS', '3mo': 'QS'}
+BAR_AGGREGATES = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+
+def periodToDays(period: str) -> int:
+    """
+    Converts a yfinance period string ('5d', '1mo', '10y', 'max') into calendar days
+    """
+    if period == 'max':
+        return 365 * 100
+    units = {'d': 1, 'wk': 7, 'mo': 31, 'y': 366}
+    for unit, days in units.items():
+        if period.endswith(unit) and period[:-len(unit)].isdigit():
+            return int(period[:-len(unit)]) * days
+    raise ValueError(f'unsupported period {period}')
+
+
+class MarketDataProvider:
+    """
+    Interface for every upstream market-data call the service makes
+
+    history() returns a yf.download-shaped frame: DatetimeIndex rows, (field, ticker) MultiIndex columns
+    info() returns ticker -> .info dict, or the Exception raised while fetching it
+    """
+
+    def history(self, tickers: list[str], period: str | None = None, start=None, interval: str = '1d') -> pd.DataFrame:
+        raise Exception('Function history() must be overloaded by a child class')
+
+    def info(self, tickers: list[str]) -> dict:
+        raise Exception('Function info() must be overloaded by a child class')
+
+
+class YFinanceProvider(MarketDataProvider):
+    """
+    Live provider backed by Yahoo Finance
+    """
+
+    def __init__(self, maxWorkers: int = 16, timeout: int = 10):
+        self.maxWorkers = maxWorkers
+        self.timeout = timeout
+
+        # one bounded pool shared by every info() call, instead of a new pool per call
+        self._pool = ThreadPoolExecutor(max_workers=maxWorkers, thread_name_prefix='yfinance-info')
+
+
+    def history(self, tickers: list[str], period: str | None = None, start=None, interval: str = '1d') -> pd.DataFrame:
+        import yfinance as yf
+
+        if start is None:
+            return yf.download(tickers, period=period or '1y', interval=interval, timeout=self.timeout, progress=False)
+        return yf.download(tickers, start=str(start), interval=interval, timeout=self.timeout, progress=False)
+
+
+    def _info(self, ticker: str):
+        import yfinance as yf
+
+        try:
+            return yf.Ticker(ticker).info
+        except Exception as e:
+            return e
+
+
+    def info(self, tickers: list[str]) -> dict:
+        if not tickers:
+            return {}
+        return dict(zip(tickers, self._pool.map(self._info, tickers)))
+
+
+class FixtureProvider(MarketDataProvider):
+    """
+    Deterministic offline provider for load tests and benchmarks
+
+    Serves recorded data from root (prices/<TICKER>.npy in PriceStore format, info/<TICKER>.json)
+    and falls back to synthetic data seeded by the ticker name. Daily bars are resampled to weekly,
+    monthly or quarterly ones, intraday intervals are not available. Every call sleeps
+    latency + perTickerLatency * len(tickers) seconds to mimic upstream round-trips
+    """
+
+    EPOCH = np.datetime64('2000-01-03', 'D')
+
+    def __init__(self, root: str | None = None, latency: float = 0.0, perTickerLatency: float = 0.0, synthetic: bool = True):
+        self.root = root
+        self.latency = latency
+        self.perTickerLatency = perTickerLatency
+        self.synthetic = synthetic
+
+
+    def _sleep(self, count: int):
+        delay = self.latency + self.perTickerLatency * count
+        if delay > 0:
+            time.sleep(delay)
+
+
+    def _seed(self, ticker: str) -> int:
+        return zlib.crc32(ticker.upper().encode())
+
+
+    def _recordedRows(self, ticker: str):
+        if self.root is None:
+            return None
+        path = os.path.join(self.root, 'prices', f'{ticker.upper()}.npy')
+        return np.load(path) if os.path.exists(path) else None
+
+
+    def _syntheticFrame(self, ticker: str) -> pd.DataFrame:
+        """
+        Geometric random walk on business days from EPOCH to today
+        The walk is generated in date order, so a longer range always extends a shorter one
+        """
+        dates = pd.bdate_range(str(self.EPOCH), pd.Timestamp('today').normalize())
+        rng = np.random.default_rng(self._seed(ticker))
+        drift, vol = rng.uniform(0.0, 0.0008), rng.uniform(0.008, 0.03)
+        close = 20 * np.exp(np.cumsum(rng.normal(drift, vol, len(dates))))
+        spread = np.abs(rng.normal(0, vol, len(dates))) * close
+        return pd.DataFrame({
+            'Open': close - spread / 2,
+            'High': close + spread,
+            'Low': close - spread,
+            'Close': close,
+            'Volume': rng.integers(10**5, 10**7, len(dates)).astype('f8'),
+        }, index=dates)
+
+
+    def _frame(self, ticker: str):
+        rows = self._recordedRows(ticker)
+        if rows is not None:
+            return pd.DataFrame({field: rows[field] for field in FIELDS}, index=pd.DatetimeIndex(rows['date']))
+        return self._syntheticFrame(ticker) if self.synthetic else None
+
+
+    def history(self, tickers: list[str], period: str | None = None, start=None, interval: str = '1d') -> pd.DataFrame:
+        if interval not in FIXTURE_INTERVALS:
+            raise ValueError(f'unsupported fixture interval {interval}, use one of {", ".join(FIXTURE_INTERVALS)}')
+        rule = FIXTURE_INTERVALS[interval]
+        self._sleep(len(tickers))
+
+        if start is None:
+            start = pd.Timestamp('today').normalize() - pd.Timedelta(days=periodToDays(period or '1y'))
+        start = pd.Timestamp(start)
+
+        columns = {}
+        for ticker in tickers:
+            frame = self._frame(ticker)
+            if frame is None:
+                continue
+            frame = frame[frame.index >= start]
+            if rule is not None:
+                frame = frame.resample(rule, label='left', closed='left').agg(BAR_AGGREGATES).dropna(subset=['Close'])
+            for field in FIELDS:
+                columns[(field, ticker)] = frame[field]
+
+        if not columns:
+            return pd.DataFrame()
+        frame = pd.DataFrame(columns)
+        frame.columns = pd.MultiIndex.from_tuples(frame.columns, names=['Price', 'Ticker'])
+        return frame
+
+
+    def _infoFor(self, ticker: str) -> dict:
+        if self.root is not None:
+            path = os.path.join(self.root, 'info', f'{ticker.upper()}.json')
+            if os.path.exists(path):
+                with open(path) as f:
+                    return json.load(f)
+        if not self.synthetic:
+            return {}
+
+        rng = np.random.default_rng(self._seed(ticker))
+        frame = self._syntheticFrame(ticker)
+        close = frame['Close'].to_numpy()
+        eps = float(np.round(rng.uniform(0.5, 12.0), 2))
+        return {
+            'shortName': f'{ticker.upper()} Synthetic Corp',
+            'trailingEps': eps,
+            'trailingPE': float(close[-1] / eps),
+            'forwardEps': float(np.round(eps * rng.uniform(0.9, 1.3), 2)),
+            'beta': float(np.round(rng.uniform(0.5, 1.8), 3)),
+            'dividendYield': float(np.round(rng.uniform(0.0, 4.0), 2)),
+            'trailingAnnualDividendYield': float(np.round(rng.uniform(0.0, 0.04), 4)),
+            'fiftyTwoWeekHigh': float(close[-252:].max()),
+            'fiftyTwoWeekLow': float(close[-252:].min()),
+        }
+
+
+    def info(self, tickers: list[str]) -> dict:
+        self._sleep(len(tickers))
+        return {ticker: self._infoFor(ticker) for ticker in tickers}
+
+
+class ScheduledProvider(MarketDataProvider):
+    """
+    Routes another provider's calls through the FetchScheduler
+    history() is one scheduled call, info() is one scheduled call per ticker so each
+    payload is rate limited, prioritized and retried on throttling individually
+    Every attempt is counted and timed by outcome in the upstream metrics
+    """
+
+    def __init__(self, inner: MarketDataProvider, scheduler: FetchScheduler):
+        self.inner = inner
+        self.scheduler = scheduler
+
+
+    def history(self, tickers: list[str], period: str | None = None, start=None, interval: str = '1d') -> pd.DataFrame:
+        return self.scheduler.run(observeUpstream, 'history', len(tickers), self.inner.history, tickers,
+                                  period=period, start=start, interval=interval)
+
+
+    def _infoOne(self, ticker: str):
+        info = observeUpstream('info', 1, self.inner.info, [ticker])[ticker]
+
+        # raising lets the scheduler back off and retry, other errors stay values
+        if isinstance(info, Exception) and isThrottle(info):
+            raise info
+        return info
+
+
+    def info(self, tickers: list[str]) -> dict:
+        futures = {ticker: self.scheduler.submit(self._infoOne, ticker) for ticker in tickers}
+        res = {}
+        for ticker, future in futures.items():
+            try:
+                res[ticker] = future.result()
+            except Exception as e:
+                res[ticker] = e
+        return res
+
+
+def record(source: MarketDataProvider, tickers: list[str], root: str, period: str = '10y'):
+    """
+    Captures history and info for tickers from source into a FixtureProvider directory
+    """
+    from utils.priceStore import PriceStore
+
+    store = PriceStore(os.path.join(root, 'prices'))
+    data = source.history(tickers, period=period)
+    for ticker in tickers:
+        try:
+            store.append(ticker, data.xs(ticker, level=1, axis=1))
+        except KeyError:
+            continue
+
+    os.makedirs(os.path.join(root, 'info'), exist_ok=True)
+    for ticker, info in source.info(tickers).items():
+        if isinstance(info, Exception):
+            continue
+        with open(os.path.join(root, 'info', f'{ticker.upper()}.json'), 'w') as f:
+            json.dump(info, f, default=str)
+
+
+_provider = None
+_providerLock = threading.Lock()
+
+
+def getProvider() -> MarketDataProvider:
+    """
+    Returns the process-wide provider, chosen on first use from the environment:
+        AXIA_PROVIDER           'yfinance' (default) or 'fixture'
+        AXIA_FIXTURE_DIR        recorded fixture directory, synthetic data when unset
+        AXIA_FIXTURE_LATENCY    injected seconds per fixture call
+    Every call goes through the process-wide FetchScheduler
+    """
+    global _provider
+    if _provider is None:
+        with _providerLock:
+            if _provider is None:
+                if os.environ.get('AXIA_PROVIDER', 'yfinance') == 'fixture':
+                    inner = FixtureProvider(
+                        root=os.environ.get('AXIA_FIXTURE_DIR'),
+                        latency=float(os.environ.get('AXIA_FIXTURE_LATENCY', 0.0)),
+                    )
+                else:
+                    inner = YFinanceProvider()
+                _provider = ScheduledProvider(inner, getScheduler())
+    return _provider
+
+
+def setProvider(provider: MarketDataProvider):
+    """
+    Overrides the process-wide provider, e.g. with a FixtureProvider for benchmarks
+    """
+    global _provider
+    with _providerLock:
+        _provider = provider
@@ -0,0 +1,180 @@
+"""
+Local stand-in for Redis, serves the subset of the protocol RedisBackend uses
+
+    python -m utils.respServer --port 6379
+
+then start every worker with AXIA_CACHE_BACKEND=redis://127.0.0.1:6379
+Supports PING, GET, MGET, SET (EX/PX/NX/XX), DEL, EXISTS, FLUSHALL and EVAL of the lock release script,
+data lives in memory only
+"""
+import argparse
+import asyncio
+import time
+
+from utils.sharedCache import RELEASE_SCRIPT
+
+
+class RESPStore:
+    """
+    In-memory keyspace with lazy per-key expiry
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.expiry = {}
+
+
+    def _alive(self, key: bytes) -> bool:
+        deadline = self.expiry.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self.values.pop(key, None)
+            self.expiry.pop(key, None)
+        return key in self.values
+
+
+    def get(self, key: bytes):
+        return self.values[key] if self._alive(key) else None
+
+
+    def set(self, key: bytes, value: bytes, options: list[bytes]) -> bool:
+        ttl, onlyNew, onlyExisting = None, False, False
+        i = 0
+        while i < len(options):
+            option = options[i].upper()
+            if option in (b'EX', b'PX'):
+                ttl = int(options[i + 1]) / (1 if option == b'EX' else 1000)
+                i += 1
+            elif option == b'NX':
+                onlyNew = True
+            elif option == b'XX':
+                onlyExisting = True
+            else:
+                raise ValueError(f'unsupported SET option {option.decode()}')
+            i += 1
+
+        exists = self._alive(key)
+        if (onlyNew and exists) or (onlyExisting and not exists):
+            return False
+        self.values[key] = value
+        if ttl is None:
+            self.expiry.pop(key, None)
+        else:
+            self.expiry[key] = time.monotonic() + ttl
+        return True
+
+
+    def delete(self, keys: list[bytes]) -> int:
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                removed += 1
+            self.values.pop(key, None)
+            self.expiry.pop(key, None)
+        return removed
+
+
+    def sweep(self):
+        NOW = time.monotonic()
+        for key in [key for key, deadline in self.expiry.items() if deadline <= NOW]:
+            self.values.pop(key, None)
+            self.expiry.pop(key, None)
+
+
+def encode(value) -> bytes:
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, bool):
+        return b'+OK\r\n' if value else b'$-1\r\n'
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, str):
+        return f'+{value}\r\n'.encode()
+    if isinstance(value, Exception):
+        return f'-ERR {value}\r\n'.encode()
+    if isinstance(value, list):
+        return b'*%d\r\n' % len(value) + b''.join(encode(item) for item in value)
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+async def readCommand(reader: asyncio.StreamReader) -> list[bytes] | None:
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b'*'):
+        # inline command, e.g. from `nc`
+        return line.strip().split()
+    parts = []
+    for _ in range(int(line[1:-2])):
+        size = int((await reader.readline())[1:-2])
+        parts.append((await reader.readexactly(size + 2))[:-2])
+    return parts
+
+
+def execute(store: RESPStore, parts: list[bytes]):
+    name, args = parts[0].upper(), parts[1:]
+    if name == b'PING':
+        return 'PONG'
+    if name == b'GET':
+        return store.get(args[0])
+    if name == b'MGET':
+        return [store.get(key) for key in args]
+    if name == b'SET':
+        return store.set(args[0], args[1], args[2:])
+    if name == b'DEL':
+        return store.delete(args)
+    if name == b'EXISTS':
+        return sum(store._alive(key) for key in args)
+    if name == b'EVAL':
+        # no Lua here, only the compare-and-delete RedisBackend.release sends
+        if args[0].decode() != RELEASE_SCRIPT or int(args[1]) != 1:
+            return ValueError('only the lock release script is supported')
+        return store.delete([args[2]]) if store.get(args[2]) == args[3] else 0
+    if name == b'FLUSHALL':
+        store.values.clear()
+        store.expiry.clear()
+        return 'OK'
+    return ValueError(f"unknown command '{name.decode()}'")
+
+
+async def serve(host: str, port: int):
+    store = RESPStore()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while (parts := await readCommand(reader)) is not None:
+                if not parts:
+                    continue
+                try:
+                    reply = execute(store, parts)
+                except (IndexError, ValueError) as e:
+                    reply = e
+                writer.write(encode(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def sweepLoop():
+        while True:
+            await asyncio.sleep(1)
+            store.sweep()
+
+    server = await asyncio.start_server(handle, host, port)
+    print(f'serving RESP on {host}:{port}')
+    sweeper = asyncio.create_task(sweepLoop())
+    async with server:
+        await server.serve_forever()
+    sweeper.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6379)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 
+from utils.portfolioStats import pairwiseCovariance
+
 def weights(capitalByTicker: np.ndarray | None, tickers: list, useEqualWeights: bool):
     """Given a list of tickers and their capital, computes the weights for each stock"""
     if useEqualWeights or capitalByTicker is None:
@@ -28,17 +30,9 @@ def start(data: pd.DataFrame) -> dict:
     tickers = data.xs('Close', level=0, axis=1).columns.tolist()
     log_returns = returns(data)
     
-    # Drop rows where all stocks are NaN, but keep NaNs for missing stocks
-    log_returns = log_returns.dropna(how='all')
-
-    # Fill remaining NaNs with 0 for covariance computation
-    # This assumes that missing trading days do not contribute to returns
-    r = log_returns.fillna(0).to_numpy()
-    if len(tickers) > 1:
-        cov = np.cov(r, rowvar=False)
-    else:
-        # For a single stock, variance
-        cov = np.array([[np.var(r, ddof=1)]])
+    # Each pair's covariance uses only the days both stocks traded,
+    # so a short history is neither padded with zero returns nor allowed to shrink the others
+    cov = pairwiseCovariance(log_returns.to_numpy(dtype='f8'))
     
     w = weights(None, tickers, useEqualWeights=True)
     sigma = np.sqrt(w.T @ cov @ w)
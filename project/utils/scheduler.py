@@ -0,0 +1,282 @@
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+# lower runs first
+USER, REFRESH, WARMUP = 0, 1, 2
+PRIORITY_NAMES = {USER: 'user', REFRESH: 'refresh', WARMUP: 'warmup'}
+
+# last resort for errors that only carry the status in their message, e.g. 'HTTP Error 429'
+THROTTLE_STATUS = re.compile(r'\b429\b')
+
+_priority = contextvars.ContextVar('fetchPriority', default=USER)
+
+
+def currentPriority() -> int:
+    return _priority.get()
+
+
+@contextmanager
+def fetchPriority(priority: int):
+    """
+    Tags every upstream fetch made inside the block with priority
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def statusCode(error: Exception) -> int | None:
+    """
+    HTTP status carried by an error (requests/httpx style response, urllib HTTPError), None without one
+    """
+    for owner in (error, getattr(error, 'response', None)):
+        for name in ('status_code', 'status', 'code'):
+            value = getattr(owner, name, None)
+            if isinstance(value, int) and not isinstance(value, bool):
+                return value
+    return None
+
+
+def isThrottle(error: Exception) -> bool:
+    """
+    Recognizes upstream throttling: yfinance's YFRateLimitError, an HTTP 429 status,
+    or for errors without a status a standalone 429 / 'too many requests' in the message
+    """
+    if 'ratelimit' in type(error).__name__.lower():
+        return True
+    status = statusCode(error)
+    if status is not None:
+        return status == 429
+    message = str(error).lower()
+    return 'too many requests' in message or THROTTLE_STATUS.search(message) is not None
+
+
+class _Task:
+    __slots__ = ('fn', 'args', 'kwargs', 'future', 'priority', 'attempt', 'context')
+
+    def __init__(self, fn, args, kwargs, priority: int):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.priority = priority
+        self.attempt = 0
+
+        # the submitter's context, so spans inside fn reach the request that queued it
+        self.context = contextvars.copy_context()
+
+
+class FetchScheduler:
+    """
+    Central scheduler for upstream market-data calls
+
+        * priority queues: user-facing misses run before refresh-ahead, which runs before warmup
+        * token bucket: at most `rate` calls per second with bursts up to `burst`
+        * concurrency cap: `concurrency` worker threads make calls
+        * throttling: retried with jittered exponential backoff, and the rate is halved (AIMD),
+          creeping back up by `rateStep` on every success
+    """
+
+
+    def __init__(self, rate: float = 5.0, burst: float = 10.0, concurrency: int = 8, maxRetries: int = 4,
+                 baseBackoff: float = 1.0, maxBackoff: float = 30.0, minRate: float = 0.5, rateStep: float = 0.1):
+        self.maxRate = rate
+        self.rate = rate
+        self.minRate = minRate
+        self.rateStep = rateStep
+        self.burst = burst
+        self.maxRetries = maxRetries
+        self.baseBackoff = baseBackoff
+        self.maxBackoff = maxBackoff
+
+        self._tokens = burst
+        self._refilledAt = time.monotonic()
+        self._bucketLock = threading.Lock()
+
+        # ready tasks keyed by (priority, seq), delayed retries keyed by (readyAt, seq)
+        self._ready = []
+        self._delayed = []
+        self._seq = itertools.count()
+        self._cv = threading.Condition()
+
+        self.inflight = 0
+        self.completed = 0
+        self.failed = 0
+        self.throttled = 0
+        self.retries = 0
+        self.tokenWaitSeconds = 0.0
+
+        self._workers = [threading.Thread(target=self._work, daemon=True, name=f'fetch-{i}') for i in range(concurrency)]
+        for worker in self._workers:
+            worker.start()
+
+
+    def submit(self, fn, *args, priority: int | None = None, **kwargs) -> Future:
+        """
+        Queues fn(*args, **kwargs), priority defaults to the caller's fetchPriority context
+        """
+        task = _Task(fn, args, kwargs, currentPriority() if priority is None else priority)
+        with self._cv:
+            heapq.heappush(self._ready, (task.priority, next(self._seq), task))
+            self._cv.notify()
+        return task.future
+
+
+    def run(self, fn, *args, priority: int | None = None, **kwargs):
+        """
+        Blocking form of submit()
+        """
+        return self.submit(fn, *args, priority=priority, **kwargs).result()
+
+
+    def _acquireToken(self):
+        """
+        Blocks until the bucket holds a token
+        """
+        started = time.monotonic()
+        while True:
+            with self._bucketLock:
+                NOW = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (NOW - self._refilledAt) * self.rate)
+                self._refilledAt = NOW
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.tokenWaitSeconds += NOW - started
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+    def _promoteDelayed(self, NOW: float):
+        while self._delayed and self._delayed[0][0] <= NOW:
+            _, _, task = heapq.heappop(self._delayed)
+            heapq.heappush(self._ready, (task.priority, next(self._seq), task))
+
+
+    def _waitForWork(self):
+        with self._cv:
+            while True:
+                NOW = time.monotonic()
+                self._promoteDelayed(NOW)
+                if self._ready:
+                    return
+                timeout = self._delayed[0][0] - NOW if self._delayed else None
+                self._cv.wait(timeout)
+
+
+    def _pop(self):
+        """
+        Takes the highest-priority ready task, None if another worker got there first
+        """
+        with self._cv:
+            self._promoteDelayed(time.monotonic())
+            if not self._ready:
+                return None
+            self.inflight += 1
+            return heapq.heappop(self._ready)[2]
+
+
+    def _work(self):
+        while True:
+            # the token is taken before choosing a task, so a user miss queued while
+            # this worker waited on the bucket still jumps ahead of warmup work
+            self._waitForWork()
+            self._acquireToken()
+            task = self._pop()
+            if task is None:
+                with self._bucketLock:
+                    self._tokens = min(self.burst, self._tokens + 1)
+                continue
+
+            try:
+                result = task.context.run(task.fn, *task.args, **task.kwargs)
+            except Exception as e:
+                self._onError(task, e)
+            else:
+                self._onSuccess()
+                task.future.set_result(result)
+            finally:
+                with self._cv:
+                    self.inflight -= 1
+
+
+    def _onSuccess(self):
+        with self._bucketLock:
+            self.completed += 1
+            self.rate = min(self.maxRate, self.rate + self.rateStep)
+
+
+    def _onError(self, task: _Task, error: Exception):
+        if not isThrottle(error) or task.attempt >= self.maxRetries:
+            with self._bucketLock:
+                self.failed += 1
+            task.future.set_exception(error)
+            return
+
+        with self._bucketLock:
+            self.throttled += 1
+            self.retries += 1
+            self.rate = max(self.minRate, self.rate / 2)
+
+        backoff = min(self.maxBackoff, self.baseBackoff * 2 ** task.attempt) * random.uniform(0.5, 1.5)
+        task.attempt += 1
+        with self._cv:
+            heapq.heappush(self._delayed, (time.monotonic() + backoff, next(self._seq), task))
+            self._cv.notify()
+
+
+    def stats(self) -> dict:
+        """
+        Queue depth per priority and throttle counters
+        """
+        with self._cv:
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _, _ in self._ready:
+                depth[PRIORITY_NAMES.get(priority, str(priority))] += 1
+            res = {
+                'queued': depth,
+                'retrying': len(self._delayed),
+                'inflight': self.inflight,
+            }
+        with self._bucketLock:
+            res.update({
+                'completed': self.completed,
+                'failed': self.failed,
+                'throttled': self.throttled,
+                'retries': self.retries,
+                'rate': round(self.rate, 3),
+                'tokenWaitSeconds': round(self.tokenWaitSeconds, 3),
+            })
+        return res
+
+
+_scheduler = None
+_schedulerLock = threading.Lock()
+
+
+def getScheduler() -> FetchScheduler:
+    """
+    Returns the process-wide scheduler, configured from the environment:
+        AXIA_FETCH_RATE             upstream calls per second (default 5)
+        AXIA_FETCH_BURST            token bucket size (default 10)
+        AXIA_FETCH_CONCURRENCY      concurrent upstream calls (default 8)
+    """
+    global _scheduler
+    with _schedulerLock:
+        if _scheduler is None:
+            _scheduler = FetchScheduler(
+                rate=float(os.environ.get('AXIA_FETCH_RATE', 5.0)),
+                burst=float(os.environ.get('AXIA_FETCH_BURST', 10.0)),
+                concurrency=int(os.environ.get('AXIA_FETCH_CONCURRENCY', 8)),
+            )
+        return _scheduler
@@ -1,32 +1,67 @@
 from utils.efficientFrontier import start as computeFrontier
+from utils.efficientFrontier import frontier as computeMeanVarianceFrontier, randomPortfolios, portfolioPoint
+from utils.riskChart import weights as computeWeights
 from utils.riskChart import start as computeMCTR
-from utils.systematicrisk import start as computeRisk
+from utils.systematicrisk import start as computeRisk, startAll as computeAllRisk
+from utils.horizons import start as computeHorizons
 from utils.validateTicker import validate_ticker
 from utils.market import fetchData as fetchStockMetrics
 from utils.market import fetchMarketData as fetchMarketMetrics
-
-import yfinance as yf
+from utils.priceStore import PriceStore
+from utils.portfolioStats import ReturnStats
+from utils.providers import getProvider
+from utils.infoCache import getInfoCache
+from utils.analyticsPool import getAnalyticsPool
+from utils.metrics import span, timed
+
+import numpy as np
 import pandas as pd
 import asyncio
 
 # CPU task (already vectorized)
+@timed('analytics.efficiencyFrontier')
 def efficiencyFrontier(data: pd.DataFrame) -> dict:
     return computeFrontier(data)
 
 
 # CPU task (already vectorized)
+@timed('analytics.marginalContributionToRisk')
 def marginalContributionToRisk(data: pd.DataFrame) -> dict:
     return computeMCTR(data)
 
 
-# CPU task (will be vectorized)
+# CPU task (single asset)
+@timed('analytics.systemicRisk')
 def systemicRisk(data: pd.DataFrame, ticker: str, market: str = "SPY") -> float:
     return computeRisk(data, ticker, market)
 
 
+# CPU task (vectorized across every ticker)
+@timed('analytics.systemicRiskAll')
+def systemicRiskAll(data: pd.DataFrame, market: str = "SPY") -> dict:
+    return computeAllRisk(data, market)
+
+
+# CPU task (vectorized across every ticker, horizon and rolling window)
+@timed('analytics.multiHorizon')
+def multiHorizon(closes: pd.DataFrame, market: str = "SPY") -> dict:
+    return computeHorizons(closes, market)
+
+
+# CPU task, independent per ticker, so large panels are split by ticker over the analytics process pool
+def closeAnalytics(closes: pd.DataFrame, market: str = "SPY") -> dict:
+    """
+    Beta and multi-horizon graphs of every column of a close-price frame, keyed by graph then ticker
+    """
+    return {
+        'beta': systemicRiskAll(pd.concat({'Close': closes}, axis=1), market),
+        **multiHorizon(closes, market),
+    }
+
+
 # Network task (use threading)
-def fetchMarketData() -> tuple[dict, dict]:
-    return fetchMarketMetrics()
+def fetchMarketData(benchmark: str = "SPY") -> tuple[dict, dict]:
+    return fetchMarketMetrics(benchmark)
 
 
 # no words
@@ -34,23 +69,74 @@ def validateTicker():
     pass
 
 
-def graphDriverFunction(allStockData: pd.DataFrame):
+@timed('analytics.loadPriceHistory')
+def loadPriceHistory(tickers: list[str], store: PriceStore, years: int = 10) -> pd.DataFrame:
+    """
+    Reads a yf.download-shaped price panel from the local store, fetching only bars newer than what is on disk
+    """
+    return store.load(tickers, years)
+
+
+@timed('analytics.graphDriverFunction')
+def graphDriverFunction(tickers: list[str], store: PriceStore, stats: ReturnStats, market: str = "SPY"):
     """
-    Calls the graph fuctions
+    Calls the graph fuctions over the stored price history of tickers
+    Folds the new histories into the running return statistics, then reads per-ticker points from them.
+    Beta, 1y/3y/5y/10y figures and rolling volatility/beta come from the same close panel,
+    on the analytics process pool when the panel is large.
+    MCTR depends on the whole portfolio, so it is assembled per request from stats instead of cached here
     """
+    allStockData = loadPriceHistory(list(dict.fromkeys(tickers + [market])), store)
+    if allStockData.empty:
+        return {'efficientFrontier': {}, 'beta': {}, 'horizons': {}, 'rolling': {}}
+
+    closes = allStockData.xs('Close', level=0, axis=1)
+    with span('analytics.returnStats.update'):
+        stats.update(closes[[t for t in tickers if t in closes.columns]])
+    loaded = [t for t in tickers if t in stats]
+    with span('analytics.frontierPoints'):
+        frontierPoints = stats.frontierPoints(loaded)
+    with span('analytics.closeAnalytics'):
+        analytics = getAnalyticsPool().run(closeAnalytics, closes, market)
     res = {
-        'mctr': marginalContributionToRisk(allStockData),
-        'efficientFrontier': efficiencyFrontier(allStockData)
+        'efficientFrontier': frontierPoints,
+        **analytics,
     }
     return res
 
 
+# CPU task, O(k^3) solve on k tickers, vectorized across frontier points and samples
+@timed('analytics.optimizePortfolio')
+def optimizePortfolio(stats: ReturnStats, tickers: list[str], capital: np.ndarray | None = None,
+                      points: int = 50, samples: int = 0) -> dict:
+    """
+    Mean-variance frontier over tickers from annualized stored statistics,
+    plus the requested capital-weighted portfolio and optional random portfolios
+    """
+    mu = stats.meanReturn(tickers) * 252
+    cov = stats.covariance(tickers) * 252
+    w = computeWeights(capital, tickers, useEqualWeights=capital is None)
+
+    res = {
+        'tickers': tickers,
+        'frontier': computeMeanVarianceFrontier(mu, cov, points),
+        'portfolio': portfolioPoint(mu, cov, w),
+        'mctr': stats.mctr(tickers, w),
+    }
+    if samples > 0:
+        res['samples'] = randomPortfolios(mu, cov, samples)
+    return res
+
+
 # Network task, blocked
 def fetchTickerInfo(ticker: str) -> dict:
     """
-    Blocking call to download data
+    Blocking call to download data, served from the shared .info cache when possible
     """
-    return yf.Ticker(ticker).info
+    info = getInfoCache().getOne(ticker)
+    if isinstance(info, Exception):
+        raise info
+    return info
 
 
 # Network task, asynchronous
@@ -62,10 +148,11 @@ async def asyncTickerInfo(ticker: str) -> dict:
     return await loop.run_in_executor(None, fetchTickerInfo, ticker)
 
 
-# Collects network tasks
+# Collects network tasks, misses go to the provider as one concurrent batch
 async def fetchAllTickers(tickers: list[str]) -> list:
-    tasks = [asyncTickerInfo(t) for t in tickers]
-    return await asyncio.gather(*tasks, return_exceptions=True)
+    loop = asyncio.get_running_loop()
+    infos = await loop.run_in_executor(None, getInfoCache().get, tickers)
+    return [infos[t] for t in tickers]
 
 
 # Technically a CPU task, but O(1) (SHOULD BE)
@@ -92,9 +179,11 @@ def computeStockMetrics(ticker: str, info: dict, close: float) -> dict:
     return stockMetrics
 
 
-async def statDriverFunction(tickers: list) -> dict:
+@timed('stats.statDriverSync')
+def statDriverSync(tickers: list, infos: dict | None = None) -> dict:
     """
     Constructs the stat dictionary
+    infos holds already-fetched .info payloads by ticker, only the remaining tickers are fetched
     """
 
     # plan
@@ -104,27 +193,26 @@ async def statDriverFunction(tickers: list) -> dict:
     # 3. put both into computeStockMetrics
 
     # bulk download price data for eps calcs
-    prices = yf.download(tickers, period="1d", interval="1d", group_by='Ticker', timeout=10)
+    prices = getProvider().history(tickers, period="5d")
     closePrices = {}
     
-    # handle special download case for 1 ticker
-    # need to reformat df here to be consistent
-    
     # collect closes for eps calcs
-
     for ticker in tickers:
         try:
-            closePrices[ticker] = prices[ticker]['Close'].iloc[0]
+            closePrices[ticker] = prices['Close'][ticker].dropna().iloc[-1]
         except Exception as e:
             print('exception raised when accessing recent closes')
             closePrices[ticker] = None
 
-    # opens n threads, each making a request to yfin for stock n 
-    data = await fetchAllTickers(tickers)
+    # one batched .info call, the provider fans it out over its own bounded thread pool
+    infos = dict(infos or {})
+    toFetch = [ticker for ticker in tickers if ticker not in infos]
+    infos.update(getInfoCache().get(toFetch))
     
     # collect stats into dict
     results = {}
-    for ticker, info in zip(tickers, data):
+    for ticker in tickers:
+        info = infos[ticker]
         if isinstance(info, Exception) or closePrices[ticker] is None:
             results[ticker] = {"error": str(info) if isinstance(info, Exception) else "No price data"}
         else:
@@ -133,8 +221,17 @@ async def statDriverFunction(tickers: list) -> dict:
     return results
 
 
-def statWrapperFunction(tickers: list[str]) -> dict:
-    return asyncio.run(statDriverFunction(tickers))
+async def statDriverFunction(tickers: list, infos: dict | None = None) -> dict:
+    """
+    Awaitable form of statDriverSync for callers already on an event loop
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, statDriverSync, tickers, infos)
+
+
+def statWrapperFunction(tickers: list[str], infos: dict | None = None) -> dict:
+    # runs on the calling thread, no event loop is spun up per call
+    return statDriverSync(tickers, infos)
 
 def getSp500Tickers():
 
@@ -0,0 +1,256 @@
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+# deletes a lock only while it still holds the releasing worker's token, so a lapsed holder cannot drop its successor's lock
+RELEASE_SCRIPT = "if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) else return 0 end"
+
+
+class CacheBackend:
+    """
+    Store shared by every worker process on a host, sits behind each process's in-memory cache
+
+    Values are stored with their load time so readers can tell how old they are,
+    and per-key locks give cross-process single-flight: only the lock holder fetches a key.
+    Each lock holds a random token, release only deletes the locks still holding the caller's tokens
+    """
+
+    def getMany(self, namespace: str, keys: list) -> dict:
+        """Returns key -> (value, loadedAtEpoch) for keys present and unexpired"""
+        raise Exception('Function getMany() must be overloaded by a child class')
+
+    def setMany(self, namespace: str, items: dict, ttl: float):
+        """Stores key -> value with the current time as load time"""
+        raise Exception('Function setMany() must be overloaded by a child class')
+
+    def acquire(self, namespace: str, key, ttl: float) -> str | None:
+        """Takes the load lock for key, returns its owner token, None if another process holds it"""
+        raise Exception('Function acquire() must be overloaded by a child class')
+
+    def release(self, namespace: str, tokens: dict):
+        """Releases key -> token locks taken by acquire, a lock that lapsed and was taken by someone else is kept"""
+        raise Exception('Function release() must be overloaded by a child class')
+
+    def isLocked(self, namespace: str, key) -> bool:
+        raise Exception('Function isLocked() must be overloaded by a child class')
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Shared store in one SQLite file (WAL mode), one connection per thread
+    """
+
+    def __init__(self, path: str = 'data/cache.sqlite3'):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+
+        # workers starting together race to create the file, switching to WAL skips the busy timeout
+        for attempt in range(50):
+            try:
+                self._setup()
+                break
+            except sqlite3.OperationalError as e:
+                if 'locked' not in str(e) or attempt == 49:
+                    raise
+                time.sleep(0.1)
+
+
+    def _setup(self):
+        db = self._db()
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('CREATE TABLE IF NOT EXISTS kv (ns TEXT, key TEXT, value BLOB, loadedAt REAL, expiry REAL, PRIMARY KEY (ns, key))')
+        # locks are short-lived, a table from before owner tokens is simply recreated
+        if 'owner' not in [row[1] for row in db.execute('PRAGMA table_info(locks)')]:
+            db.execute('DROP TABLE IF EXISTS locks')
+        db.execute('CREATE TABLE IF NOT EXISTS locks (ns TEXT, key TEXT, expiry REAL, owner TEXT, PRIMARY KEY (ns, key))')
+
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
+
+
+    def getMany(self, namespace: str, keys: list) -> dict:
+        if not keys:
+            return {}
+        marks = ','.join('?' * len(keys))
+        rows = self._db().execute(
+            f'SELECT key, value, loadedAt FROM kv WHERE ns = ? AND expiry > ? AND key IN ({marks})',
+            [namespace, time.time(), *map(str, keys)],
+        ).fetchall()
+        byName = {str(key): key for key in keys}
+        return {byName[key]: (pickle.loads(value), loadedAt) for key, value, loadedAt in rows}
+
+
+    def setMany(self, namespace: str, items: dict, ttl: float):
+        if not items:
+            return
+        NOW = time.time()
+        rows = [(namespace, str(key), pickle.dumps(value, pickle.HIGHEST_PROTOCOL), NOW, NOW + ttl) for key, value in items.items()]
+        db = self._db()
+        db.execute('BEGIN IMMEDIATE')
+        db.executemany('INSERT OR REPLACE INTO kv VALUES (?, ?, ?, ?, ?)', rows)
+        db.execute('DELETE FROM kv WHERE expiry <= ?', (NOW,))
+        db.execute('COMMIT')
+
+
+    def acquire(self, namespace: str, key, ttl: float) -> str | None:
+        NOW = time.time()
+        token = uuid.uuid4().hex
+        db = self._db()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            db.execute('DELETE FROM locks WHERE ns = ? AND key = ? AND expiry <= ?', (namespace, str(key), NOW))
+            acquired = db.execute('INSERT OR IGNORE INTO locks VALUES (?, ?, ?, ?)', (namespace, str(key), NOW + ttl, token)).rowcount == 1
+            db.execute('COMMIT')
+        except BaseException:
+            # an open write transaction would block every other worker's writes
+            db.execute('ROLLBACK')
+            raise
+        return token if acquired else None
+
+
+    def release(self, namespace: str, tokens: dict):
+        if tokens:
+            self._db().executemany('DELETE FROM locks WHERE ns = ? AND key = ? AND owner = ?',
+                                   [(namespace, str(key), token) for key, token in tokens.items()])
+
+
+    def isLocked(self, namespace: str, key) -> bool:
+        row = self._db().execute('SELECT 1 FROM locks WHERE ns = ? AND key = ? AND expiry > ?', (namespace, str(key), time.time())).fetchone()
+        return row is not None
+
+
+class RESPConnection:
+    """
+    Minimal Redis protocol (RESP2) client, enough for GET/MGET/SET/DEL/EXISTS/EVAL
+    """
+
+    def __init__(self, host: str, port: int, timeout: float = 5.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.reader = self.sock.makefile('rb')
+
+
+    def command(self, *parts):
+        encoded = [part if isinstance(part, bytes) else str(part).encode() for part in parts]
+        payload = b'*%d\r\n' % len(encoded) + b''.join(b'$%d\r\n%s\r\n' % (len(part), part) for part in encoded)
+        self.sock.sendall(payload)
+        return self._read()
+
+
+    def _read(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError('connection closed by server')
+        kind, body = line[:1], line[1:-2]
+        if kind == b'+':
+            return body.decode()
+        if kind == b'-':
+            raise RuntimeError(body.decode())
+        if kind == b':':
+            return int(body)
+        if kind == b'$':
+            size = int(body)
+            if size < 0:
+                return None
+            data = self.reader.read(size + 2)
+            return data[:-2]
+        if kind == b'*':
+            count = int(body)
+            return None if count < 0 else [self._read() for _ in range(count)]
+        raise RuntimeError(f'unexpected reply {line!r}')
+
+
+class RedisBackend(CacheBackend):
+    """
+    Shared store over the Redis protocol, works with Redis or the local stand-in in utils/respServer.py
+    Values are pickled (value, loadedAtEpoch) pairs, locks are SET NX PX keys holding the owner's token
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 6379, prefix: str = 'axia'):
+        self.host = host
+        self.port = port
+        self.prefix = prefix
+        self._local = threading.local()
+
+
+    def _conn(self) -> RESPConnection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = RESPConnection(self.host, self.port)
+            self._local.conn = conn
+        return conn
+
+
+    def _command(self, *parts):
+        try:
+            return self._conn().command(*parts)
+        except (ConnectionError, OSError):
+            # reconnect once, e.g. after the server restarted
+            self._local.conn = None
+            return self._conn().command(*parts)
+
+
+    def _key(self, namespace: str, key) -> str:
+        return f'{self.prefix}:{namespace}:{key}'
+
+
+    def _lockKey(self, namespace: str, key) -> str:
+        return f'{self.prefix}:lock:{namespace}:{key}'
+
+
+    def getMany(self, namespace: str, keys: list) -> dict:
+        if not keys:
+            return {}
+        values = self._command('MGET', *(self._key(namespace, key) for key in keys))
+        return {key: pickle.loads(value) for key, value in zip(keys, values) if value is not None}
+
+
+    def setMany(self, namespace: str, items: dict, ttl: float):
+        NOW = time.time()
+        for key, value in items.items():
+            payload = pickle.dumps((value, NOW), pickle.HIGHEST_PROTOCOL)
+            self._command('SET', self._key(namespace, key), payload, 'PX', int(ttl * 1000))
+
+
+    def acquire(self, namespace: str, key, ttl: float) -> str | None:
+        token = uuid.uuid4().hex
+        return token if self._command('SET', self._lockKey(namespace, key), token, 'NX', 'PX', int(ttl * 1000)) == 'OK' else None
+
+
+    def release(self, namespace: str, tokens: dict):
+        for key, token in tokens.items():
+            self._command('EVAL', RELEASE_SCRIPT, 1, self._lockKey(namespace, key), token)
+
+
+    def isLocked(self, namespace: str, key) -> bool:
+        return self._command('EXISTS', self._lockKey(namespace, key)) == 1
+
+
+def makeBackend(url: str | None) -> CacheBackend | None:
+    """
+    Builds a backend from a URL:
+        sqlite:///data/cache.sqlite3    (relative path) or sqlite:////abs/path.sqlite3
+        redis://127.0.0.1:6379
+    None or '' disables sharing
+    """
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme == 'sqlite':
+        return SQLiteBackend(parsed.path[1:] if parsed.path.startswith('/') else parsed.path)
+    if parsed.scheme == 'redis':
+        return RedisBackend(parsed.hostname or '127.0.0.1', parsed.port or 6379)
+    raise ValueError(f'unsupported cache backend {url}')
@@ -0,0 +1,49 @@
+import os
+import pickle
+import time
+
+
+def saveSnapshot(path: str, caches: dict, extra: dict | None = None) -> int:
+    """
+    Writes every cache's live entries to path, atomically so a crash mid-write keeps the previous snapshot
+    caches maps a name to a TemplateTTLCache, extra holds any other picklable startup state
+    Returns the number of entries written
+    """
+
+    body = {
+        'savedAt': time.time(),
+        'caches': {name: cache.snapshot() for name, cache in caches.items() if cache is not None},
+        'extra': extra or {},
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(body, f, pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    return sum(len(items) for items in body['caches'].values())
+
+
+def loadSnapshot(path: str, caches: dict) -> tuple[int, dict]:
+    """
+    Restores the caches named in a snapshot written by saveSnapshot
+    Returns (entries restored, extra), or (0, {}) when there is no readable snapshot
+    """
+
+    try:
+        with open(path, 'rb') as f:
+            body = pickle.load(f)
+    except FileNotFoundError:
+        return 0, {}
+    except Exception as e:
+        print(f'ignoring unreadable cache snapshot {path}: {e}')
+        return 0, {}
+
+    elapsed = max(0.0, time.time() - body['savedAt'])
+    restored = 0
+    for name, items in body['caches'].items():
+        if caches.get(name) is not None:
+            restored += caches[name].restore(items, elapsed)
+    return restored, body['extra']
@@ -35,4 +35,38 @@ def start(data: pd.DataFrame, asset: str, market: str = "SPY") -> float:
     return float(beta)
 
 
-    
+def startAll(data: pd.DataFrame, market: str = "SPY") -> dict:
+    """
+    Compute beta, annualized alpha and R^2 of every ticker against a market benchmark in one pass.
+    data: full yfinance DataFrame containing many tickers and the market
+    Each column is regressed on the market over the days both have returns, using masked
+    column sums, so uneven histories need no per-ticker concat/dropna
+    """
+    close_prices = data.xs('Close', level=0, axis=1)
+    if market not in close_prices.columns:
+        return {}
+
+    returns = close_prices.pct_change(fill_method=None).to_numpy(dtype='f8')
+    market_returns = returns[:, close_prices.columns.get_loc(market)][:, None]
+
+    mask = np.isfinite(returns) & np.isfinite(market_returns)
+    r = np.where(mask, returns, 0.0)
+    m = np.where(mask, market_returns, 0.0)
+
+    n = mask.sum(axis=0)
+    sum_r, sum_m = r.sum(axis=0), m.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov_rm = ((r * m).sum(axis=0) - sum_r * sum_m / n) / (n - 1)
+        var_m = ((m * m).sum(axis=0) - sum_m * sum_m / n) / (n - 1)
+        var_r = ((r * r).sum(axis=0) - sum_r * sum_r / n) / (n - 1)
+
+        beta = cov_rm / var_m
+        alpha = (sum_r / n - beta * sum_m / n) * 252 * 100
+        r2 = cov_rm * cov_rm / (var_m * var_r)
+
+    res = {}
+    for ticker, b, a, rr, count in zip(close_prices.columns, beta, alpha, r2, n):
+        if count < 2 or not np.isfinite(b):
+            continue
+        res[ticker] = {'beta': float(np.round(b, 3)), 'alpha': float(np.round(a, 2)), 'r2': float(np.round(rr, 3))}
+    return res
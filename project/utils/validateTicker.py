@@ -1,13 +1,44 @@
-import yfinance as yf
+import csv
+import os
+
+from utils.infoCache import getInfoCache
+
+UNIVERSE_PATH = os.path.join(os.path.dirname(__file__), 'sp500list.csv')
+_universe = None
+
+
+def loadUniverse(path: str = UNIVERSE_PATH) -> frozenset:
+    """
+    Reads the known symbol universe (the Ticker column of sp500list.csv) once per process
+    """
+    global _universe
+    if _universe is None:
+        with open(path, newline='') as f:
+            _universe = frozenset(row['Ticker'].strip().upper() for row in csv.DictReader(f) if row.get('Ticker'))
+    return _universe
+
+
+def isKnownTicker(ticker: str) -> bool:
+    """
+    O(1) membership check against the known universe, no network call
+    """
+    return ticker.upper() in loadUniverse()
+
+
+def isValidInfo(info) -> bool:
+    """
+    A ticker is valid when its .info payload resolved and names a company
+    """
+    return not isinstance(info, Exception) and bool(info) and "shortName" in info
+
 
 def validate_ticker(ticker):
     try:
-        tickerObj = yf.Ticker(ticker)
-        info = tickerObj.info
+        if isKnownTicker(ticker):
+            return True
 
-        if not info or "shortName" not in info:
-            return False
-        return True
+        info = getInfoCache().getOne(ticker)
+        return isValidInfo(info)
     except Exception:
         return False
     
@@ -1,9 +1,13 @@
+import numpy as np
 from flask import Flask, jsonify
-import yfinance as yf
 from flask_cors import CORS
+from utils.history import readColumns
+from utils.priceStore import PriceStore
 
+# deprecated: the main app serves this route (and the multi-ticker /history) from the same price store
 app = Flask(__name__)
 CORS(app)
+store = PriceStore()
 
 @app.route('/api/history/<symbol>')
 # def get_price(symbol):
@@ -19,16 +23,17 @@ CORS(app)
     
 def get_history(symbol):
     try:
-        # Download 1 year of daily data
-        data = yf.download(symbol, period='1y', interval='1d', progress=False)
-        if data.empty:
-            return jsonify({'error': f'No data found for symbol {symbol.upper()}'}), 404
+        # 1 year of daily data from the local price store, only new bars are downloaded
+        symbol = symbol.upper()
+        store.update([symbol])
+        start = np.datetime64('today', 'D') - np.timedelta64(365, 'D')
+        columns = readColumns(store, [symbol], start=start, decimals=2)[symbol]
+        if not len(columns['date']):
+            return jsonify({'error': f'No data found for symbol {symbol}'}), 404
 
-        # Convert to JSON-friendly list
-        result = [
-            {'date': date.strftime('%Y-%m-%d'), 'close': round(float(row['Close']), 2)}
-            for date, row in data.iterrows()
-        ]
+        # Convert to JSON-friendly list, dates and closes are converted per column rather than per row
+        dates = np.datetime_as_string(columns['date'], unit='D').tolist()
+        result = [{'date': date, 'close': close} for date, close in zip(dates, columns['close'].tolist())]
 
         return jsonify({'symbol': symbol.upper(), 'history': result})
     except Exception as e: